@@ -1,10 +1,23 @@
-from flask import Flask, request, jsonify
-from utils.intent_router import handle_query
-from utils.extract_text import extract_text_from_file
-from utils.text_utils import process_document
-from utils.translator import translate_document_content, detect_language, translate_query
+from flask import Flask, Response, request, jsonify, stream_with_context
+from utils.intent_router import handle_query, intent_routing_stats
+from utils.streaming import stream_query
+from utils.summarizer import summarize_document, schedule_summary, PRECOMPUTE_SUMMARIES
+from utils.map_reduce_summary import partial_cache_stats
+from utils.extract_text import iter_text_pages, process_pool_enabled, split_pages, submit_extraction
+from utils.ingest import ExtractionError, StreamingIngest
+from utils.ingest_jobs import IngestJobManager
+from utils.translator import detect_language, translate_query, translation_cache_stats, language_detection_stats
 from utils.language_config import get_language_name, is_well_supported, SUPPORTED_LANGUAGES
-from pymongo import MongoClient
+from utils.embedding_cache import matrix_cache
+from utils.document_store import (
+    delete_document as delete_document_record, find_documents,
+    start_request_io, request_io, io_totals
+)
+from utils.mongo import get_collection, pool_stats
+from utils.http_session import connection_stats
+from utils.groq_api import rate_limiter as groq_rate_limiter
+from utils.embeddings import rate_limiter as embedding_rate_limiter, cache_stats as embedding_vector_cache_stats
+import hmac
 import os
 import logging
 from datetime import datetime
@@ -19,10 +32,33 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization,Accept'
-    response.headers['Access-Control-Allow-Methods'] = 'GET,POST,OPTIONS'
+    response.headers['Access-Control-Allow-Methods'] = 'GET,POST,DELETE,OPTIONS'
     response.headers['Access-Control-Max-Age'] = '86400'
     return response
 
+@app.before_request
+def reset_mongo_io():
+    start_request_io()
+
+@app.after_request
+def log_mongo_io(response):
+    io = request_io()
+    label = f"{request.method} {request.path}"
+
+    def log():
+        if io and io['queries']:
+            logger.info(
+                f"📊 MongoDB I/O for {label}: {io['queries']} queries, "
+                f"{io['documents']} docs, {io['bytes'] / 1024:.1f} KB, decode {io['decode_ms']:.1f} ms"
+            )
+
+    if response.is_streamed:
+        # Streamed bodies (SSE) do their reads while the generator runs
+        response.call_on_close(log)
+    else:
+        log()
+    return response
+
 @app.route('/api/<path:path>', methods=['OPTIONS'])
 def handle_options(path):
     return jsonify({}), 200
@@ -38,62 +74,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# MongoDB setup using env vars
-MONGO_URI = os.getenv("MONGO_URI")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
-COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+# Admin endpoints expose pool, cache and queue internals; they answer only
+# "Authorization: Bearer <ADMIN_TOKEN>" and are disabled when no token is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
-client = MongoClient(MONGO_URI)
-db = client[DATABASE_NAME]
-collection = db[COLLECTION_NAME]
+def extracted_pages(extracted):
+    """Page texts of a document whose extraction was started elsewhere (see submit_extraction)"""
+    raw_text, page_starts = extracted.result()
+    yield from split_pages(raw_text, page_starts)
 
-def process_multilingual_document(file_bytes, filename, file_ext, file_content_type):
+def process_multilingual_document(file_path, filename, file_ext, file_content_type, report=None, extracted=None):
     """
     Enhanced document processing with automatic language detection and translation
+    file_path is the spooled upload; its bytes are never read into memory here.
+    The document is extracted, chunked, embedded and stored as one pipeline (see StreamingIngest);
+    report(stage) is called after extraction, translation and embedding.
+    extracted is a Future of the text when extraction was started elsewhere (see submit_extraction).
+    Returns (document, message, language_info); the document is already stored.
     """
+    report = report or (lambda stage: None)
     try:
-        logger.info(f"🌍 Processing multilingual document: {filename} (size: {len(file_bytes)} bytes, ext: {file_ext})")
+        logger.info(f"🌍 Processing multilingual document: {filename} (size: {os.path.getsize(file_path)} bytes, ext: {file_ext})")
         
-        # Extract text from file
+        # Pages are chunked and embedded as they are extracted
+        pages = extracted_pages(extracted) if extracted is not None else iter_text_pages(file_path, file_ext)
+        ingest = StreamingIngest(filename, file_content_type, pages, report, paged=file_ext == '.pdf')
         try:
-            raw_text = extract_text_from_file(file_bytes, file_ext)
-            logger.info(f"📝 Extracted {len(raw_text)} characters from {filename}")
-            
-            if not raw_text or not raw_text.strip():
-                logger.warning(f"⚠️ Extracted text is empty for {filename}")
-                return None, "Could not extract text from the document. The document may be empty or not contain extractable text.", None
-                
-        except Exception as e:
+            document = ingest.run()
+        except ExtractionError as e:
             logger.error(f"❌ Error extracting text from {filename}: {str(e)}", exc_info=True)
             return None, f"Error extracting text from document: {str(e)}", None
+
+        if document is None:
+            logger.warning(f"⚠️ Extracted text is empty for {filename}")
+            return None, "Could not extract text from the document. The document may be empty or not contain extractable text.", None
         
-        logger.info(f"📄 Extracted {len(raw_text)} characters of text from {filename}")
-        
-        # Detect and translate if necessary
-        translated_text, original_lang, was_translated = translate_document_content(raw_text, filename)
-        
-        # Process document with the translated (English) text for better embeddings
-        processing_text = translated_text if was_translated else raw_text
-        
-        # Process document 
-        document = process_document(filename, file_content_type, processing_text)
-        
-        # Add additional multilingual metadata that might not be in process_document
-        if 'original_language' not in document:
-            document['original_language'] = original_lang
-        if 'was_translated' not in document:
-            document['was_translated'] = was_translated
-        if 'original_text' not in document and was_translated:
-            document['original_text'] = raw_text
-        
-        # Ensure translation_info exists
-        if 'translation_info' not in document:
-            document['translation_info'] = {
-                'original_language': original_lang,
-                'translated_to': "en" if was_translated else original_lang,
-                'translation_method': "groq_api" if was_translated else "none",
-                'processed_at': datetime.utcnow().isoformat()
-            }
+        logger.info(f"📄 Extracted {ingest.length} characters of text from {filename} into {ingest.chunk_count} chunks")
+        original_lang = ingest.language
+        was_translated = ingest.was_translated
         
         # Log the processing result
         lang_name = get_language_name(original_lang)
@@ -122,7 +140,7 @@ def get_document_language_summary(document_ids):
     Get a summary of languages in the uploaded documents
     """
     try:
-        docs = list(collection.find({"document_id": {"$in": document_ids}}))
+        docs = find_documents(document_ids, "language")
         
         language_summary = {
             'total_documents': len(docs),
@@ -166,6 +184,125 @@ def get_document_language_summary(document_ids):
         logger.error(f"Error getting language summary: {str(e)}")
         return None
 
+def store_uploaded_file(filename, file_content_type, file_path, report=None, extracted=None):
+    """
+    Process one uploaded (spooled) file and store it in MongoDB.
+    Returns the uploaded-document entry, or {'filename', 'error'} if the file could not be processed.
+    """
+    if not filename:
+        raise ValueError("File has no name")
+        
+    file_ext = os.path.splitext(filename)[1].lower()
+    if not file_ext:
+        raise ValueError("File has no extension")
+
+    file_size = os.path.getsize(file_path)
+    if not file_size:
+        raise ValueError("File is empty")
+
+    logger.info(f"🔍 Starting to process file: {filename} (size: {file_size} bytes)")
+    document_json, message, language_info = process_multilingual_document(
+        file_path, filename, file_ext, file_content_type, report, extracted
+    )
+    if document_json is None:
+        return {'filename': filename, 'error': message}
+    
+    logger.info(f"💾 Document stored in MongoDB with document ID: {document_json['document_id']}")
+    # Drop any stale vectors cached under this id
+    matrix_cache.invalidate(document_json['document_id'])
+    if PRECOMPUTE_SUMMARIES:
+        schedule_summary(document_json['document_id'])
+    if report:
+        report('stored')
+    
+    return {
+        'documentId': document_json['document_id'],
+        'filename': document_json['filename'],
+        'language_info': language_info,
+        'message': message
+    }
+
+def upload_response(results):
+    """
+    Build the upload response from per-file results, in upload order.
+    Returns (http_status, response_data)
+    """
+    uploaded_documents = [result for result in results if 'error' not in result]
+    language_summary = {
+        'total_processed': len(uploaded_documents),
+        'translated_count': 0,
+        'languages_detected': set(),
+        'processing_errors': [
+            {'filename': result['filename'], 'error': result['error']}
+            for result in results if 'error' in result
+        ]
+    }
+    for doc in uploaded_documents:
+        language_info = doc['language_info']
+        if language_info and language_info['was_translated']:
+            language_summary['translated_count'] += 1
+        if language_info:
+            language_summary['languages_detected'].add(language_info['language_name'])
+
+    if not uploaded_documents:
+        return 400, {
+            'error': 'Failed to process any documents',
+            'details': language_summary['processing_errors']
+        }
+
+    # Prepare response with language information
+    language_summary['languages_detected'] = list(language_summary['languages_detected'])
+    
+    if len(uploaded_documents) == 1:
+        doc = uploaded_documents[0]
+        response_data = {
+            'message': doc['message'],
+            'documentId': doc['documentId'],
+            'filename': doc['filename'],
+            'language_info': doc['language_info'],
+            'multilingual_summary': language_summary
+        }
+    else:
+        response_data = {
+            'message': f'{len(uploaded_documents)} documents uploaded and processed successfully',
+            'documentIds': [doc['documentId'] for doc in uploaded_documents],
+            'filenames': [doc['filename'] for doc in uploaded_documents],
+            'language_details': [doc['language_info'] for doc in uploaded_documents],
+            'multilingual_summary': language_summary,
+            # Keep for backward compatibility
+            'documentId': uploaded_documents[0]['documentId'],
+            'filename': uploaded_documents[0]['filename']
+        }
+    
+    logger.info(f"📤 Sending response with {len(uploaded_documents)} processed documents")
+    return 200, response_data
+
+def store_queued_file(filename, file_content_type, file_path, report, job_size=1):
+    """
+    Ingest worker task. A file on its own streams page by page into chunking and embedding;
+    the files of a multi-file job are extracted in the process pool, so workers don't contend for the GIL
+    """
+    file_ext = os.path.splitext(filename or '')[1].lower()
+    fan_out = job_size > 1 and process_pool_enabled() and os.path.getsize(file_path) and file_ext
+    extracted = submit_extraction(file_path, file_ext) if fan_out else None
+    return store_uploaded_file(filename, file_content_type, file_path, report, extracted)
+
+def upload_size(file):
+    """Size of an uploaded file without reading it"""
+    file.stream.seek(0, os.SEEK_END)
+    size = file.stream.tell()
+    file.stream.seek(0)
+    return size
+
+# Uploads sent with ?async=1 (or "Prefer: respond-async") are processed by these workers.
+# waitress-serve imports this module without running __main__, so tasks left in a
+# persistent queue are resumed here rather than on the next upload. `python app.py`
+# starts them from __main__ instead, in the serving process only, and extraction
+# workers re-import this file as __mp_main__ and must leave the queue alone.
+ingest_jobs = IngestJobManager(store_queued_file, upload_response)
+if __name__ not in ('__main__', '__mp_main__'):
+    ingest_jobs.resume()
+
 @app.route('/api/upload', methods=['POST', 'OPTIONS'])
 def upload_document():
     if request.method == 'OPTIONS':
@@ -190,8 +327,7 @@ def upload_document():
             file = request.files[f'file{file_index}']
             if file.filename != '':
                 uploaded_files.append(file)
-                logger.info(f"📄 Found file{file_index}: {file.filename} (size: {len(file.read())} bytes)")
-                file.seek(0)  # Reset file pointer after reading
+                logger.info(f"📄 Found file{file_index}: {file.filename} (size: {upload_size(file)} bytes)")
             file_index += 1
         
         # Also check for single file with key 'file'
@@ -199,8 +335,7 @@ def upload_document():
             file = request.files['file']
             if file.filename != '':
                 uploaded_files.append(file)
-                logger.info(f"📄 Found single file: {file.filename} (size: {len(file.read())} bytes)")
-                file.seek(0)  # Reset file pointer after reading
+                logger.info(f"📄 Found single file: {file.filename} (size: {upload_size(file)} bytes)")
         
         if not uploaded_files:
             logger.warning("❌ No valid files found")
@@ -208,121 +343,57 @@ def upload_document():
         
         logger.info(f"📁 Processing {len(uploaded_files)} file(s) with multilingual support")
         
-        # Process all uploaded files with multilingual support
-        uploaded_documents = []
-        language_summary = {
-            'total_processed': 0,
-            'translated_count': 0,
-            'languages_detected': set(),
-            'processing_errors': []
-        }
-        
-        for file in uploaded_files:
-            try:
-                # Get file information
+        if request.args.get('async', '').lower() in ('1', 'true', 'yes') or 'respond-async' in request.headers.get('Prefer', ''):
+            # Spool the files and return at once; workers process them (see utils/ingest_jobs.py)
+            spooled = [
+                (file.filename, file.content_type or 'application/octet-stream', ingest_jobs.spool(file))
+                for file in uploaded_files
+            ]
+            job_id = ingest_jobs.submit(spooled)
+            logger.info(f"📥 Upload queued as job {job_id}")
+            return jsonify({
+                'job_id': job_id,
+                'status_url': f'/api/upload/jobs/{job_id}',
+                'filenames': [filename for filename, _, _ in spooled]
+            }), 202
+        
+        # Spool every file to disk so extraction opens it by path instead of
+        # holding its bytes. With a process pool, extract all files at once in
+        # worker processes; otherwise each file streams through extraction.
+        # Translation, embedding and storage then follow in upload order
+        parallel = len(uploaded_files) > 1 and process_pool_enabled()
+        pending = []
+        try:
+            for file in uploaded_files:
+                file_path = ingest_jobs.spool(file)
+                file_ext = os.path.splitext(file.filename)[1].lower()
+                extracted = submit_extraction(file_path, file_ext) if parallel and os.path.getsize(file_path) and file_ext else None
+                pending.append((file, file_path, extracted))
+            
+            # Process all uploaded files with multilingual support
+            results = []
+            for file, file_path, extracted in pending:
                 filename = file.filename
-                if not filename:
-                    raise ValueError("File has no name")
-                    
-                file_ext = os.path.splitext(filename)[1].lower()
-                if not file_ext:
-                    raise ValueError("File has no extension")
-                    
-                file_content_type = file.content_type or 'application/octet-stream'
-                logger.info(f"📄 Processing file: {filename} (type: {file_content_type}, ext: {file_ext})")
-
-                # Read file bytes for processing
-                file_bytes = file.read()
-                if not file_bytes:
-                    raise ValueError("File is empty")
-
-                # Process with multilingual support
                 try:
-                    logger.info(f"🔍 Starting to process file: {filename} (size: {len(file_bytes)} bytes)")
-                    document_json, message, language_info = process_multilingual_document(
-                        file_bytes, filename, file_ext, file_content_type
-                    )
-                    logger.info(f"✅ Successfully processed file: {filename}")
+                    file_content_type = file.content_type or 'application/octet-stream'
+                    logger.info(f"📄 Processing file: {filename} (type: {file_content_type})")
+                    results.append(store_uploaded_file(filename, file_content_type, file_path, extracted=extracted))
+                    
                 except Exception as e:
-                    logger.error(f"❌ Error processing file {filename}: {str(e)}", exc_info=True)
-                    # Try to get more detailed error information
-                    import traceback
-                    error_details = traceback.format_exc()
-                    logger.error(f"📜 Error details: {error_details}")
-                    return jsonify({
-                        'error': f'Failed to process file {filename}',
-                        'details': str(e),
-                        'traceback': error_details
-                    }), 400
-                
-                if document_json is None:
-                    language_summary['processing_errors'].append({
-                        'filename': filename,
-                        'error': message
-                    })
-                    continue
-                
-                logger.info(f"📄 Processing document: {document_json['filename']}")
-                logger.info(f"🆔 Generated document ID: {document_json['document_id']}")
+                    error_msg = f"Error processing {filename}: {str(e)}"
+                    logger.error(f"❌ {error_msg}")
+                    results.append({'filename': filename, 'error': error_msg})
+        finally:
+            for _, file_path, extracted in pending:
+                if extracted is not None:
+                    extracted.cancel()
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
 
-                # Store in MongoDB
-                result = collection.insert_one(document_json)
-                logger.info(f"💾 Document stored in MongoDB with ID: {result.inserted_id}")
-                
-                # Update language summary
-                language_summary['total_processed'] += 1
-                if language_info and language_info['was_translated']:
-                    language_summary['translated_count'] += 1
-                if language_info:
-                    language_summary['languages_detected'].add(language_info['language_name'])
-                
-                uploaded_documents.append({
-                    'documentId': document_json['document_id'],
-                    'filename': document_json['filename'],
-                    'language_info': language_info,
-                    'message': message
-                })
-                
-            except Exception as e:
-                error_msg = f"Error processing {filename}: {str(e)}"
-                logger.error(f"❌ {error_msg}")
-                language_summary['processing_errors'].append({
-                    'filename': filename,
-                    'error': error_msg
-                })
-
-        if not uploaded_documents:
-            return jsonify({
-                'error': 'Failed to process any documents',
-                'details': language_summary['processing_errors']
-            }), 400
-
-        # Prepare response with language information
-        language_summary['languages_detected'] = list(language_summary['languages_detected'])
-        
-        if len(uploaded_documents) == 1:
-            doc = uploaded_documents[0]
-            response_data = {
-                'message': doc['message'],
-                'documentId': doc['documentId'],
-                'filename': doc['filename'],
-                'language_info': doc['language_info'],
-                'multilingual_summary': language_summary
-            }
-        else:
-            response_data = {
-                'message': f'{len(uploaded_documents)} documents uploaded and processed successfully',
-                'documentIds': [doc['documentId'] for doc in uploaded_documents],
-                'filenames': [doc['filename'] for doc in uploaded_documents],
-                'language_details': [doc['language_info'] for doc in uploaded_documents],
-                'multilingual_summary': language_summary,
-                # Keep for backward compatibility
-                'documentId': uploaded_documents[0]['documentId'],
-                'filename': uploaded_documents[0]['filename']
-            }
-        
-        logger.info(f"📤 Sending response with {len(uploaded_documents)} processed documents")
-        return jsonify(response_data), 200
+        status, response_data = upload_response(results)
+        return jsonify(response_data), status
         
     except Exception as e:
         logger.error(f"❌ Error in upload_document: {str(e)}")
@@ -330,6 +401,18 @@ def upload_document():
         traceback.print_exc()
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
+@app.route('/api/upload/jobs/<job_id>', methods=['GET'])
+def upload_job_status(job_id):
+    """
+    Progress of an asynchronous upload: each file's stage
+    (queued, extracted, translated, embedded, stored or failed) and, once
+    the job has finished, the response a synchronous upload would have returned
+    """
+    status = ingest_jobs.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown or expired upload job'}), 404
+    return jsonify(status), 200
+
 @app.route('/api/query', methods=['POST'])
 def query_documents():
     try:
@@ -358,7 +441,7 @@ def query_documents():
         logger.info("🚀 Calling handle_query with multilingual support...")
         
         # The handle_query function now automatically handles translation
-        response = handle_query(user_query, document_ids)
+        response = handle_query(user_query, document_ids, query_lang=query_lang)
         
         # Add language context to response
         language_summary = get_document_language_summary(document_ids)
@@ -381,6 +464,61 @@ def query_documents():
         traceback.print_exc()
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/query/stream', methods=['POST'])
+def query_documents_stream():
+    """
+    Same as /api/query, but the answer is sent as server-sent events while
+    Groq generates it: `status` (intent, before retrieval), `start` (intent,
+    sources), `token` (text deltas) and `end` (metadata, including document
+    and query languages).
+    """
+    try:
+        data = request.json
+        if not data:
+            logger.warning("❌ No JSON data provided")
+            return jsonify({'error': 'No JSON data provided'}), 400
+            
+        user_query = data.get('message') or data.get('query')
+        if not user_query:
+            logger.warning("❌ No query or message provided")
+            return jsonify({'error': 'No query or message provided'}), 400
+            
+        document_ids = data.get('document_ids', [])
+        if not document_ids:
+            logger.warning("❌ No documents uploaded yet")
+            return jsonify({'error': 'No documents uploaded yet.'}), 400
+
+        query_lang = detect_language(user_query)
+        query_lang_name = get_language_name(query_lang)
+        logger.info(f"🌊 Streaming query in {query_lang_name}: '{user_query}' for documents: {document_ids}")
+
+        def closing_metadata():
+            metadata = {
+                'query_language': {
+                    'detected_language': query_lang,
+                    'language_name': query_lang_name,
+                    'is_english': query_lang == 'en'
+                }
+            }
+            language_summary = get_document_language_summary(document_ids)
+            if language_summary:
+                metadata['document_languages'] = language_summary
+            return metadata
+
+        return Response(
+            stream_with_context(stream_query(user_query, document_ids, query_lang=query_lang,
+                                             closing_metadata=closing_metadata)),
+            mimetype='text/event-stream',
+            # Stop proxies (nginx) from buffering the stream
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Error in query_documents_stream: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/api/documents/languages', methods=['POST'])
 def get_document_languages():
     """
@@ -407,6 +545,45 @@ def get_document_languages():
         logger.error(f"❌ Language info retrieval failed: {str(e)}")
         return jsonify({'error': f'Language info retrieval failed: {str(e)}'}), 500
 
+@app.route('/api/documents/<document_id>', methods=['DELETE'])
+def delete_document(document_id):
+    """
+    Delete a document and drop its cached embedding matrix
+    """
+    try:
+        deleted = delete_document_record(document_id)
+        matrix_cache.invalidate(document_id)
+
+        if not deleted:
+            return jsonify({'error': 'Document not found'}), 404
+
+        logger.info(f"🗑️ Deleted document {document_id}")
+        return jsonify({'message': 'Document deleted', 'documentId': document_id}), 200
+
+    except Exception as e:
+        logger.error(f"❌ Document deletion failed: {str(e)}")
+        return jsonify({'error': f'Document deletion failed: {str(e)}'}), 500
+
+@app.route('/api/documents/<document_id>/summary', methods=['POST'])
+def document_summary(document_id):
+    """
+    Return a document's stored summary, generating it on first use.
+    Send {"regenerate": true} to replace the stored summary.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        regenerate = bool(data.get('regenerate', False))
+        result = summarize_document(document_id, regenerate=regenerate)
+        if not result.get('found', True):
+            return jsonify({'error': 'Document not found'}), 404
+
+        logger.info(f"📝 Summary for {document_id} ({'stored' if result.get('cached') else 'generated'})")
+        return jsonify({'documentId': document_id, **result}), 200
+
+    except Exception as e:
+        logger.error(f"❌ Summary failed: {str(e)}")
+        return jsonify({'error': f'Summary failed: {str(e)}'}), 500
+
 @app.route('/api/languages/supported', methods=['GET'])
 def get_supported_languages():
     """
@@ -489,6 +666,7 @@ def health_check_multilingual():
         groq_status = test_groq_connection()
         
         # Get database stats
+        collection = get_collection("documents")
         total_docs = collection.count_documents({})
         translated_docs = collection.count_documents({"was_translated": True})
         
@@ -527,6 +705,34 @@ def health_check_multilingual():
             'timestamp': datetime.utcnow().isoformat()
         }), 500
 
+@app.route('/api/admin/stats', methods=['GET'])
+def admin_stats():
+    """
+    Runtime statistics for sizing pools and caches
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {ADMIN_TOKEN}"):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify({
+        'mongo_pool': pool_stats(),
+        'mongo_io': io_totals(),
+        'embedding_cache': matrix_cache.stats(),
+        'embedding_vector_cache': embedding_vector_cache_stats(),
+        'translation_memory': translation_cache_stats(),
+        'language_detection': language_detection_stats(),
+        'intent_routing': intent_routing_stats(),
+        'summary_sections': partial_cache_stats(),
+        'ingest_jobs': ingest_jobs.stats(),
+        'http_sessions': connection_stats(),
+        'rate_limits': {
+            'huggingface': embedding_rate_limiter.stats(),
+            'groq': groq_rate_limiter.stats()
+        },
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
 if __name__ == '__main__':
     logger.info("🚀 Starting Flask app with multilingual support")
     logger.info(f"🌍 Supporting {len(SUPPORTED_LANGUAGES)} languages")
@@ -536,6 +742,7 @@ if __name__ == '__main__':
     # Use Waitress when PORT is set (Render/production) or FLASK_ENV=production
     if os.environ.get('PORT') or os.environ.get('FLASK_ENV') == 'production':
         from waitress import serve
+        ingest_jobs.start()
         logger.info(f"🚀 Starting production server with Waitress on port {port}")
         serve(app, host='0.0.0.0', port=port, threads=4)
     else:
@@ -544,6 +751,11 @@ if __name__ == '__main__':
         class HTTP1RequestHandler(WSGIRequestHandler):
             protocol_version = "HTTP/1.1"
 
+        # debug=True runs this file twice: in the reloader's watcher and in the serving
+        # child (WERKZEUG_RUN_MAIN=true). Only the child may consume the queue.
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            ingest_jobs.start()
+
         logger.info(f"🚀 Starting development server on port {port}")
         app.run(
             debug=True,
@@ -0,0 +1,66 @@
+"""
+Benchmark: multi-file upload extraction, one after another vs. the process pool.
+
+Generates synthetic PDFs of different sizes and times extracting all of them
+in sequence (the old upload loop) against submit_extraction(), which fans
+them out over EXTRACT_PROCESSES worker processes. With enough cores the
+pooled time approaches that of the largest single file.
+
+Usage:
+    python bench_extraction.py [--files 10] [--pages 40] [--processes 4]
+"""
+import argparse
+import os
+import time
+
+import fitz
+
+from utils import extract_text
+
+LINE = "Quarterly revenue grew in every region while operating costs fell. "
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), f"Page {page_num + 1}. " + LINE * 40, fontsize=9)
+    return doc.tobytes()
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload extraction benchmark")
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=40, help="pages in the largest file")
+    parser.add_argument('--processes', type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    # Sizes from pages/files up to pages, so one file dominates
+    files = [make_pdf(max(1, args.pages * (i + 1) // args.files)) for i in range(args.files)]
+    largest = files[-1]
+
+    extract_text.EXTRACT_PROCESSES = args.processes
+    # Start the workers before timing
+    [f.result() for f in [extract_text.submit_extraction(largest, ".pdf") for _ in range(args.processes)]]
+
+    largest_ms = timed(lambda: extract_text.extract_text_from_file(largest, ".pdf"))
+    sequential_ms = timed(lambda: [extract_text.extract_text_from_file(f, ".pdf") for f in files])
+    pooled_ms = timed(lambda: [future.result() for future in
+                               [extract_text.submit_extraction(f, ".pdf") for f in files]])
+
+    print(f"{args.files} PDFs, largest {args.pages} pages, {args.processes} process(es)")
+    print(f"{'path':<28}{'ms':>10}")
+    print("-" * 38)
+    print(f"{'largest file alone':<28}{largest_ms:>10.1f}")
+    print(f"{'sequential':<28}{sequential_ms:>10.1f}")
+    print(f"{'process pool':<28}{pooled_ms:>10.1f}  ({sequential_ms / pooled_ms:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: per-query language detection cost, before and after memoisation.
+
+The old /api/query path ran detect_language three times (query_documents,
+handle_query, translate_query), and each call ran langdetect twice (detect +
+detect_langs). The new path detects once per query, memoises the result and
+skips langdetect for short ASCII queries.
+
+Usage:
+    python bench_language_detection.py [--rounds 20]
+"""
+import argparse
+import time
+
+import langdetect
+
+from utils import translator
+
+QUERIES = [
+    "summarize this",
+    "what are the key points?",
+    "Compare the two contracts and list the differences in payment terms",
+    "¿Cuáles son los puntos clave del documento?",
+    "Quelles sont les principales conclusions de ce rapport ?",
+    "Was sind die wichtigsten Ergebnisse dieser Studie?",
+    "इस दस्तावेज़ का सारांश दीजिए",
+    "この文書の要点は何ですか",
+]
+
+
+def legacy_detect(text):
+    detected = langdetect.detect(text[:1000])
+    confidence = langdetect.detect_langs(text[:1000])[0].prob
+    return detected, confidence
+
+
+def legacy_query(query):
+    for _ in range(3):
+        legacy_detect(query)
+
+
+def new_query(query):
+    translator.detect_language_with_confidence(query)
+
+
+def time_per_query(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in QUERIES:
+            fn(query)
+    return (time.perf_counter() - started) * 1000 / (rounds * len(QUERIES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Language detection micro-benchmark")
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    langdetect.detect("warm up the profile loader")
+
+    legacy_ms = time_per_query(legacy_query, args.rounds)
+    translator._detect_sample.cache_clear()
+    cold_ms = time_per_query(new_query, 1)
+    warm_ms = time_per_query(new_query, args.rounds)
+
+    print(f"{'path':<34}{'ms / query':>12}")
+    print("-" * 46)
+    print(f"{'legacy (3 calls x 2 detector runs)':<34}{legacy_ms:>12.3f}")
+    print(f"{'single pass, first sight':<34}{cold_ms:>12.3f}  ({legacy_ms / cold_ms:.1f}x)")
+    print(f"{'single pass, memoised':<34}{warm_ms:>12.3f}  ({legacy_ms / warm_ms:.0f}x)")
+    print(translator.language_detection_stats())
+
+
+if __name__ == '__main__':
+    main()
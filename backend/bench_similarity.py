@@ -0,0 +1,87 @@
+"""
+Benchmark: per-chunk Python similarity loop vs. the vectorised engine.
+
+Compares the loop get_similar_chunks used to run (np.array + two norms per
+chunk, then a full sort) against utils.similarity at 1k, 10k and 100k chunks.
+
+Usage:
+    python bench_similarity.py [--dim 384] [--top-k 3] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from utils.similarity import build_embedding_matrix, score_matrices
+
+SIZES = [1_000, 10_000, 100_000]
+# Distinct vectors actually allocated; larger sizes reuse them so the list of
+# Python floats does not need gigabytes of RAM. Per-chunk cost is unchanged.
+POOL_SIZE = 2_000
+
+
+def make_chunks(n, dim):
+    rng = random.Random(42)
+    pool = [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(min(n, POOL_SIZE))]
+    return [{'text': f"chunk {i}", 'embedding': pool[i % len(pool)]} for i in range(n)]
+
+
+def legacy_loop(chunks, query_embedding, top_k):
+    similarities = []
+    query_emb = np.array(query_embedding)
+    for chunk in chunks:
+        chunk_emb = np.array(chunk['embedding'])
+        sim = np.dot(chunk_emb, query_emb) / (np.linalg.norm(chunk_emb) * np.linalg.norm(query_emb))
+        similarities.append((sim, chunk))
+    similarities.sort(key=lambda x: x[0], reverse=True)
+    return similarities[:top_k]
+
+
+def vectorised(chunks, query_embedding, top_k):
+    matrix, kept = build_embedding_matrix([c['embedding'] for c in chunks])
+    return [(sim, chunks[kept[row]]) for sim, _, row in score_matrices([matrix], query_embedding, top_k)]
+
+
+def time_best(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    query = [random.uniform(-1, 1) for _ in range(args.dim)]
+
+    print(f"{'chunks':>8} | {'legacy loop':>12} | {'build matrix':>12} | {'score only':>10} | "
+          f"{'cold':>6} | {'warm':>7}")
+    print("-" * 74)
+    for n in SIZES:
+        chunks = make_chunks(n, args.dim)
+
+        legacy = time_best(lambda: legacy_loop(chunks, query, args.top_k), args.repeat)
+        build = time_best(lambda: build_embedding_matrix([c['embedding'] for c in chunks]), args.repeat)
+        matrix, _ = build_embedding_matrix([c['embedding'] for c in chunks])
+        score = time_best(lambda: score_matrices([matrix], query, args.top_k), args.repeat)
+
+        # Sanity check: both paths must agree on the top scores
+        expected = [float(sim) for sim, _ in legacy_loop(chunks, query, args.top_k)]
+        got = [sim for sim, _ in vectorised(chunks, query, args.top_k)]
+        assert np.allclose(expected, got, atol=1e-5), (expected, got)
+
+        print(f"{n:>8} | {legacy * 1000:>10.1f}ms | {build * 1000:>10.1f}ms | {score * 1000:>8.2f}ms | "
+              f"{legacy / (build + score):>5.1f}x | {legacy / score:>6.0f}x")
+
+    print("\ncold = build matrix + score on every query; warm = matrix already built for the document")
+
+
+if __name__ == '__main__':
+    main()
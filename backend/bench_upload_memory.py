@@ -0,0 +1,193 @@
+"""
+Benchmark: peak RSS of one upload, bytes in memory vs. spooled to disk vs. streamed.
+
+The old upload path read the file into memory twice (once just to log its
+size), opened the PDF from those bytes and grew the text with `+=`. The
+spooled path spools the upload to a file, lets PyMuPDF open it by path and
+joins the page texts once. The streamed path (StreamingIngest) chunks pages
+as they are extracted and encodes chunk rows a batch at a time, so only the
+raw text is ever held whole. Each variant runs in a fresh process while a psutil thread
+samples its RSS; the report is the peak growth over the process's baseline.
+Embedding (a remote API) and the MongoDB insert are not included; encoding
+the document to BSON is.
+
+Exits non-zero when the streamed path exceeds the ceiling, so it can gate
+deploys on small instances.
+
+Usage:
+    python bench_upload_memory.py [--pages 300] [--image-kb 50] [--ceiling-mb 64]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+# Peak RSS growth allowed for one upload on the streamed path
+INGEST_RSS_CEILING_MB = float(os.getenv("INGEST_RSS_CEILING_MB", "64"))
+
+LINE = "Quarterly revenue grew in every region while operating costs fell. "
+
+
+def make_pdf(path, pages, image_kb):
+    import fitz
+    doc = fitz.open()
+    side = int((image_kb * 1024 / 3) ** 0.5)
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 600), f"Page {page_num + 1}. " + LINE * 30, fontsize=9)
+        if side:
+            # Noise does not compress, so the file is as large as a scanned or image-heavy upload
+            noise = fitz.Pixmap(fitz.csRGB, side, side, os.urandom(side * side * 3), False)
+            page.insert_image(fitz.Rect(36, 620, 236, 806), pixmap=noise)
+    doc.save(path)
+
+
+class PeakRSS:
+    """Samples this process's RSS in a background thread."""
+
+    def __init__(self, interval=0.002):
+        self.process = psutil.Process()
+        self.interval = interval
+        self.baseline = self.peak = self.process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+    @property
+    def growth_mb(self):
+        return (self.peak - self.baseline) / (1024 * 1024)
+
+
+def legacy_upload(pdf_path):
+    import bson
+    import fitz
+    from utils.text_utils import chunk_text
+
+    with open(pdf_path, "rb") as f:
+        size = len(f.read())  # the size log
+        f.seek(0)
+        file_bytes = f.read()
+    text = ""
+    for page in fitz.open(stream=file_bytes, filetype="pdf"):
+        text += page.get_text()
+    chunks = chunk_text(text)
+    return size, len(bson.encode({"raw_text": text, "chunks": [{"text": c} for c in chunks]}))
+
+
+def spooled_upload(pdf_path):
+    import bson
+    from utils.extract_text import extract_text_with_pages
+    from utils.text_utils import chunk_text
+
+    spool_dir = tempfile.mkdtemp()
+    try:
+        # What FileStorage.save does with the upload stream
+        spooled = shutil.copy(pdf_path, os.path.join(spool_dir, "upload"))
+        size = os.path.getsize(spooled)
+        text, page_starts = extract_text_with_pages(spooled, ".pdf")
+        chunks = chunk_text(text)
+        return size, len(bson.encode({"raw_text": text, "chunks": [{"text": c} for c in chunks]}))
+    finally:
+        shutil.rmtree(spool_dir)
+
+
+def streamed_upload(pdf_path):
+    import bson
+    from utils.chunking import iter_chunks
+    from utils.extract_text import iter_text_pages
+    from utils.ingest import INGEST_EMBED_BATCH
+
+    spool_dir = tempfile.mkdtemp()
+    try:
+        spooled = shutil.copy(pdf_path, os.path.join(spool_dir, "upload"))
+        size = os.path.getsize(spooled)
+        pages = []
+
+        def read_pages():
+            for page_text in iter_text_pages(spooled, ".pdf"):
+                pages.append(page_text)
+                yield page_text
+
+        encoded, batch = 0, []
+        for chunk, start in iter_chunks(read_pages()):
+            batch.append({"text": chunk, "start": start})
+            if len(batch) == INGEST_EMBED_BATCH:
+                encoded += len(bson.encode({"rows": batch}))
+                batch = []
+        if batch:
+            encoded += len(bson.encode({"rows": batch}))
+        return size, encoded + len(bson.encode({"raw_text": "".join(pages)}))
+    finally:
+        shutil.rmtree(spool_dir)
+
+
+VARIANTS = {"bytes in memory": legacy_upload, "spooled to disk": spooled_upload, "streamed": streamed_upload}
+
+
+def run_variant(name, pdf_path):
+    # Import everything first so only the upload itself counts
+    import bson, fitz  # noqa: F401
+    from utils import chunking, extract_text, ingest, text_utils  # noqa: F401
+
+    with PeakRSS() as rss:
+        file_size, bson_size = VARIANTS[name](pdf_path)
+    print(json.dumps({"growth_mb": rss.growth_mb, "file_size": file_size, "bson_size": bson_size}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload peak-RSS benchmark")
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--image-kb', type=int, default=50, help="incompressible image per page (0 for text only)")
+    parser.add_argument('--ceiling-mb', type=float, default=INGEST_RSS_CEILING_MB)
+    parser.add_argument('--variant', help=argparse.SUPPRESS)
+    parser.add_argument('--pdf', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant, args.pdf)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        make_pdf(pdf_path, args.pages, args.image_kb)
+        print(f"{args.pages}-page PDF, {os.path.getsize(pdf_path) / (1024 * 1024):.1f} MB on disk")
+        print(f"{'path':<20}{'peak RSS growth (MB)':>22}")
+        print("-" * 42)
+
+        results = {}
+        for name in VARIANTS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--variant", name, "--pdf", pdf_path],
+                capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+            ).stdout
+            results[name] = json.loads(output.strip().splitlines()[-1])
+            print(f"{name:<20}{results[name]['growth_mb']:>22.1f}")
+
+    peak = results["streamed"]["growth_mb"]
+    print(f"ceiling: {args.ceiling_mb:.0f} MB -> {'OK' if peak <= args.ceiling_mb else 'EXCEEDED'}")
+    if peak > args.ceiling_mb:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import copy
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# utils modules read these at import time; tests never reach a real server
+os.environ.setdefault("DATABASE_NAME", "test_db")
+os.environ.setdefault("COLLECTION_NAME", "test_documents")
+# no on-disk caches unless a test opens one under tmp_path
+os.environ.setdefault("EMBED_CACHE_PATH", "")
+os.environ.setdefault("TRANSLATION_CACHE_PATH", "")
+os.environ.setdefault("SUMMARY_CACHE_PATH", "")
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$exists" in cond and (key in doc) != cond["$exists"]:
+                return False
+            if "$lt" in cond and not (value is not None and value < cond["$lt"]):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+_MISSING = object()
+
+
+def _evaluate(expr, doc, variables=None):
+    """The few aggregation expressions find_documents uses in projections."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        scope, path = (variables or {}, expr[2:]) if expr.startswith("$$") else (doc, expr[1:])
+        value = scope
+        for part in path.split("."):
+            value = value.get(part, _MISSING) if isinstance(value, dict) else _MISSING
+        return value
+    if isinstance(expr, dict):
+        if "$ifNull" in expr:
+            values = [_evaluate(e, doc, variables) for e in expr["$ifNull"]]
+            return next((v for v in values if v is not _MISSING and v is not None), values[-1])
+        if "$slice" in expr:
+            items, n = (_evaluate(e, doc, variables) for e in expr["$slice"])
+            return items[:n] if isinstance(items, list) else _MISSING
+        if "$substrCP" in expr:
+            text, start, length = (_evaluate(e, doc, variables) for e in expr["$substrCP"])
+            return text[start:start + length] if isinstance(text, str) else ""
+        if "$map" in expr:
+            spec = expr["$map"]
+            items = _evaluate(spec["input"], doc, variables)
+            return [_evaluate(spec["in"], doc, {**(variables or {}), spec["as"]: item}) for item in items]
+        evaluated = {key: _evaluate(value, doc, variables) for key, value in expr.items()}
+        return {key: value for key, value in evaluated.items() if value is not _MISSING}
+    return expr
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v == 1}
+    expressions = {k: v for k, v in projection.items() if isinstance(v, dict)}
+    if not include and not expressions:
+        return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1) != 0}
+
+    out = {}
+    for key, expr in expressions.items():
+        value = _evaluate(expr, doc)
+        if value is not _MISSING:
+            out[key] = copy.deepcopy(value)
+    for key in include:
+        top, _, sub = key.partition(".")
+        if top not in doc:
+            continue
+        if sub:
+            items = doc[top] if isinstance(doc[top], list) else []
+            existing = out.setdefault(top, [{} for _ in items])
+            for target, item in zip(existing, items):
+                if sub in item:
+                    target[sub] = copy.deepcopy(item[sub])
+        else:
+            out[top] = copy.deepcopy(doc[top])
+    if projection.get("_id", 1) and "_id" in doc:
+        out["_id"] = doc["_id"]
+    return out
+
+
+class FakeCursor:
+    """Sorts on the stored documents (like the server) and projects on iteration."""
+
+    def __init__(self, docs, projection=None):
+        self._docs = list(docs)
+        self._projection = projection
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self._docs.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    def __iter__(self):
+        return (_project(d, self._projection) for d in self._docs)
+
+
+class FakeCollection:
+    """Just enough of pymongo's Collection for unit tests; counts round trips."""
+
+    def __init__(self, docs=None):
+        self.docs = [dict(d) for d in docs or []]
+        self.calls = []
+        self._next_id = 1
+
+    def _record(self, name, *args):
+        self.calls.append(SimpleNamespace(name=name, args=args))
+
+    def with_options(self, **kwargs):
+        return self
+
+    def find(self, query=None, projection=None):
+        self._record("find", query, projection)
+        return FakeCursor((d for d in self.docs if _matches(d, query or {})), projection)
+
+    def find_one(self, query=None, projection=None):
+        self._record("find_one", query, projection)
+        for d in self.docs:
+            if _matches(d, query or {}):
+                return _project(d, projection)
+        return None
+
+    def insert_one(self, doc):
+        self._record("insert_one", doc)
+        doc.setdefault("_id", self._next_id)
+        self._next_id += 1
+        self.docs.append(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    def insert_many(self, docs, ordered=True):
+        self._record("insert_many", docs)
+        for doc in docs:
+            doc.setdefault("_id", self._next_id)
+            self._next_id += 1
+            self.docs.append(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_ids=[d["_id"] for d in docs])
+
+    def update_one(self, query, update, upsert=False):
+        self._record("update_one", query, update)
+        for d in self.docs:
+            if _matches(d, query):
+                for key, value in update.get("$set", {}).items():
+                    target = d
+                    *parents, leaf = key.split(".")
+                    for part in parents:
+                        target = target.setdefault(part, {})
+                    target[leaf] = value
+                return SimpleNamespace(matched_count=1, modified_count=1)
+        return SimpleNamespace(matched_count=0, modified_count=0)
+
+    def delete_one(self, query):
+        self._record("delete_one", query)
+        for i, d in enumerate(self.docs):
+            if _matches(d, query):
+                del self.docs[i]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    def delete_many(self, query):
+        self._record("delete_many", query)
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+    def create_index(self, keys, **kwargs):
+        self._record("create_index", keys)
+        return "_".join(f"{k}_{v}" for k, v in keys)
+
+    def round_trips(self):
+        return len([c for c in self.calls if c.name != "create_index"])
+
+
+@pytest.fixture
+def fake_store(monkeypatch):
+    """Register empty in-memory collections in the shared Mongo registry."""
+    from utils import document_store, mongo
+
+    store = SimpleNamespace(documents=FakeCollection(), chunks=FakeCollection())
+    monkeypatch.setitem(mongo._collections, "documents", store.documents)
+    monkeypatch.setitem(mongo._collections, "chunks", store.chunks)
+    monkeypatch.setattr(document_store, "_indexes_ready", False)
+    return store
@@ -0,0 +1,99 @@
+"""
+Evaluate the local intent classifier on the labelled set in intent_eval.jsonl.
+
+The set is held out from TRAINING_EXAMPLES and split in two. The "tune" rows
+choose INTENT_LLM_ESCALATION_THRESHOLD (--fit prints the lowest threshold
+whose kept decisions are at least FIT_KEPT_ACCURACY correct on them); the
+"test" rows, which the threshold never saw, are what gets reported.
+
+Reports accuracy of the local model on its own, accuracy of the decisions it
+keeps (confidence >= the threshold), how many queries would be escalated to
+Groq, and classification latency. With --llm the Groq router is run on every
+query too (needs GROQ_API_KEY) for a side-by-side comparison.
+
+Usage:
+    python eval_intent.py [--split test|tune|all] [--threshold 0.32] [--fit] [--llm] [--verbose]
+"""
+import argparse
+import json
+import os
+import time
+
+from utils.intent_classifier import classifier
+from utils.intent_router import INTENT_LLM_ESCALATION_THRESHOLD
+
+EVAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_eval.jsonl")
+
+
+# Kept decisions on the tune split must be at least this accurate
+FIT_KEPT_ACCURACY = 0.95
+
+
+def load_examples(path=EVAL_PATH, split=None):
+    """Labelled queries, optionally only those of one split ("tune" or "test")."""
+    with open(path, encoding="utf-8") as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    return [e for e in examples if split in (None, "all", e["split"])]
+
+
+def fit_threshold(examples, kept_accuracy=FIT_KEPT_ACCURACY):
+    """Lowest threshold (in steps of 0.01) whose kept decisions reach kept_accuracy."""
+    decisions = [(classifier.classify(e["query"]), e["intent"]) for e in examples]
+    for step in range(101):
+        threshold = step / 100
+        kept = [intent == label for (intent, confidence), label in decisions if confidence >= threshold]
+        if not kept or sum(kept) >= kept_accuracy * len(kept):
+            return threshold
+    return 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local intent classifier")
+    parser.add_argument('--split', choices=('test', 'tune', 'all'), default='test',
+                        help="rows to report on (default: test, which the threshold was not fitted on)")
+    parser.add_argument('--threshold', type=float, default=INTENT_LLM_ESCALATION_THRESHOLD)
+    parser.add_argument('--fit', action='store_true', help="fit the threshold on the tune split and use it")
+    parser.add_argument('--llm', action='store_true', help="also run the Groq router on every query")
+    parser.add_argument('--verbose', action='store_true', help="print every misclassified query")
+    args = parser.parse_args()
+
+    if args.fit:
+        args.threshold = fit_threshold(load_examples(split="tune"))
+        print(f"Fitted threshold:         {args.threshold:.2f} (tune split, kept accuracy >= {FIT_KEPT_ACCURACY:.0%})")
+    if args.split != 'test':
+        print(f"⚠️ The {args.split} split includes the rows the threshold was fitted on; its numbers are optimistic")
+
+    examples = load_examples(split=args.split)
+    correct = kept = kept_correct = 0
+    elapsed = 0.0
+    llm_correct = 0
+    for example in examples:
+        started = time.perf_counter()
+        intent, confidence = classifier.classify(example["query"])
+        elapsed += time.perf_counter() - started
+
+        hit = intent == example["intent"]
+        correct += hit
+        if confidence >= args.threshold:
+            kept += 1
+            kept_correct += hit
+        if args.verbose and not hit:
+            print(f"✗ expected {example['intent']}, got {intent} ({confidence:.2f}): {example['query']}")
+
+        if args.llm:
+            from utils.intent_router import detect_intent_llm
+            llm_correct += detect_intent_llm(example["query"]) == example["intent"]
+
+    total = len(examples)
+    print(f"Examples:                 {total} ({args.split} split)")
+    print(f"Local accuracy:           {correct / total:.1%}")
+    print(f"Kept locally (>= {args.threshold:.2f}):   {kept} ({kept / total:.0%}), "
+          f"accuracy {kept_correct / kept:.1%}" if kept else "Kept locally:             0")
+    print(f"Escalated to Groq:        {total - kept} ({(total - kept) / total:.0%})")
+    print(f"Latency:                  {elapsed * 1e6 / total:.1f} µs / query")
+    if args.llm:
+        print(f"Groq router accuracy:     {llm_correct / total:.1%}")
+
+
+if __name__ == '__main__':
+    main()
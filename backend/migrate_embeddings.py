@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Convert stored embeddings to packed binary blobs (see utils/embedding_codec.py),
+and report the BSON size before and after.
+
+Both storage layouts are migrated:
+
+- Parents with chunks embedded in them get one `embedding_matrix` in place of
+  the per-chunk `chunks[].embedding` lists.
+- Rows in the chunks collection (utils/document_store.py) keep their
+  `embedding` float array, which the Atlas vector index reads, and gain an
+  `embedding_packed` copy for retrieval. Rows written by an earlier binary
+  mode with a blob in `embedding` get their float array back.
+
+Usage:
+    python migrate_embeddings.py [--dtype float32|float16] [--dry-run] [--limit N]
+"""
+import argparse
+
+import bson
+
+from utils.embedding_codec import SUPPORTED_DTYPES, pack_embeddings, split_packed, unpack_embeddings
+from utils.mongo import get_collection
+
+
+def migrate_document(doc, dtype):
+    """Return the converted document, or None if it cannot be packed."""
+    chunks = doc.get('chunks', [])
+    embeddings = [chunk.get('embedding') for chunk in chunks]
+    if not chunks or any(not e for e in embeddings) or len({len(e) for e in embeddings}) != 1:
+        return None
+
+    converted = dict(doc)
+    converted['chunks'] = [{k: v for k, v in chunk.items() if k != 'embedding'} for chunk in chunks]
+    converted['embedding_matrix'] = pack_embeddings(embeddings, dtype)
+    return converted
+
+
+def migrate_chunk_row(row, dtype):
+    """Return the fields to $set on a chunk row without `embedding_packed`, or None if it has no embedding."""
+    embedding = row.get('embedding')
+    if isinstance(embedding, dict):
+        # A blob where vector search expects floats
+        return {'embedding': unpack_embeddings(embedding).tolist(), 'embedding_packed': embedding}
+    if not embedding:
+        return None
+    return {'embedding_packed': split_packed(pack_embeddings([embedding], dtype))[0]}
+
+
+def migrate_parents(collection, dtype, dry_run=False, limit=0):
+    """Pack parents that still embed their chunks. Returns (migrated, skipped, bytes before, bytes after)."""
+    query = {"embedding_matrix": {"$exists": False}, "chunks.embedding": {"$exists": True}}
+    cursor = collection.find(query)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    total_before = total_after = migrated = skipped = 0
+    for doc in cursor:
+        converted = migrate_document(doc, dtype)
+        if converted is None:
+            skipped += 1
+            print(f"⚠️ Skipping {doc.get('filename', doc['_id'])}: missing or inconsistent embeddings")
+            continue
+
+        before = len(bson.encode(doc))
+        after = len(bson.encode(converted))
+        total_before += before
+        total_after += after
+        migrated += 1
+        print(f"📦 {doc.get('filename', doc['_id'])}: {before / 1024:.1f} KB → {after / 1024:.1f} KB")
+
+        if not dry_run:
+            collection.replace_one({"_id": doc["_id"]}, converted)
+    return migrated, skipped, total_before, total_after
+
+
+def migrate_chunk_rows(collection, dtype, dry_run=False, limit=0):
+    """
+    Add `embedding_packed` to chunk rows that lack it, a document at a time.
+    Returns (documents, rows migrated, rows skipped, bytes before, bytes after).
+    """
+    cursor = collection.find({"embedding_packed": {"$exists": False}}, {"_id": 1, "document_id": 1, "embedding": 1})
+    cursor = cursor.sort([("document_id", 1), ("ordinal", 1)])
+
+    documents = set()
+    total_before = total_after = migrated = skipped = 0
+    for row in cursor:
+        if row['document_id'] not in documents:
+            if limit and len(documents) == limit:
+                break
+            documents.add(row['document_id'])
+
+        update = migrate_chunk_row(row, dtype)
+        if update is None:
+            skipped += 1
+            continue
+
+        total_before += len(bson.encode(row))
+        total_after += len(bson.encode({**row, **update}))
+        migrated += 1
+        if not dry_run:
+            collection.update_one({"_id": row["_id"]}, {"$set": update})
+
+    return len(documents), migrated, skipped, total_before, total_after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack chunk embeddings into binary blobs")
+    parser.add_argument('--dtype', choices=SUPPORTED_DTYPES, default='float32')
+    parser.add_argument('--dry-run', action='store_true', help="report sizes without writing")
+    parser.add_argument('--limit', type=int, default=0, help="stop after N documents (per layout)")
+    args = parser.parse_args()
+    verb = 'Would migrate' if args.dry_run else 'Migrated'
+
+    migrated, skipped, total_before, total_after = migrate_parents(
+        get_collection("documents"), args.dtype, args.dry_run, args.limit
+    )
+    print("-" * 50)
+    print(f"{verb} {migrated} document(s) with embedded chunks, skipped {skipped}")
+    if migrated:
+        print(f"Total size: {total_before / 1024 / 1024:.2f} MB → {total_after / 1024 / 1024:.2f} MB "
+              f"({100 * (1 - total_after / total_before):.0f}% smaller)")
+
+    documents, rows, skipped_rows, rows_before, rows_after = migrate_chunk_rows(
+        get_collection("chunks"), args.dtype, args.dry_run, args.limit
+    )
+    print(f"{verb} {rows} chunk row(s) in {documents} document(s), skipped {skipped_rows} without an embedding")
+    if rows:
+        # Rows keep their float array for vector search, so they grow; reads fetch only the packed copy
+        print(f"Chunk rows: {rows_before / 1024 / 1024:.2f} MB → {rows_after / 1024 / 1024:.2f} MB stored")
+
+
+if __name__ == '__main__':
+    main()
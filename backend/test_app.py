@@ -0,0 +1,179 @@
+import importlib.util
+import io
+import os
+import threading
+import time
+
+import fitz
+import pytest
+
+from utils import extract_text, ingest
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    # app.py logs to multilingual_app.log in the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    yield app
+    app.ingest_jobs.stop()
+
+
+@pytest.fixture
+def client(app_module, fake_store, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest, "detect_language", lambda text: "en")
+    monkeypatch.setattr(ingest, "generate_embeddings", lambda chunks: [[0.5] * 4 for _ in chunks])
+    monkeypatch.setattr(app_module, "schedule_summary", lambda document_id: None)
+    monkeypatch.setattr(app_module.ingest_jobs, "spool_dir", str(tmp_path))
+    return app_module.app.test_client()
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for page_num in range(pages):
+        doc.new_page().insert_textbox(fitz.Rect(36, 36, 576, 806),
+                                      f"Page {page_num + 1}. " + "Revenue grew in every region. " * 60, fontsize=9)
+    return doc.tobytes()
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/api/upload/jobs/{job_id}").get_json()
+        if status["status"] in ("completed", "failed"):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_queued_upload_stores_chunks_while_still_extracting(app_module, client, fake_store, monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_EMBED_BATCH", 1)
+    # A single file streams even when a process pool is available
+    monkeypatch.setattr(extract_text, "EXTRACT_PROCESSES", 2)
+    stored_before_last_page = threading.Event()
+
+    def gated_pages(source, file_ext):
+        pages = list(extract_text.iter_text_pages(source, file_ext))
+        for page_text in pages[:-1]:
+            yield page_text
+        # Hold back the last page until chunks from the earlier ones are stored
+        deadline = time.monotonic() + 5
+        while not fake_store.chunks.docs and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if fake_store.chunks.docs:
+            stored_before_last_page.set()
+        yield pages[-1]
+
+    monkeypatch.setattr(app_module, "iter_text_pages", gated_pages)
+
+    response = client.post("/api/upload?async=1", data={"file": (io.BytesIO(make_pdf(5)), "report.pdf")},
+                           content_type="multipart/form-data")
+    assert response.status_code == 202
+    status = wait_for_job(client, response.get_json()["job_id"])
+
+    assert status["status"] == "completed"
+    assert stored_before_last_page.is_set()
+    assert {row["page"] for row in fake_store.chunks.docs} == {1, 2, 3, 4, 5}
+
+
+def test_importing_app_resumes_tasks_left_in_a_persistent_queue(fake_store, monkeypatch, tmp_path):
+    from utils import ingest_jobs, summarizer
+
+    spooled = tmp_path / "left.upload"
+    spooled.write_text("Queued before the restart. " * 20)
+    queue_path = str(tmp_path / "queue.sqlite3")
+    ingest_jobs.SQLiteQueue(queue_path).put({"job_id": "job-1", "index": 0, "total": 1, "filename": "left.txt",
+                                             "content_type": "text/plain", "path": str(spooled)})
+    monkeypatch.setattr(ingest_jobs, "INGEST_QUEUE", "sqlite")
+    monkeypatch.setattr(ingest_jobs, "INGEST_QUEUE_PATH", queue_path)
+    monkeypatch.setattr(ingest, "detect_language", lambda text: "en")
+    monkeypatch.setattr(ingest, "generate_embeddings", lambda chunks: [[0.5] * 4 for _ in chunks])
+    monkeypatch.setattr(summarizer, "schedule_summary", lambda document_id: None)
+
+    # A separate module object, as waitress-serve would import it; nothing is uploaded
+    spec = importlib.util.spec_from_file_location("app_restarted", os.path.join(os.path.dirname(__file__), "app.py"))
+    restarted = importlib.util.module_from_spec(spec)
+    monkeypatch.chdir(tmp_path)
+    spec.loader.exec_module(restarted)
+    workers = list(restarted.ingest_jobs._threads)
+    try:
+        deadline = time.monotonic() + 10
+        while (restarted.ingest_jobs.status("job-1") or {}).get("status") != "completed" and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        assert restarted.ingest_jobs.status("job-1")["status"] == "completed"
+        assert [doc["filename"] for doc in fake_store.documents.docs] == ["left.txt"]
+        assert restarted.ingest_jobs.queue.pending() == 0
+        assert not spooled.exists()
+    finally:
+        restarted.ingest_jobs.stop()
+    assert workers and not any(thread.is_alive() for thread in workers)
+
+
+def test_extraction_workers_importing_app_leave_the_queue_alone(fake_store, monkeypatch, tmp_path):
+    from utils import ingest_jobs
+
+    queue_path = str(tmp_path / "queue.sqlite3")
+    server = ingest_jobs.SQLiteQueue(queue_path)
+    server.put({"job_id": "job-1", "index": 0, "total": 1, "filename": "busy.txt",
+                "content_type": "text/plain", "path": str(tmp_path / "busy.upload")})
+    # The server is still working on this task
+    assert server.get(timeout=0)["filename"] == "busy.txt"
+    monkeypatch.setattr(ingest_jobs, "INGEST_QUEUE", "sqlite")
+    monkeypatch.setattr(ingest_jobs, "INGEST_QUEUE_PATH", queue_path)
+
+    # What a forkserver/spawn extraction worker does with `python app.py`
+    spec = importlib.util.spec_from_file_location("__mp_main__", os.path.join(os.path.dirname(__file__), "app.py"))
+    worker = importlib.util.module_from_spec(spec)
+    monkeypatch.chdir(tmp_path)
+    spec.loader.exec_module(worker)
+
+    assert worker.ingest_jobs._threads == []
+    assert worker.ingest_jobs.queue.pending() == 0
+
+
+def test_streamed_query_logs_the_reads_made_while_streaming(app_module, client, fake_store, monkeypatch, caplog):
+    fake_store.documents.docs = [{"document_id": "doc-1", "filename": "a.pdf", "raw_text": "x"}]
+
+    def stream_query(user_query, document_ids, **kwargs):
+        yield "event: start\ndata: {}\n\n"
+        app_module.find_documents(document_ids, "metadata")
+        yield "event: end\ndata: {}\n\n"
+
+    monkeypatch.setattr(app_module, "detect_language", lambda text: "en")
+    monkeypatch.setattr(app_module, "stream_query", stream_query)
+
+    with caplog.at_level("INFO", logger=app_module.logger.name):
+        response = client.post("/api/query/stream", json={"query": "what?", "document_ids": ["doc-1"]})
+        assert response.get_data(as_text=True).count("event:") == 2
+        response.close()
+
+    assert any("MongoDB I/O for POST /api/query/stream: 1 queries, 1 docs" in r.getMessage() for r in caplog.records)
+
+
+def test_summary_of_a_missing_document_is_not_found(app_module, client, fake_store, monkeypatch):
+    from utils import summarizer
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", lambda prompt, **kwargs: "A summary.")
+    fake_store.documents.docs = [{"document_id": "doc-1", "filename": "a.pdf", "raw_text": "Revenue grew."}]
+
+    assert client.post("/api/documents/missing/summary").status_code == 404
+    response = client.post("/api/documents/doc-1/summary")
+    assert response.status_code == 200
+    assert response.get_json()["answer"] == "A summary."
+
+
+def test_admin_stats_are_disabled_without_a_token(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", None)
+    assert client.get("/api/admin/stats").status_code == 404
+    assert client.get("/api/admin/stats", headers={"Authorization": "Bearer "}).status_code == 404
+
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    assert client.get("/api/admin/stats").status_code == 401
+    assert client.get("/api/admin/stats", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/api/admin/stats", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert "ingest_jobs" in response.get_json()
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from utils.chunking import SEPARATORS, iter_chunks
+
+
+def random_text(rng, words):
+    parts = ["word", "lorem", "ipsum", " ", " ", "\n", "\n\n", ".", ". ", "  ", "x" * 120]
+    return "".join(rng.choice(parts) for _ in range(words))
+
+
+def random_pieces(rng, text):
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, 20)))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(1000, 200), (100, 20), (30, 0), (10, 10)])
+def test_chunks_match_recursive_character_splitter(chunk_size, chunk_overlap):
+    rng = random.Random(chunk_size)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=list(SEPARATORS)
+    )
+    for _ in range(40):
+        text = random_text(rng, rng.randint(0, 1500))
+        expected = splitter.split_text(text)
+
+        # However the text is cut into pages, the chunks are the same
+        for pieces in ([text], random_pieces(rng, text)):
+            chunks = list(iter_chunks(pieces, chunk_size, chunk_overlap))
+            assert [chunk for chunk, _ in chunks] == expected
+            for chunk, start in chunks:
+                assert text[start:start + len(chunk)] == chunk
+
+
+def test_long_text_without_paragraphs_is_chunked_as_it_arrives():
+    pages_read = []
+
+    def pages():
+        for page in range(50):
+            pages_read.append(page)
+            yield f"Line {page} of a report with no blank lines at all.\n" * 20
+
+    chunks = iter_chunks(pages())
+    first, _ = next(chunks)
+
+    assert first.startswith("Line 0")
+    assert len(pages_read) < 5
+    assert len(list(chunks)) > 40
+
+
+def test_overlap_larger_than_chunk_size_is_rejected():
+    with pytest.raises(ValueError):
+        list(iter_chunks(["text"], chunk_size=10, chunk_overlap=20))
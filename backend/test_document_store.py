@@ -0,0 +1,156 @@
+import numpy as np
+
+from utils import document_store, embedding_codec
+
+
+def make_document(doc_id="doc-1", n=3, dim=4):
+    embeddings = np.random.default_rng(2).normal(size=(n, dim)).tolist()
+    return {
+        "document_id": doc_id,
+        "filename": f"{doc_id}.pdf",
+        "raw_text": "full text",
+        **embedding_codec.chunk_records([f"chunk {i}" for i in range(n)], embeddings),
+    }, embeddings
+
+
+def test_insert_splits_chunks_into_their_own_collection(fake_store):
+    document, embeddings = make_document()
+    document_store.insert_document(document)
+
+    parent = fake_store.documents.docs[0]
+    assert "chunks" not in parent
+    assert parent["chunk_storage"] == "collection"
+    assert parent["chunk_count"] == 3
+
+    rows = sorted(fake_store.chunks.docs, key=lambda r: r["ordinal"])
+    assert [r["ordinal"] for r in rows] == [0, 1, 2]
+    assert rows[1]["text"] == "chunk 1"
+    assert rows[1]["embedding"] == embeddings[1]
+    assert set(rows[0]) >= {"document_id", "ordinal", "text", "embedding", "page"}
+
+    index_keys = [c.args[0] for c in fake_store.chunks.calls if c.name == "create_index"]
+    assert [("document_id", 1), ("ordinal", 1)] in index_keys
+
+
+def test_find_documents_reassembles_chunks_in_order(fake_store):
+    document, _ = make_document(n=5)
+    document_store.insert_document(document)
+    fake_store.chunks.docs.reverse()
+
+    doc = document_store.find_documents(["doc-1"], "chunks")[0]
+    assert doc["filename"] == "doc-1.pdf"
+    assert "raw_text" not in doc
+    assert [c["text"] for c in doc["chunks"]] == [f"chunk {i}" for i in range(5)]
+    assert all("embedding" not in c for c in doc["chunks"])
+
+
+def test_binary_rows_come_back_as_one_matrix(fake_store, monkeypatch):
+    monkeypatch.setattr(embedding_codec, "EMBEDDING_STORAGE", "binary")
+    document, embeddings = make_document(n=4)
+    document_store.insert_document(document)
+
+    doc = document_store.find_documents(["doc-1"], "vectors")[0]
+    matrix = embedding_codec.unpack_embeddings(doc["embedding_matrix"])
+    assert matrix.shape == (4, 4)
+    assert np.allclose(matrix, embeddings, atol=1e-6)
+
+
+def test_chunk_writer_batches_read_back_like_one_insert(fake_store, monkeypatch):
+    monkeypatch.setattr(embedding_codec, "EMBEDDING_STORAGE", "binary")
+    document, embeddings = make_document(n=5)
+    texts = [c["text"] for c in document["chunks"]]
+
+    writer = document_store.ChunkWriter("doc-1")
+    writer.add(embedding_codec.chunk_records(texts[:3], embeddings[:3]))
+    writer.add(embedding_codec.chunk_records(texts[3:], embeddings[3:]))
+    writer.finish({"document_id": "doc-1", "filename": "doc-1.pdf", "raw_text": "full text"})
+
+    assert fake_store.documents.docs[0]["chunk_count"] == 5
+    doc = document_store.find_documents(["doc-1"], "vectors")[0]
+    assert [c["text"] for c in doc["chunks"]] == texts
+    assert np.allclose(embedding_codec.unpack_embeddings(doc["embedding_matrix"]), embeddings, atol=1e-6)
+
+
+def test_chunk_writer_holds_batches_for_the_embedded_layout(fake_store, monkeypatch):
+    monkeypatch.setattr(document_store, "CHUNK_STORAGE", "embedded")
+    document, embeddings = make_document(n=4)
+
+    writer = document_store.ChunkWriter("doc-1")
+    for chunk, embedding in zip(document["chunks"], embeddings):
+        writer.add(embedding_codec.chunk_records([chunk["text"]], [embedding]))
+    assert fake_store.chunks.docs == []
+    writer.finish({"document_id": "doc-1", "filename": "doc-1.pdf"})
+
+    assert fake_store.documents.docs[0]["chunks"] == document["chunks"]
+
+
+def test_chunk_writer_abort_removes_written_rows(fake_store):
+    document, embeddings = make_document(n=2)
+    writer = document_store.ChunkWriter("doc-1")
+    writer.add(embedding_codec.chunk_records([c["text"] for c in document["chunks"]], embeddings))
+    writer.abort()
+    assert fake_store.chunks.docs == [] and fake_store.documents.docs == []
+
+
+def test_legacy_embedded_documents_are_still_read(fake_store):
+    fake_store.documents.docs = [{"document_id": "old", "filename": "old.pdf", "raw_text": "x",
+                                  "chunks": [{"text": "a", "embedding": [1.0]}]}]
+    doc = document_store.find_documents(["old"], "chunks")[0]
+    assert doc["chunks"] == [{"text": "a"}]
+    assert fake_store.chunks.calls == []
+
+
+def test_leading_chunks_of_embedded_documents_leave_embeddings_behind(fake_store):
+    embeddings = np.random.default_rng(3).normal(size=(5, 384)).tolist()
+    fake_store.documents.docs = [{"document_id": "old", "filename": "old.pdf", "raw_text": "x",
+                                  "chunks": [{"text": f"chunk {i}", "embedding": e} for i, e in enumerate(embeddings)]}]
+
+    document_store.start_request_io()
+    doc = document_store.find_documents(["old"], "text-head", max_chunks=2)[0]
+
+    assert doc["chunks"] == [{"text": "chunk 0"}, {"text": "chunk 1"}]
+    assert document_store.request_io()["bytes"] < 384 * 8
+
+
+def test_delete_removes_chunk_rows(fake_store):
+    document, _ = make_document()
+    document_store.insert_document(document)
+    assert document_store.delete_document("doc-1")
+    assert fake_store.documents.docs == [] and fake_store.chunks.docs == []
+    assert not document_store.delete_document("doc-1")
+
+
+def test_named_projections_only_return_what_they_need(fake_store):
+    document, _ = make_document()
+    document["raw_text"] = "x" * 5000
+    document["original_language"] = "es"
+    document_store.insert_document(document)
+    chunk_reads = fake_store.chunks.round_trips()
+
+    language = document_store.find_documents(["doc-1"], "language")[0]
+    assert set(language) == {"document_id", "chunk_storage", "filename", "original_language"}
+
+    head = document_store.find_documents(["doc-1"], "text-head", head_chars=100)[0]
+    assert head["raw_text"] == "x" * 100
+    assert "chunks" not in head
+    assert fake_store.chunks.round_trips() == chunk_reads
+
+    with_chunks = document_store.find_documents(["doc-1"], "text-head", max_chunks=2)[0]
+    assert [c["text"] for c in with_chunks["chunks"]] == ["chunk 0", "chunk 1"]
+
+
+def test_request_io_counts_bytes(fake_store):
+    document, _ = make_document(n=10, dim=384)
+    document_store.insert_document(document)
+
+    document_store.start_request_io()
+    document_store.find_documents(["doc-1"], "metadata")
+    metadata_bytes = document_store.request_io()["bytes"]
+
+    document_store.start_request_io()
+    document_store.find_documents(["doc-1"], "vectors")
+    io = document_store.request_io()
+
+    assert io["queries"] == 2
+    assert io["documents"] == 11
+    assert io["bytes"] > 10 * 384 * 8 > metadata_bytes
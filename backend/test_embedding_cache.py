@@ -0,0 +1,99 @@
+import numpy as np
+
+from utils import embedding_cache, rag_pipeline
+from utils.embedding_cache import DocumentEntry, DocumentMatrixCache
+
+
+def make_entry(doc_id, rows=4, dim=8):
+    return DocumentEntry(doc_id, f"{doc_id}.pdf", [f"text {i}" for i in range(rows)],
+                         np.ones((rows, dim), dtype=np.float32))
+
+
+def test_lru_eviction_respects_memory_budget():
+    entry_size = make_entry("a").nbytes
+    cache = DocumentMatrixCache(max_mb=(entry_size * 2.5) / (1024 * 1024))
+    cache.put(make_entry("a"))
+    cache.put(make_entry("b"))
+    cache.get("a")  # "b" is now least recently used
+    cache.put(make_entry("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_invalidate_drops_entry():
+    cache = DocumentMatrixCache(max_mb=1)
+    cache.put(make_entry("a"))
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_reads_that_race_an_invalidation_are_not_cached():
+    cache = DocumentMatrixCache(max_mb=1)
+    before = cache.generation()
+    cache.invalidate("a")
+
+    cache.put(make_entry("a"), before)
+    cache.put(make_entry("b"), before)
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+
+    cache.put(make_entry("a"), cache.generation())
+    assert cache.get("a") is not None
+
+
+def test_forgotten_invalidations_still_block_older_reads(monkeypatch):
+    monkeypatch.setattr(embedding_cache, "MAX_TRACKED_INVALIDATIONS", 2)
+    cache = DocumentMatrixCache(max_mb=1)
+    before = cache.generation()
+    for doc_id in ("a", "b", "c"):
+        cache.invalidate(doc_id)
+
+    cache.put(make_entry("a"), before)
+    assert cache.get("a") is None
+    cache.put(make_entry("a"), cache.generation())
+    assert cache.get("a") is not None
+
+
+def test_delete_during_a_read_keeps_the_old_matrix_out(monkeypatch, fake_store):
+    fake_store.documents.docs = [{"document_id": "doc-1", "filename": "a.pdf",
+                                  "chunks": [{"text": "alpha", "embedding": [1.0, 0.0]}]}]
+    cache = DocumentMatrixCache(max_mb=1)
+    monkeypatch.setattr(rag_pipeline, "matrix_cache", cache)
+    find_documents = rag_pipeline.find_documents
+
+    def read_then_delete(document_ids, projection):
+        docs = find_documents(document_ids, projection)
+        # DELETE /api/documents/doc-1 finishes in another thread while this read is in flight
+        fake_store.documents.docs = []
+        cache.invalidate("doc-1")
+        return docs
+
+    monkeypatch.setattr(rag_pipeline, "find_documents", read_then_delete)
+
+    assert [e.document_id for e in rag_pipeline.load_document_entries(["doc-1"])] == ["doc-1"]
+    assert cache.get("doc-1") is None
+
+
+def test_oversized_entry_is_not_cached():
+    cache = DocumentMatrixCache(max_mb=0.0001)
+    cache.put(make_entry("big", rows=100))
+    assert cache.get("big") is None
+
+
+def test_follow_up_queries_do_not_touch_mongo(monkeypatch, fake_store):
+    fake_store.documents.docs = [{"document_id": "doc-1", "filename": "a.pdf",
+                                  "chunks": [{"text": "alpha", "embedding": [1.0, 0.0]},
+                                             {"text": "beta", "embedding": [0.0, 1.0]}]}]
+    monkeypatch.setattr(rag_pipeline, "matrix_cache", DocumentMatrixCache(max_mb=1))
+    monkeypatch.setattr(rag_pipeline, "embed_texts", lambda q: [0.0, 1.0])
+
+    first = rag_pipeline.get_similar_chunks("what is beta", ["doc-1"])
+    second = rag_pipeline.get_similar_chunks("tell me about beta", ["doc-1"])
+
+    assert first[0]["chunk"] == second[0]["chunk"] == "beta"
+    assert fake_store.documents.round_trips() == 1
@@ -0,0 +1,97 @@
+import bson
+import numpy as np
+
+from utils import document_store, embedding_codec, rag_pipeline
+from utils.embedding_cache import DocumentMatrixCache
+from migrate_embeddings import migrate_chunk_rows, migrate_document
+
+
+def sample_embeddings(n=3, dim=384):
+    return np.random.default_rng(1).normal(size=(n, dim)).tolist()
+
+
+def test_round_trip_is_zero_copy():
+    embeddings = sample_embeddings()
+    blob = embedding_codec.pack_embeddings(embeddings, "float32")
+    # Simulate the BSON round trip through MongoDB
+    decoded_blob = bson.decode(bson.encode({"m": blob}))["m"]
+
+    matrix = embedding_codec.unpack_embeddings(decoded_blob)
+    assert matrix.shape == (3, 384)
+    assert matrix.dtype == np.float32
+    assert not matrix.flags.owndata
+    assert np.allclose(matrix, embeddings, atol=1e-6)
+
+
+def test_float16_storage():
+    embeddings = sample_embeddings()
+    blob = embedding_codec.pack_embeddings(embeddings, "float16")
+    assert blob["shape"] == [3, 384]
+    assert len(blob["data"]) == 3 * 384 * 2
+    assert np.allclose(embedding_codec.unpack_embeddings(blob), embeddings, atol=1e-2)
+
+
+def test_chunk_records_modes(monkeypatch):
+    embeddings = sample_embeddings(n=2)
+    monkeypatch.setattr(embedding_codec, "EMBEDDING_STORAGE", "list")
+    listed = embedding_codec.chunk_records(["a", "b"], embeddings)
+    assert listed["chunks"][0]["embedding"] == embeddings[0]
+    assert "embedding_matrix" not in listed
+
+    monkeypatch.setattr(embedding_codec, "EMBEDDING_STORAGE", "binary")
+    packed = embedding_codec.chunk_records(["a", "b"], embeddings)
+    assert packed["chunks"] == [{"text": "a"}, {"text": "b"}]
+    assert packed["embedding_matrix"]["shape"] == [2, 384]
+
+
+def test_migration_shrinks_document_and_retrieval_reads_it(monkeypatch, fake_store):
+    embeddings = sample_embeddings(n=20)
+    doc = {"document_id": "doc-1", "filename": "a.pdf",
+           "chunks": [{"text": f"chunk {i}", "embedding": e} for i, e in enumerate(embeddings)]}
+
+    converted = migrate_document(doc, "float32")
+    assert len(bson.encode(converted)) < len(bson.encode(doc)) / 2
+    assert all("embedding" not in c for c in converted["chunks"])
+
+    fake_store.documents.docs = [bson.decode(bson.encode(converted))]
+    monkeypatch.setattr(rag_pipeline, "matrix_cache", DocumentMatrixCache(max_mb=1))
+    monkeypatch.setattr(rag_pipeline, "embed_texts", lambda q: embeddings[7])
+
+    results = rag_pipeline.get_similar_chunks("which chunk", ["doc-1"], top_k=1)
+    assert results[0]["chunk"] == "chunk 7"
+    assert abs(results[0]["similarity"] - 1.0) < 1e-5
+
+
+def test_binary_chunk_rows_keep_float_embeddings_for_vector_search(monkeypatch, fake_store):
+    embeddings = sample_embeddings(n=2)
+    monkeypatch.setattr(embedding_codec, "EMBEDDING_STORAGE", "binary")
+    document_store.insert_document({"document_id": "doc-1", "filename": "a.pdf",
+                                    **embedding_codec.chunk_records(["a", "b"], embeddings)})
+
+    rows = fake_store.chunks.docs
+    assert all(isinstance(row["embedding"], list) and "embedding_packed" in row for row in rows)
+    assert np.allclose(rows[1]["embedding"], embeddings[1], atol=1e-6)
+
+    doc = document_store.find_documents(["doc-1"], projection="vectors")[0]
+    assert np.allclose(embedding_codec.unpack_embeddings(doc["embedding_matrix"]), embeddings, atol=1e-6)
+
+
+def test_migration_packs_split_rows_and_restores_float_arrays(fake_store):
+    embeddings = sample_embeddings(n=3)
+    old_blob = embedding_codec.split_packed(embedding_codec.pack_embeddings(embeddings[2:], "float32"))[0]
+    fake_store.chunks.docs = [
+        {"_id": 1, "document_id": "doc-1", "ordinal": 0, "text": "a", "embedding": embeddings[0]},
+        {"_id": 2, "document_id": "doc-1", "ordinal": 1, "text": "b", "embedding": embeddings[1]},
+        # Written by the earlier binary mode, which put the blob where vector search reads
+        {"_id": 3, "document_id": "doc-2", "ordinal": 0, "text": "c", "embedding": old_blob},
+        {"_id": 4, "document_id": "doc-3", "ordinal": 0, "text": "d", "embedding": None},
+    ]
+
+    assert migrate_chunk_rows(fake_store.chunks, "float32", dry_run=True)[:3] == (3, 3, 1)
+    assert all("embedding_packed" not in row for row in fake_store.chunks.docs)
+
+    migrate_chunk_rows(fake_store.chunks, "float32")
+    rows = fake_store.chunks.docs
+    assert all(isinstance(row["embedding_packed"], dict) for row in rows[:3])
+    assert np.allclose([row["embedding"] for row in rows[:3]], embeddings, atol=1e-6)
+    assert migrate_chunk_rows(fake_store.chunks, "float32")[:2] == (1, 0)
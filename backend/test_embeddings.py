@@ -0,0 +1,133 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from utils import embeddings
+from utils.persistent_cache import PersistentLRUCache
+from utils.rate_limit import RateLimiter
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self._payload
+
+
+class FakeHF:
+    """Embeds each text as [len(text)]; fails chosen batches once."""
+
+    def __init__(self, fail_once=(), delay=0.02):
+        self.fail_once = set(fail_once)
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        first = json["inputs"][0]
+        with self._lock:
+            self.calls.append(first)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+            if first in self.fail_once:
+                self.fail_once.discard(first)
+                return FakeResponse(500)
+        return FakeResponse(200, [[float(len(t))] for t in json["inputs"]])
+
+
+def use_fake(monkeypatch, fake, concurrency=4):
+    monkeypatch.setattr(embeddings, "get_session", lambda: fake)
+    monkeypatch.setattr(embeddings, "time", SimpleNamespace(sleep=lambda s: None))
+    monkeypatch.setattr(embeddings, "EMBED_CONCURRENCY", concurrency)
+    monkeypatch.setattr(embeddings, "_executor", None)
+    monkeypatch.setattr(embeddings, "rate_limiter", RateLimiter("test"))
+
+
+def test_concurrent_batches_keep_order(monkeypatch):
+    fake = FakeHF()
+    use_fake(monkeypatch, fake)
+    texts = ["x" * (i + 1) for i in range(200)]
+
+    vectors = embeddings.embed_texts(texts)
+
+    assert vectors == [[float(i + 1)] for i in range(200)]
+    assert len(fake.calls) == 7
+    assert fake.max_in_flight > 1
+
+
+def test_only_the_failed_batch_is_retried(monkeypatch):
+    texts = [f"text {i}" for i in range(100)]
+    fake = FakeHF(fail_once={"text 32"})
+    use_fake(monkeypatch, fake)
+
+    vectors = embeddings.embed_texts(texts)
+
+    assert len(vectors) == 100
+    assert fake.calls.count("text 32") == 2
+    assert all(fake.calls.count(f"text {i}") == 1 for i in (0, 64, 96))
+
+
+def test_single_string_still_returns_one_vector(monkeypatch):
+    use_fake(monkeypatch, FakeHF(), concurrency=1)
+    assert embeddings.embed_texts("abc") == [3.0]
+
+
+def test_rate_limiter_spaces_calls_and_shares_backoff():
+    limiter = RateLimiter("test", rate_per_minute=600)  # one call per 0.1s
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - started >= 0.19
+
+    limiter.backoff(0.2)
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.15
+    assert limiter.stats()["backoffs"] == 1
+
+
+def test_cache_sends_only_misses_to_provider(monkeypatch, tmp_path):
+    fake = FakeHF()
+    use_fake(monkeypatch, fake, concurrency=1)
+    cache = PersistentLRUCache("test", str(tmp_path / "vectors.sqlite3"), memory_items=2)
+    monkeypatch.setattr(embeddings, "vector_cache", cache)
+
+    assert embeddings.embed_texts(["aa", "bbb", "aa"]) == [[2.0], [3.0], [2.0]]
+    assert fake.calls == ["aa"]
+
+    fake.calls.clear()
+    assert embeddings.embed_texts(["  bbb ", "cccc", "aa"]) == [[3.0], [4.0], [2.0]]
+    assert fake.calls == ["cccc"]
+    assert cache.stats()["hits"] == 2
+
+    # A fresh process sees the vectors through the SQLite tier
+    reopened = PersistentLRUCache("test", str(tmp_path / "vectors.sqlite3"))
+    monkeypatch.setattr(embeddings, "vector_cache", reopened)
+    fake.calls.clear()
+    assert embeddings.embed_texts("aa") == [2.0]
+    assert fake.calls == []
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_persistent_cache_trims_to_size_cap(tmp_path):
+    cache = PersistentLRUCache("test", str(tmp_path / "c.sqlite3"), memory_items=4, max_disk_mb=0.01)
+    for i in range(20):
+        cache.put(f"k{i}", b"x" * 1024)
+
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= stats["max_disk_bytes"]
+    assert stats["evictions"] > 0
+    assert cache.get("k19") is not None
+    assert cache.get("k0") is None
@@ -0,0 +1,101 @@
+import io
+
+import fitz
+import pytest
+from docx import Document
+
+from utils import extract_text
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    return doc.tobytes()
+
+
+def make_docx(paragraphs):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+@pytest.fixture(params=[0, 2], ids=["inline", "process-pool"])
+def processes(request, monkeypatch):
+    monkeypatch.setattr(extract_text, "EXTRACT_PROCESSES", request.param)
+    return request.param
+
+
+def test_submitted_extraction_matches_direct_extraction(processes):
+    files = [
+        (make_pdf(["First page", "Second page"]), ".pdf"),
+        (make_docx(["Alpha", "Beta"]), ".docx"),
+        ("plain text".encode(), ".txt"),
+    ]
+    futures = [extract_text.submit_extraction(file_bytes, ext) for file_bytes, ext in files]
+
+    assert [f.result(timeout=30) for f in futures] == [
+        extract_text.extract_text_with_pages(file_bytes, ext) for file_bytes, ext in files
+    ]
+    text, page_starts = futures[0].result()
+    assert "Second page" in text
+    assert futures[1].result()[1] is None
+
+
+def test_large_pdfs_are_split_by_page_range(processes, monkeypatch):
+    monkeypatch.setattr(extract_text, "PDF_PARALLEL_MIN_PAGES", 4)
+    pdf = make_pdf([f"Page number {i}" for i in range(1, 10)])
+
+    text, page_starts = extract_text.submit_extraction(pdf, ".pdf").result(timeout=30)
+
+    assert len(page_starts) == 9
+    assert text == "".join(extract_text.extract_pdf_pages(pdf, 0, 9))
+    for page in range(1, 10):
+        offset = text.index(f"Page number {page}")
+        assert extract_text.page_for_offset(page_starts, offset) == page
+
+
+def test_extraction_errors_surface_from_the_future(processes):
+    future = extract_text.submit_extraction(b"data", ".xls")
+    with pytest.raises(Exception, match="Unsupported file type: .xls"):
+        future.result(timeout=30)
+
+
+def test_extraction_from_a_spooled_path_matches_bytes(tmp_path, processes):
+    for name, file_bytes in [("a.pdf", make_pdf(["One", "Two"])), ("b.docx", make_docx(["Alpha"])),
+                             ("c.txt", "héllo".encode())]:
+        path = tmp_path / name
+        path.write_bytes(file_bytes)
+        ext = path.suffix
+        assert extract_text.submit_extraction(str(path), ext).result(timeout=30) == \
+            extract_text.extract_text_with_pages(file_bytes, ext)
+
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError, match="empty"):
+        extract_text.extract_text_with_pages(str(empty), ".txt")
+
+
+def test_text_pages_join_to_the_extracted_text(tmp_path, processes, monkeypatch):
+    monkeypatch.setattr(extract_text, "PDF_PARALLEL_MIN_PAGES", 4)
+    for name, file_bytes in [("small.pdf", make_pdf(["One", "Two"])),
+                             ("large.pdf", make_pdf([f"Page number {i}" for i in range(1, 10)])),
+                             ("b.docx", make_docx(["Alpha", "Beta"]))]:
+        path = tmp_path / name
+        path.write_bytes(file_bytes)
+        pages = list(extract_text.iter_text_pages(str(path), path.suffix))
+        text, page_starts = extract_text.extract_text_with_pages(str(path), path.suffix)
+        assert "".join(pages) == text
+        assert extract_text.split_pages(text, page_starts) == pages
+
+    blank = tmp_path / "blank.pdf"
+    blank.write_bytes(make_pdf(["", ""]))
+    with pytest.raises(Exception) as streamed:
+        list(extract_text.iter_text_pages(str(blank), ".pdf"))
+    with pytest.raises(Exception) as whole:
+        extract_text.extract_text_with_pages(str(blank), ".pdf")
+    assert str(streamed.value) == str(whole.value)
+    assert "no extractable text" in str(whole.value)
@@ -0,0 +1,54 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import http_session
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fresh_session(monkeypatch):
+    monkeypatch.setattr(http_session, "_session", None)
+    monkeypatch.setattr(http_session, "_adapter", None)
+
+
+def test_session_is_shared(fresh_session):
+    assert http_session.get_session() is http_session.get_session()
+    assert "gzip" in http_session.get_session().headers["Accept-Encoding"]
+
+
+def test_connections_are_reused(fresh_session, local_server):
+    session = http_session.get_session()
+    for _ in range(5):
+        assert session.post(local_server, json={"inputs": ["x"]}, timeout=5).json() == {"ok": True}
+
+    stats = next(iter(http_session.connection_stats().values()))
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused"] == 4
@@ -0,0 +1,169 @@
+import threading
+import time
+
+import pytest
+
+from utils import ingest, translator
+
+
+class Counter:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.result
+
+
+def patch_stages(monkeypatch, language, translation):
+    detect = Counter(language)
+    groq = Counter(translation)
+    monkeypatch.setattr(ingest, "detect_language", detect)
+    monkeypatch.setattr(translator, "detect_language", detect)
+    monkeypatch.setattr(translator, "translate_with_groq", groq)
+    monkeypatch.setattr(ingest, "generate_embeddings", lambda chunks: [[0.5] * 4 for _ in chunks])
+    return detect, groq
+
+
+def test_non_english_upload_detects_and_translates_once(monkeypatch):
+    detect, groq = patch_stages(monkeypatch, "es", "Hello world. This is English now.")
+
+    pipeline = ingest.IngestPipeline("doc.txt", "text/plain", "Hola mundo. Esto es español.")
+    document = pipeline.run()
+
+    assert detect.calls == 1
+    assert groq.calls == 1
+    assert pipeline.completed == list(ingest.STAGES)
+    assert document["raw_text"] == "Hello world. This is English now."
+    assert document["original_text"] == "Hola mundo. Esto es español."
+    assert document["original_language"] == "es"
+    assert document["translation_info"]["translated_to"] == "en"
+
+
+def test_english_upload_never_calls_translator(monkeypatch):
+    detect, groq = patch_stages(monkeypatch, "en", "unused")
+
+    document = ingest.IngestPipeline("doc.txt", "text/plain", "Plain English text.").run()
+
+    assert detect.calls == 1
+    assert groq.calls == 0
+    assert document["was_translated"] is False
+    assert document["original_text"] is None
+
+
+def test_stages_are_not_rerun(monkeypatch):
+    detect, groq = patch_stages(monkeypatch, "fr", "Translated.")
+    pipeline = ingest.IngestPipeline("doc.txt", "text/plain", "Bonjour.")
+
+    first = pipeline.run()
+    pipeline.translate()
+    assert pipeline.run() is first
+    assert (detect.calls, groq.calls) == (1, 1)
+
+
+def test_chunks_carry_the_page_they_start_on(monkeypatch):
+    patch_stages(monkeypatch, "en", "unused")
+    words = ["alpha", "beta", "gamma"]
+    pages = [f"{word} " * 300 for word in words]
+    page_starts = [0, len(pages[0]), len(pages[0]) + len(pages[1])]
+
+    document = ingest.IngestPipeline("doc.pdf", "application/pdf", "".join(pages), page_starts).run()
+
+    chunks = document["chunks"]
+    assert len(chunks) > 3
+    for chunk in chunks:
+        assert chunk["text"].split()[0] == words[chunk["page"] - 1]
+    assert {chunk["page"] for chunk in chunks} == {1, 2, 3}
+
+
+def test_streaming_ingest_stores_chunks_in_batches_then_the_parent(monkeypatch, fake_store):
+    patch_stages(monkeypatch, "en", "unused")
+    batches = []
+    monkeypatch.setattr(ingest, "generate_embeddings", lambda chunks: batches.append(len(chunks)) or
+                        [[0.5] * 4 for _ in chunks])
+    monkeypatch.setattr(ingest, "INGEST_EMBED_BATCH", 4)
+    words = ["alpha", "beta", "gamma"]
+    pages = [f"{word} " * 600 for word in words]
+    stages = []
+
+    streaming = ingest.StreamingIngest("doc.pdf", "application/pdf", iter(pages), stages.append, paged=True)
+    document = streaming.run()
+
+    assert stages == ["extracted", "translated", "embedded"]
+    assert max(batches) == 4 and sum(batches) == streaming.chunk_count
+    rows = sorted(fake_store.chunks.docs, key=lambda r: r["ordinal"])
+    assert [r["ordinal"] for r in rows] == list(range(streaming.chunk_count))
+    assert [r["text"] for r in rows] == ingest.chunk_text("".join(pages))
+    for row in rows:
+        assert row["text"].split()[0] == words[row["page"] - 1]
+
+    # Chunk rows go in batch by batch, the parent in one insert
+    assert len([c for c in fake_store.chunks.calls if c.name == "insert_many"]) == len(batches)
+    assert fake_store.documents.round_trips() == 1
+    parent = fake_store.documents.docs[0]
+    assert parent["document_id"] == document["document_id"]
+    assert parent["chunk_count"] == len(rows)
+    assert parent["raw_text"] == "".join(pages)
+    assert parent["original_language"] == "en"
+
+
+def test_streaming_ingest_translates_whole_documents(monkeypatch, fake_store):
+    detect, groq = patch_stages(monkeypatch, "es", "Hello world. This is English now.")
+
+    streaming = ingest.StreamingIngest("doc.txt", "text/plain", ["Hola mundo. ", "Esto es español."])
+    document = streaming.run()
+
+    assert (detect.calls, groq.calls) == (1, 1)
+    assert streaming.was_translated and streaming.language == "es"
+    assert document["original_text"] == "Hola mundo. Esto es español."
+    assert fake_store.documents.docs[0]["raw_text"] == "Hello world. This is English now."
+    assert fake_store.chunks.docs[0]["text"] == "Hello world. This is English now."
+
+
+def test_streaming_ingest_removes_stored_chunks_when_extraction_fails(monkeypatch, fake_store):
+    patch_stages(monkeypatch, "en", "unused")
+    monkeypatch.setattr(ingest, "INGEST_EMBED_BATCH", 1)
+
+    def pages():
+        for page in range(20):
+            yield f"Page {page}. " + "text " * 400
+        raise ValueError("PDF processing error: page 21 is damaged")
+
+    with pytest.raises(ingest.ExtractionError, match="page 21 is damaged"):
+        ingest.StreamingIngest("doc.pdf", "application/pdf", pages(), paged=True).run()
+
+    assert fake_store.chunks.docs == []
+    assert fake_store.documents.docs == []
+
+
+def test_streaming_ingest_buffers_are_bounded(monkeypatch, fake_store):
+    patch_stages(monkeypatch, "en", "unused")
+    release = threading.Event()
+    monkeypatch.setattr(ingest, "generate_embeddings", lambda chunks: release.wait(5) and [[0.5] * 4 for _ in chunks])
+    monkeypatch.setattr(ingest, "INGEST_EMBED_BATCH", 1)
+    monkeypatch.setattr(ingest, "INGEST_BUFFER", 2)
+    pages_read = []
+
+    def pages():
+        for page in range(200):
+            pages_read.append(page)
+            yield "text " * 400
+
+    run = threading.Thread(target=ingest.StreamingIngest("doc.txt", "text/plain", pages()).run)
+    run.start()
+    time.sleep(0.3)
+    # Embedding is stuck, so extraction may only be a few buffers ahead
+    assert len(pages_read) < 20
+
+    release.set()
+    run.join(10)
+    assert len(pages_read) == 200
+    assert fake_store.documents.docs[0]["chunk_count"] == len(fake_store.chunks.docs)
+
+
+def test_streaming_ingest_of_blank_text_stores_nothing(monkeypatch, fake_store):
+    patch_stages(monkeypatch, "en", "unused")
+
+    assert ingest.StreamingIngest("doc.txt", "text/plain", ["  ", "\n"]).run() is None
+    assert fake_store.documents.docs == [] and fake_store.chunks.docs == []
@@ -0,0 +1,128 @@
+import multiprocessing
+import threading
+import time
+
+from utils.ingest_jobs import FILE_STAGES, IngestJobManager, InProcessQueue, SQLiteQueue
+
+
+def spooled(tmp_path, *names):
+    files = []
+    for name in names:
+        path = tmp_path / f"{name}.upload"
+        path.write_bytes(name.encode())
+        files.append((name, "text/plain", str(path)))
+    return files
+
+
+def process_file(filename, content_type, path, report, job_size):
+    if filename.startswith("bad"):
+        return {"filename": filename, "error": "Could not extract text"}
+    for stage in FILE_STAGES[1:]:
+        report(stage)
+    with open(path) as f:
+        return {"filename": filename, "documentId": f.read()}
+
+
+def finish_job(results):
+    stored = [r for r in results if "error" not in r]
+    return (200 if stored else 400), {"documentIds": [r["documentId"] for r in stored], "count": len(results)}
+
+
+def wait_for(manager, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status["status"] in ("completed", "failed"):
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_reports_each_file_and_builds_the_result(tmp_path):
+    manager = IngestJobManager(process_file, finish_job, InProcessQueue(), workers=2, spool_dir=str(tmp_path))
+    job_id = manager.submit(spooled(tmp_path, "a.txt", "bad.txt", "c.txt"))
+
+    status = wait_for(manager, job_id)
+
+    assert status["status"] == "completed"
+    assert [f["stage"] for f in status["files"]] == ["stored", "failed", "stored"]
+    assert status["files"][1]["error"] == "Could not extract text"
+    assert status["result"] == {"documentIds": ["a.txt", "c.txt"], "count": 3}
+    # spooled uploads are removed once processed
+    assert not list(tmp_path.glob("*.upload"))
+
+
+def test_request_thread_is_not_blocked(tmp_path):
+    release = threading.Event()
+
+    def slow(filename, content_type, path, report, job_size):
+        release.wait(5)
+        return process_file(filename, content_type, path, report, job_size)
+
+    manager = IngestJobManager(slow, finish_job, InProcessQueue(), workers=1, spool_dir=str(tmp_path))
+    started = time.perf_counter()
+    job_id = manager.submit(spooled(tmp_path, "a.txt"))
+    assert time.perf_counter() - started < 0.5
+    assert manager.status(job_id)["status"] in ("queued", "running")
+
+    release.set()
+    assert wait_for(manager, job_id)["status"] == "completed"
+
+
+def test_exceptions_fail_only_that_file(tmp_path):
+    def explode(filename, content_type, path, report, job_size):
+        raise RuntimeError("boom")
+
+    manager = IngestJobManager(explode, finish_job, InProcessQueue(), workers=1, spool_dir=str(tmp_path))
+    status = wait_for(manager, manager.submit(spooled(tmp_path, "a.txt")))
+
+    assert status["status"] == "failed"
+    assert status["files"][0]["error"] == "Error processing a.txt: boom"
+    assert manager.stats()["failed_files"] == 1
+
+
+def test_sqlite_queue_resumes_unfinished_tasks(tmp_path):
+    queue_path = str(tmp_path / "queue.sqlite3")
+    first = SQLiteQueue(queue_path)
+    files = spooled(tmp_path, "a.txt", "b.txt")
+    for index, (name, content_type, path) in enumerate(files):
+        first.put({"job_id": "job-1", "index": index, "total": 2,
+                   "filename": name, "content_type": content_type, "path": path})
+    # Claimed by a process that then died
+    assert first.get(timeout=0)["filename"] == "a.txt"
+
+    manager = IngestJobManager(process_file, finish_job, SQLiteQueue(queue_path), workers=1, spool_dir=str(tmp_path))
+    manager.start()
+    status = wait_for(manager, "job-1")
+
+    assert status["result"] == {"documentIds": ["a.txt", "b.txt"], "count": 2}
+    assert manager.queue.pending() == 0
+    assert SQLiteQueue(queue_path).recover() == []
+
+
+def test_resume_is_skipped_in_child_processes(tmp_path, monkeypatch):
+    queue_path = str(tmp_path / "queue.sqlite3")
+    server = SQLiteQueue(queue_path)
+    server.put({"job_id": "job-1", "index": 0, "total": 1, "filename": "a.txt", "content_type": "text/plain",
+                "path": spooled(tmp_path, "a.txt")[0][2]})
+    assert server.get(timeout=0)["filename"] == "a.txt"
+
+    # How a forkserver/spawn extraction worker looks while it re-imports the main script
+    monkeypatch.setattr(multiprocessing.current_process(), "name", "ForkServerProcess-1")
+    manager = IngestJobManager(process_file, finish_job, SQLiteQueue(queue_path), workers=1, spool_dir=str(tmp_path))
+    manager.resume()
+
+    assert manager._threads == []
+    assert manager.queue.pending() == 0
+
+
+def test_stopped_workers_exit_and_can_be_started_again(tmp_path):
+    manager = IngestJobManager(process_file, finish_job, InProcessQueue(), workers=2, spool_dir=str(tmp_path))
+    manager.start()
+    workers = list(manager._threads)
+    manager.stop()
+    assert not any(thread.is_alive() for thread in workers)
+
+    job_id = manager.submit(spooled(tmp_path, "a.txt"))
+    assert wait_for(manager, job_id)["status"] == "completed"
+    manager.stop()
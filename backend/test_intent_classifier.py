@@ -0,0 +1,92 @@
+import time
+
+from eval_intent import fit_threshold, load_examples
+from utils import intent_router
+from utils.intent_classifier import TRAINING_EXAMPLES, classifier, tokenize
+
+
+def words(text):
+    return {term for term in tokenize(text) if " " not in term}
+
+
+def test_labelled_set_is_held_out_from_training():
+    training = [words(text) for texts in TRAINING_EXAMPLES.values() for text in texts]
+    for example in load_examples():
+        terms = words(example["query"])
+        overlap = max(len(terms & seen) / len(terms | seen) for seen in training)
+        assert overlap < 0.5, example["query"]
+
+
+def test_default_threshold_is_fitted_on_the_tune_split():
+    assert intent_router.INTENT_LLM_ESCALATION_THRESHOLD == fit_threshold(load_examples(split="tune"))
+    assert {e["split"] for e in load_examples()} == {"tune", "test"}
+
+
+def test_confident_decisions_match_labelled_set():
+    examples = load_examples(split="test")
+    kept = [(e, classifier.classify(e["query"])) for e in examples]
+    kept = [(e, intent) for e, (intent, confidence) in kept
+            if confidence >= intent_router.INTENT_LLM_ESCALATION_THRESHOLD]
+
+    assert len(kept) >= 0.7 * len(examples)
+    assert sum(intent == e["intent"] for e, intent in kept) >= 0.95 * len(kept)
+
+
+def test_local_accuracy_on_labelled_set():
+    examples = load_examples(split="test")
+    correct = sum(classifier.classify(e["query"])[0] == e["intent"] for e in examples)
+    assert correct >= 0.85 * len(examples)
+
+
+def test_frontend_prompts_route_locally():
+    assert classifier.classify("Provide a comprehensive summary of this document with detailed "
+                               "analysis, key points, and insights") == (2, 1.0)
+    assert classifier.classify("Create a comprehensive summary comparing all uploaded documents. "
+                               "Analyze similarities, differences, and provide insights.") == (3, 1.0)
+
+
+def test_classification_is_sub_millisecond():
+    started = time.perf_counter()
+    for _ in range(200):
+        classifier.classify("What is the notice period in the lease agreement?")
+    assert (time.perf_counter() - started) / 200 < 0.001
+
+
+def test_only_uncertain_queries_reach_groq(monkeypatch):
+    monkeypatch.setattr(intent_router, "_intent_cache", intent_router.OrderedDict())
+    calls = []
+    monkeypatch.setattr(intent_router, "groq_fast_generate", lambda prompt, **kw: calls.append(prompt) or "3")
+
+    assert intent_router.detect_intent("Summarize this document") == 2
+    assert calls == []
+
+    assert intent_router.detect_intent("Which of the offers is better?") == 3
+    assert len(calls) == 1
+
+
+def test_repeated_phrasings_route_from_cache(monkeypatch):
+    monkeypatch.setattr(intent_router, "_intent_cache", intent_router.OrderedDict())
+    calls = []
+    monkeypatch.setattr(intent_router, "groq_fast_generate", lambda prompt, **kw: calls.append(prompt) or "3")
+    hits = intent_router.intent_routing_stats()["cache_hits"]
+
+    assert intent_router.detect_intent("Which of the offers is better?") == 3
+    assert intent_router.detect_intent("  which of the OFFERS   is better?") == 3
+    assert len(calls) == 1
+    assert intent_router.intent_routing_stats()["cache_hits"] == hits + 1
+
+
+def test_failed_groq_decision_is_not_cached(monkeypatch):
+    monkeypatch.setattr(intent_router, "_intent_cache", intent_router.OrderedDict())
+    monkeypatch.setattr(intent_router, "groq_fast_generate", lambda prompt, **kw: None)
+
+    assert intent_router.detect_intent("Which of the offers is better?") == 1
+    assert len(intent_router._intent_cache) == 0
+
+
+def test_intent_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(intent_router, "_intent_cache", intent_router.OrderedDict())
+    monkeypatch.setattr(intent_router, "INTENT_CACHE_SIZE", 3)
+    for i in range(5):
+        intent_router.detect_intent(f"summarize document {i}")
+    assert list(intent_router._intent_cache) == [f"summarize document {i}" for i in (2, 3, 4)]
@@ -0,0 +1,80 @@
+import threading
+
+from utils import map_reduce_summary
+from utils.persistent_cache import PersistentLRUCache
+
+
+class FakeGroq:
+    """Returns a short note naming the paragraphs it saw."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+        text = prompt.split("Text:\n", 1)[1]
+        if self.fail_on and self.fail_on in text:
+            return None
+        tags = [word for word in text.split() if word.startswith("P") and word[1:].isdigit()]
+        return "- covers " + " ".join(tags)
+
+
+def make_text(paragraphs=120):
+    return "\n\n".join(f"P{i} " + "lorem ipsum dolor sit amet " * 40 for i in range(paragraphs))
+
+
+def test_condense_covers_every_paragraph_in_order(monkeypatch):
+    groq = FakeGroq()
+    monkeypatch.setattr(map_reduce_summary, "groq_summarize_generate", groq)
+    monkeypatch.setattr(map_reduce_summary, "partial_cache", None)
+    text = make_text()
+
+    notes = map_reduce_summary.condense(text, max_chars=6000)
+
+    assert len(notes) <= 6000
+    assert notes.split()[2:5] == ["P0", "P1", "P2"]
+    assert all(f"P{i}" in notes.split() for i in range(120))
+    sections = len(map_reduce_summary.split_text_for_translation(text, 6000))
+    assert len(groq.prompts) == sections
+
+
+def test_short_text_needs_no_model_call(monkeypatch):
+    groq = FakeGroq()
+    monkeypatch.setattr(map_reduce_summary, "groq_summarize_generate", groq)
+    assert map_reduce_summary.condense("short text", max_chars=6000) == "short text"
+    assert groq.prompts == []
+
+
+def test_reduce_levels_grow_logarithmically(monkeypatch):
+    groq = FakeGroq()
+    monkeypatch.setattr(map_reduce_summary, "groq_summarize_generate", groq)
+    monkeypatch.setattr(map_reduce_summary, "partial_cache", None)
+    monkeypatch.setattr(map_reduce_summary, "SUMMARY_FAN_IN", 4)
+    text = make_text(paragraphs=64)
+
+    # A budget this small forces several reduce levels
+    notes = map_reduce_summary.condense(text, max_chars=1200)
+
+    sections = len(map_reduce_summary.split_text_for_translation(text, 1200))
+    assert len(notes) <= 1200
+    # sections + sections/4 + sections/16 + ... calls
+    assert len(groq.prompts) < sections * 4 / 3 + 4
+
+
+def test_section_notes_are_cached_and_failures_are_not(monkeypatch, tmp_path):
+    cache = PersistentLRUCache("test", str(tmp_path / "notes.sqlite3"))
+    monkeypatch.setattr(map_reduce_summary, "partial_cache", cache)
+    text = make_text(paragraphs=30)
+    groq = FakeGroq(fail_on="P7 ")
+    monkeypatch.setattr(map_reduce_summary, "groq_summarize_generate", groq)
+    first = map_reduce_summary.condense(text, max_chars=6000)
+    assert "P5" in first.split()  # the failed section (P5-P9) keeps its opening text
+
+    groq = FakeGroq()
+    monkeypatch.setattr(map_reduce_summary, "groq_summarize_generate", groq)
+    map_reduce_summary.condense(text, max_chars=6000)
+
+    assert len(groq.prompts) == 1
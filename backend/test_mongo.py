@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from utils import mongo
+
+
+def test_pool_listener_tracks_checkouts_and_wait():
+    listener = mongo.PoolStatsListener()
+    event = SimpleNamespace()
+
+    listener.connection_created(event)
+    listener.connection_check_out_started(event)
+    listener.connection_checked_out(event)
+    listener.connection_check_out_started(event)
+    listener.connection_checked_out(event)
+    listener.connection_checked_in(event)
+    listener.connection_check_out_started(event)
+    listener.connection_check_out_failed(event)
+
+    stats = listener.snapshot()
+    assert stats["open_connections"] == 1
+    assert stats["checked_out"] == 1
+    assert stats["max_checked_out"] == 2
+    assert stats["checkouts"] == 2
+    assert stats["checkout_failures"] == 1
+    assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
+
+
+def test_client_is_shared_and_lazy(monkeypatch):
+    created = []
+
+    class FakeClient(dict):
+        def __init__(self, uri, **options):
+            created.append(options)
+
+        def __missing__(self, name):
+            return {}
+
+    monkeypatch.setattr(mongo, "MongoClient", FakeClient)
+    monkeypatch.setattr(mongo, "_client", None)
+    monkeypatch.setattr(mongo, "_collections", {})
+
+    assert created == []
+    assert mongo.get_client() is mongo.get_client()
+    assert len(created) == 1
+    assert created[0]["maxPoolSize"] == mongo.MONGO_MAX_POOL_SIZE
+    assert created[0]["event_listeners"] == [mongo.pool_listener]
+    assert mongo.pool_stats()["client_created"]
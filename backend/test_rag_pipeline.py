@@ -0,0 +1,61 @@
+import numpy as np
+
+from utils import document_store, embedding_codec, rag_pipeline
+from utils.embedding_cache import DocumentMatrixCache
+
+
+def store_documents(count, dim=8):
+    rng = np.random.default_rng(3)
+    for i in range(count):
+        embeddings = rng.normal(size=(4, dim)).tolist()
+        document_store.insert_document({
+            "document_id": f"doc-{i}",
+            "filename": f"report-{i}.pdf",
+            "raw_text": "text",
+            **embedding_codec.chunk_records([f"doc {i} chunk {j}" for j in range(4)], embeddings),
+        })
+    return embeddings
+
+
+def mongo_round_trips(store):
+    return store.documents.round_trips() + store.chunks.round_trips()
+
+
+def test_rag_query_round_trips_do_not_grow_with_document_count(monkeypatch, fake_store):
+    last_embeddings = store_documents(20)
+    document_ids = [f"doc-{i}" for i in range(20)]
+
+    prompts = []
+    monkeypatch.setattr(rag_pipeline, "matrix_cache", DocumentMatrixCache(max_mb=8))
+    monkeypatch.setattr(rag_pipeline, "embed_texts", lambda q: last_embeddings[2])
+    monkeypatch.setattr(rag_pipeline, "groq_generate", lambda prompt, **kw: prompts.append(prompt) or "answer")
+
+    before = mongo_round_trips(fake_store)
+    result = rag_pipeline.handle_rag_query("what does chunk two say", document_ids, with_trace=True)
+    first_query = mongo_round_trips(fake_store) - before
+
+    # One read for the parents, one for their chunk rows; none per document
+    assert first_query == 2
+    assert result["answer"] == "answer"
+    assert "report-19.pdf" in result["sources"]
+    assert "--- Document: report-19.pdf ---" in prompts[0]
+
+    before = mongo_round_trips(fake_store)
+    rag_pipeline.handle_rag_query("and what else", document_ids)
+    assert mongo_round_trips(fake_store) - before == 0
+
+
+def test_trace_sources_include_pages(monkeypatch, fake_store):
+    document_store.insert_document({
+        "document_id": "paged",
+        "filename": "manual.pdf",
+        "raw_text": "text",
+        **embedding_codec.chunk_records(["intro", "refunds"], [[1.0, 0.0], [0.0, 1.0]], pages=[1, 7]),
+    })
+    monkeypatch.setattr(rag_pipeline, "matrix_cache", DocumentMatrixCache(max_mb=8))
+    monkeypatch.setattr(rag_pipeline, "embed_texts", lambda q: [0.0, 1.0])
+    monkeypatch.setattr(rag_pipeline, "groq_generate", lambda prompt, **kw: "answer")
+
+    result = rag_pipeline.handle_rag_query("which page covers refunds", ["paged"], with_trace=True)
+
+    assert result["sources"].startswith("manual.pdf (page 7)")
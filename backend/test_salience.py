@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+
+from utils import embedding_codec, document_store, summarizer
+from utils.embedding_cache import matrix_cache
+from utils.salience import join_chunks, salient_texts, select_salient
+from utils.similarity import normalize_rows
+
+
+def synthetic_document(seed=0):
+    """Six chunks on topic A, three on topic B, one outlier, with small noise."""
+    rng = np.random.default_rng(seed)
+    topics = np.eye(8, dtype=np.float32)
+    labels = ["A"] * 6 + ["B"] * 3 + ["C"]
+    order = [0, 6, 1, 2, 7, 3, 9, 4, 8, 5]  # interleave topics through the document
+    labels = [labels[i] for i in order]
+    rows = [topics["ABC".index(label)] + rng.normal(scale=0.05, size=8) for label in labels]
+    return labels, normalize_rows(np.array(rows, dtype=np.float32))
+
+
+def test_mmr_covers_topics_instead_of_repeating_the_central_one():
+    labels, matrix = synthetic_document()
+    picked = select_salient(matrix, [100] * len(labels), budget_chars=250)
+
+    assert len(picked) == 2
+    assert sorted(labels[i] for i in picked) == ["A", "B"]
+    assert picked == sorted(picked)
+
+
+def test_pure_centrality_picks_the_dominant_topic():
+    labels, matrix = synthetic_document()
+    picked = select_salient(matrix, [100] * len(labels), budget_chars=300, relevance_weight=1.0)
+    assert [labels[i] for i in picked] == ["A", "A", "A"]
+
+
+def test_budget_skips_chunks_that_do_not_fit():
+    labels, matrix = synthetic_document()
+    lengths = [100] * len(labels)
+    lengths[labels.index("A")] = 5000
+    picked = select_salient(matrix, lengths, budget_chars=300)
+
+    assert sum(lengths[i] for i in picked) <= 300
+    assert labels.index("A") not in picked
+
+
+def test_single_oversized_chunk_is_still_returned():
+    _, matrix = synthetic_document()
+    assert len(select_salient(matrix[:1], [9999], budget_chars=100)) == 1
+
+
+def test_consecutive_chunks_are_joined_without_overlap():
+    texts = ["alpha beta gamma", "beta gamma delta", "zeta"]
+    assert join_chunks(texts, [0, 1]) == "alpha beta gamma delta"
+    assert join_chunks(texts, [0, 2]) == "alpha beta gamma\n[...]\nzeta"
+
+
+def test_salient_texts_use_stored_embeddings(fake_store, monkeypatch):
+    labels, matrix = synthetic_document()
+    texts = [f"{label} chunk {i}." for i, label in enumerate(labels)]
+    document_store.insert_document({
+        "document_id": "doc-s", "filename": "s.pdf", "raw_text": " ".join(texts),
+        **embedding_codec.chunk_records(texts, matrix.tolist()),
+    })
+    matrix_cache.invalidate("doc-s")
+
+    result = salient_texts(["doc-s"], budget_chars=2 * len(texts[0]) + 10)["doc-s"]
+
+    assert "A chunk" in result and "B chunk" in result
+    assert "C chunk" not in result
+
+
+def test_multi_document_summary_prompt_uses_salient_chunks(fake_store, monkeypatch):
+    prompts = []
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", lambda prompt, **kw: prompts.append(prompt) or "ok")
+    monkeypatch.setattr(summarizer, "salient_texts", lambda ids, budget: {ids[0]: "SALIENT PART"})
+    for doc_id in ("m1", "m2"):
+        document_store.insert_document({"document_id": doc_id, "filename": f"{doc_id}.pdf",
+                                        "raw_text": f"opening of {doc_id}"})
+
+    summarizer.summarize_documents("summarize", ["m1", "m2"])
+
+    assert "SALIENT PART" in prompts[0] and "opening of m2" in prompts[0]
+
+
+def test_selection_stops_scoring_once_the_budget_is_spent():
+    rng = np.random.default_rng(3)
+    matrix = normalize_rows(rng.normal(size=(30000, 8)).astype(np.float32))
+    lengths = rng.integers(100, 2000, size=30000)
+
+    started = time.perf_counter()
+    picked = select_salient(matrix, lengths, budget_chars=1000)
+    assert time.perf_counter() - started < 0.5
+    assert sum(lengths[i] for i in picked) <= 1000
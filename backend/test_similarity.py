@@ -0,0 +1,44 @@
+import numpy as np
+
+from utils.similarity import build_embedding_matrix, score_matrices, top_k_indices
+
+
+def legacy_scores(embeddings, query):
+    query = np.array(query)
+    return [float(np.dot(e, query) / (np.linalg.norm(e) * np.linalg.norm(query))) for e in embeddings]
+
+
+def test_matches_legacy_cosine_ranking():
+    rng = np.random.default_rng(0)
+    docs = [rng.normal(size=(n, 16)).tolist() for n in (5, 12, 1)]
+    query = rng.normal(size=16).tolist()
+
+    matrices = [build_embedding_matrix(d)[0] for d in docs]
+    ranked = score_matrices(matrices, query, top_k=4)
+
+    flat = [(s, d, r) for d, doc in enumerate(docs) for r, s in enumerate(legacy_scores(doc, query))]
+    flat.sort(key=lambda x: x[0], reverse=True)
+
+    assert [(d, r) for _, d, r in ranked] == [(d, r) for _, d, r in flat[:4]]
+    assert np.allclose([s for s, _, _ in ranked], [s for s, _, _ in flat[:4]], atol=1e-5)
+
+
+def test_skips_empty_and_mismatched_embeddings():
+    matrix, kept = build_embedding_matrix([[1.0, 0.0], [], [0.0, 1.0, 0.0], [0.0, 2.0]])
+    assert kept == [0, 3]
+    assert matrix.dtype == np.float32
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+
+
+def test_empty_documents_are_ignored():
+    empty, _ = build_embedding_matrix([], dim=2)
+    full, _ = build_embedding_matrix([[1.0, 0.0], [0.0, 1.0]])
+    ranked = score_matrices([empty, full], [0.0, 1.0], top_k=3)
+    assert [(d, r) for _, d, r in ranked] == [(1, 1), (1, 0)]
+    assert score_matrices([empty], [0.0, 1.0], top_k=3) == []
+
+
+def test_top_k_indices_orders_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    assert top_k_indices(scores, 2).tolist() == [1, 3]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 0]
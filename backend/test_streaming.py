@@ -0,0 +1,142 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import document_store, embedding_codec, groq_api, http_session, streaming, summarizer
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    """Streams an OpenAI-compatible chat completion, one delta per SSE line."""
+    protocol_version = "HTTP/1.1"
+    deltas = ["Revenue ", "grew ", "12%."]
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        assert request["stream"] is True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for delta in self.deltas:
+            chunk = {"choices": [{"delta": {"content": delta}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_groq(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGroqHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(http_session, "_session", None)
+    monkeypatch.setattr(http_session, "_adapter", None)
+    monkeypatch.setattr(groq_api, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(groq_api, "GROQ_API_URL", f"http://127.0.0.1:{server.server_port}/")
+    yield
+    server.shutdown()
+    server.server_close()
+
+
+def parse_events(frames):
+    events = []
+    for frame in frames:
+        event, data = frame.strip().split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def store_document(doc_id="d1", text="Quarterly revenue grew. Costs fell. " * 20):
+    document_store.insert_document({
+        "document_id": doc_id,
+        "filename": f"{doc_id}.pdf",
+        "raw_text": text,
+        "summary": {},
+        **embedding_codec.chunk_records([text[:100], text[100:200]], [[1.0, 0.0], [0.0, 1.0]]),
+    })
+
+
+@pytest.fixture
+def english(monkeypatch):
+    monkeypatch.setattr(streaming, "prepare_query", lambda query, lang=None: (query, "en", False))
+
+
+def test_groq_stream_yields_deltas(fake_groq):
+    assert list(groq_api.groq_stream("prompt")) == ["Revenue ", "grew ", "12%."]
+
+
+def test_rag_answer_streams_between_start_and_end(fake_store, fake_groq, english, monkeypatch):
+    store_document()
+    monkeypatch.setattr(streaming, "detect_intent", lambda query: 1)
+    monkeypatch.setattr(streaming, "get_similar_chunks", lambda query, ids: [
+        {"filename": "d1.pdf", "chunk": "Quarterly revenue grew", "score": 0.9},
+        {"filename": "d1.pdf", "chunk": "Costs fell", "score": 0.8},
+    ])
+
+    events = parse_events(streaming.stream_query("how did revenue change", ["d1"],
+                                                 closing_metadata=lambda: {"query_language": "en"}))
+
+    assert [name for name, _ in events] == ["status", "start", "token", "token", "token", "end"]
+    assert events[0][1] == {"intent": 1, "stage": "retrieving"}
+    assert events[1][1] == {"intent": 1, "sources": ["d1.pdf"]}
+    assert "".join(data["text"] for name, data in events if name == "token") == "Revenue grew 12%."
+    metadata = events[-1][1]["metadata"]
+    assert metadata["deltas"] == 3
+    assert metadata["fallback"] is False
+    assert metadata["query_language"] == "en"
+    assert 0 <= metadata["time_to_first_token_ms"] <= metadata["elapsed_ms"]
+
+
+def test_streamed_summary_is_stored_and_then_served(fake_store, fake_groq, english, monkeypatch):
+    store_document()
+    monkeypatch.setattr(streaming, "detect_intent", lambda query: 2)
+
+    first = parse_events(streaming.stream_query("summarize", ["d1"]))
+    assert first[-1][1]["metadata"]["cached"] is False
+    assert summarizer.stored_summary("d1") == "Revenue grew 12%."
+
+    second = parse_events(streaming.stream_query("summarize", ["d1"]))
+    assert [name for name, _ in second] == ["status", "start", "token", "end"]
+    assert second[2][1]["text"] == "Revenue grew 12%."
+    assert second[-1][1]["metadata"]["cached"] is True
+
+
+def test_falls_back_when_groq_produces_nothing(fake_store, english, monkeypatch):
+    store_document("d1")
+    store_document("d2")
+    monkeypatch.setattr(streaming, "detect_intent", lambda query: 3)
+    monkeypatch.setattr(streaming, "groq_stream", lambda prompt, **kwargs: iter(()))
+
+    events = parse_events(streaming.stream_query("compare these", ["d1", "d2"]))
+
+    assert events[1][1]["sources"] == ["d1.pdf", "d2.pdf"]
+    assert "Documents available for comparison" in events[2][1]["text"]
+    assert events[-1][1]["metadata"]["fallback"] is True
+
+
+def test_translated_query_is_announced(fake_store, english, monkeypatch):
+    monkeypatch.setattr(streaming, "prepare_query", lambda query, lang=None: ("summarize", "fr", True))
+    monkeypatch.setattr(streaming, "detect_intent", lambda query: 2)
+
+    events = parse_events(streaming.stream_query("résume", ["missing"]))
+
+    assert events[1][1]["translation_info"]["original_query"] == "résume"
+    assert events[2][1]["text"].startswith("[Query translated from fr to English]")
+
+
+def test_status_is_sent_before_planning(english, monkeypatch):
+    planned = []
+    monkeypatch.setattr(streaming, "detect_intent", lambda query: 2)
+    monkeypatch.setattr(streaming, "plan_answer", lambda *args: planned.append(args) or {"answer": "done"})
+
+    frames = streaming.stream_query("summarize", ["d1"])
+    assert parse_events([next(frames)]) == [("status", {"intent": 2, "stage": "summarizing"})]
+    assert planned == []
+
+    assert [name for name, _ in parse_events(frames)] == ["start", "token", "end"]
+    assert len(planned) == 1
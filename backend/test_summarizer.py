@@ -0,0 +1,87 @@
+from utils import document_store, embedding_codec, summarizer
+
+
+def store_document(doc_id, text="Quarterly revenue grew. Costs fell. " * 20):
+    document_store.insert_document({
+        "document_id": doc_id,
+        "filename": f"{doc_id}.pdf",
+        "raw_text": text,
+        "summary": {},
+        **embedding_codec.chunk_records([text[:100], text[100:200]], [[1.0, 0.0], [0.0, 1.0]]),
+    })
+
+
+class FakeGroq:
+    def __init__(self, reply="A summary."):
+        self.reply = reply
+        self.prompts = []
+
+    def __call__(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return self.reply
+
+
+def test_summary_is_generated_once_and_served_from_the_document(fake_store, monkeypatch):
+    store_document("d1")
+    groq = FakeGroq()
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", groq)
+
+    first = summarizer.summarize_documents("summarize", ["d1"])
+    second = summarizer.summarize_documents("give me an overview", ["d1"])
+
+    assert first == {"answer": "A summary.", "cached": False}
+    assert second == {"answer": "A summary.", "cached": True}
+    assert len(groq.prompts) == 1
+    stored = fake_store.documents.docs[0]["summary"][summarizer.summary_cache_key()]
+    assert stored["prompt_version"] == summarizer.SUMMARY_PROMPT_VERSION
+    assert "." not in summarizer.summary_cache_key()
+
+
+def test_regenerate_replaces_the_stored_summary(fake_store, monkeypatch):
+    store_document("d1")
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", FakeGroq("old"))
+    summarizer.summarize_document("d1")
+
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", FakeGroq("new"))
+    assert summarizer.summarize_document("d1", regenerate=True)["answer"] == "new"
+    assert summarizer.summarize_document("d1") == {"answer": "new", "cached": True}
+
+
+def test_prompt_version_change_invalidates(fake_store, monkeypatch):
+    store_document("d1")
+    groq = FakeGroq()
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", groq)
+    summarizer.summarize_document("d1")
+
+    monkeypatch.setattr(summarizer, "SUMMARY_PROMPT_VERSION", "next")
+    assert summarizer.summarize_document("d1")["cached"] is False
+    assert len(groq.prompts) == 2
+
+
+def test_fallback_summary_is_not_stored(fake_store, monkeypatch):
+    store_document("d1")
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", FakeGroq(None))
+
+    answer = summarizer.summarize_document("d1")["answer"]
+
+    assert "DOCUMENT SUMMARY" in answer
+    assert fake_store.documents.docs[0]["summary"] == {}
+
+
+def test_multi_document_summary_uses_its_own_prompt(fake_store, monkeypatch):
+    store_document("d1")
+    store_document("d2")
+    groq = FakeGroq()
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", groq)
+
+    assert summarizer.summarize_documents("summarize", ["d1", "d2"]) == {"answer": "A summary."}
+    assert "MULTI-DOCUMENT ANALYSIS" in groq.prompts[0]
+
+
+def test_precompute_runs_in_background(fake_store, monkeypatch):
+    store_document("d1")
+    monkeypatch.setattr(summarizer, "groq_summarize_generate", FakeGroq())
+
+    summarizer.schedule_summary("d1").result(timeout=5)
+
+    assert summarizer.summary_cache_key() in fake_store.documents.docs[0]["summary"]
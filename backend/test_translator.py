@@ -0,0 +1,172 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from utils import groq_api, translator
+from utils.persistent_cache import PersistentLRUCache
+from utils.rate_limit import RateLimiter
+
+
+class FakeGroq:
+    """Translates a chunk to its upper-case form; the first chunk finishes last."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, **kwargs):
+        chunk = prompt.split("Text to translate:\n", 1)[1].rsplit("\n\nTranslation:", 1)[0]
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.1 if chunk.startswith("part 0") else 0.02)
+        with self._lock:
+            self.in_flight -= 1
+        return None if chunk in self.fail else chunk.upper()
+
+
+def chunks(n):
+    return [f"part {i} " + "x" * 30 for i in range(n)]
+
+
+def test_parallel_translation_keeps_chunk_order(monkeypatch):
+    fake = FakeGroq()
+    monkeypatch.setattr(translator, "groq_generate", fake)
+    monkeypatch.setattr(translator, "split_text_for_translation", lambda text, size: chunks(8))
+
+    result = translator.translate_with_groq("ignored", "es")
+
+    assert result == " ".join(c.upper() for c in chunks(8))
+    assert fake.max_in_flight > 1
+
+
+def test_failed_chunk_falls_back_alone(monkeypatch):
+    parts = chunks(4)
+    monkeypatch.setattr(translator, "groq_generate", FakeGroq(fail={parts[2]}))
+    monkeypatch.setattr(translator, "split_text_for_translation", lambda text, size: parts)
+    monkeypatch.setattr(translator, "translate_with_google", lambda chunk, src, tgt: f"google:{chunk}")
+
+    result = translator.translate_with_groq("ignored", "es")
+
+    assert result.split(" ", 1)[0] == "PART"
+    assert f"google:{parts[2]}" in result
+    assert result.count("google:") == 1
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+    def close(self):
+        pass
+
+
+def test_groq_429_backs_off_every_caller(monkeypatch):
+    responses = [
+        FakeResponse(429, {"error": {"message": "slow down"}}, {"Retry-After": "7"}),
+        FakeResponse(200, {"choices": [{"message": {"content": "ok"}}]}),
+    ]
+    limiter = RateLimiter("test")
+    waits = []
+    monkeypatch.setattr(limiter, "backoff", lambda seconds: waits.append(seconds))
+    monkeypatch.setattr(groq_api, "rate_limiter", limiter)
+    monkeypatch.setattr(groq_api, "GROQ_API_KEY", "key")
+    monkeypatch.setattr(groq_api, "get_session", lambda: SimpleNamespace(post=lambda *a, **k: responses.pop(0)))
+
+    assert groq_api.groq_generate("hi") == "ok"
+    assert waits == [7.0]
+    assert limiter.stats()["requests"] == 2
+
+
+def test_groq_gives_up_without_waiting_after_the_last_429(monkeypatch):
+    limiter = RateLimiter("test")
+    waits = []
+    monkeypatch.setattr(limiter, "backoff", lambda seconds: waits.append(seconds))
+    monkeypatch.setattr(groq_api, "rate_limiter", limiter)
+    monkeypatch.setattr(groq_api, "GROQ_API_KEY", "key")
+    monkeypatch.setattr(groq_api, "get_session", lambda: SimpleNamespace(
+        post=lambda *a, **k: FakeResponse(429, {"error": {"message": "slow down"}}, {"Retry-After": "7"})))
+
+    assert groq_api.groq_generate("hi", max_retries=3) is None
+    assert list(groq_api.groq_stream("hi", max_retries=3)) == []
+    assert waits == [7.0, 7.0, 7.0, 7.0]
+
+
+def test_translation_memory_reuses_segments(monkeypatch, tmp_path):
+    memory = PersistentLRUCache("test", str(tmp_path / "tm.sqlite3"))
+    calls = []
+
+    def fake_groq(prompt, **kwargs):
+        calls.append(prompt)
+        return FakeGroq()(prompt)
+
+    monkeypatch.setattr(translator, "translation_memory", memory)
+    monkeypatch.setattr(translator, "groq_generate", fake_groq)
+    first = chunks(3)
+    monkeypatch.setattr(translator, "split_text_for_translation", lambda text, size: first)
+    translator.translate_with_groq("ignored", "es")
+
+    # A re-upload sharing two segments, one of them with different spacing
+    second = [first[0], "  " + first[2].replace(" ", "   ") + "\n", "part 9 new"]
+    monkeypatch.setattr(translator, "split_text_for_translation", lambda text, size: second)
+    calls.clear()
+    result = translator.translate_with_groq("ignored", "es")
+
+    assert len(calls) == 1
+    assert result == " ".join([first[0].upper(), first[2].upper(), "PART 9 NEW"])
+    assert memory.stats()["hits"] == 2
+
+    # Same segment, other language pair: not a hit
+    monkeypatch.setattr(translator, "split_text_for_translation", lambda text, size: [first[0]])
+    calls.clear()
+    translator.translate_with_groq("ignored", "fr")
+    assert len(calls) == 1
+
+
+def test_detection_runs_once_and_is_memoised(monkeypatch):
+    runs = []
+    real = translator.langdetect.detect_langs
+    monkeypatch.setattr(translator.langdetect, "detect_langs", lambda text: runs.append(text) or real(text))
+    translator._detect_sample.cache_clear()
+    text = "Esta es una frase en español sobre los resultados del informe anual."
+
+    code, confidence = translator.detect_language_with_confidence(text)
+    assert code == "es" and 0 < confidence <= 1
+    assert translator.detect_language(text) == "es"
+    assert len(runs) == 1
+    assert translator.language_detection_stats()["hits"] == 1
+
+
+def test_short_english_ascii_skips_detector(monkeypatch):
+    monkeypatch.setattr(translator.langdetect, "detect_langs", lambda text: 1 / 0)
+    assert translator.detect_language_with_confidence("what are the key points?") == ("en", 1.0)
+    # ASCII but not English goes to the detector (which fails here)
+    assert translator.detect_language("Was sind die wichtigsten Ergebnisse?") == "unknown"
+
+
+def test_handle_query_reuses_callers_language(monkeypatch):
+    from utils import intent_router
+
+    monkeypatch.setattr(intent_router, "detect_language", lambda text: 1 / 0)
+    seen = {}
+
+    def fake_translate_query(query, target_lang="en", source_lang=None):
+        seen["source_lang"] = source_lang
+        return "what is this", source_lang
+
+    monkeypatch.setattr(intent_router, "translate_query", fake_translate_query)
+    monkeypatch.setattr(intent_router, "detect_intent", lambda query: 1)
+    monkeypatch.setattr(intent_router, "handle_rag_query", lambda query, ids, with_trace=False: {"answer": query})
+
+    result = intent_router.handle_query("¿qué es esto?", ["d1"], query_lang="es")
+
+    assert seen["source_lang"] == "es"
+    assert result["translation_info"]["query_language"] == "es"
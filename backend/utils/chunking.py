@@ -0,0 +1,149 @@
+"""
+Incremental recursive chunking.
+
+iter_chunks() produces the same chunks as LangChain's
+RecursiveCharacterTextSplitter (keep_separator=True, strip_whitespace=True)
+over the concatenation of its input pieces, but it consumes the pieces one
+at a time (PDF pages, paragraphs) and yields each chunk as soon as no later
+text can change it. It holds about one chunk of text per separator level, so
+embedding can start on the first chunks while the rest of the document is
+still being extracted.
+
+Each chunk comes with its start offset in the concatenated text, measured
+exactly rather than re-found with str.find.
+
+Splitting on separators[0] and handing every piece of chunk_size or more to
+the next separator is equivalent to LangChain choosing the first separator
+present in the text: a piece without separators[0] is simply passed down.
+"""
+from collections import deque
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+SEPARATORS = ("\n\n", "\n", ".", " ", "")
+
+
+class _Merge:
+    """Greedy merge of small pieces into overlapping chunks (TextSplitter._merge_splits)."""
+
+    def __init__(self, chunk_size, chunk_overlap):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.pieces = deque()  # (text, offset)
+        self.total = 0
+
+    def _join(self):
+        text = "".join(piece for piece, _ in self.pieces)
+        chunk = text.strip()
+        if not chunk:
+            return []
+        return [(chunk, self.pieces[0][1] + len(text) - len(text.lstrip()))]
+
+    def add(self, piece, offset):
+        out = []
+        if self.total + len(piece) > self.chunk_size and self.pieces:
+            out = self._join()
+            # Keep only the tail that fits in the overlap (and leaves room for piece)
+            while self.total > self.chunk_overlap or (
+                self.total + len(piece) > self.chunk_size and self.total > 0
+            ):
+                self.total -= len(self.pieces.popleft()[0])
+        self.pieces.append((piece, offset))
+        self.total += len(piece)
+        return out
+
+    def flush(self):
+        out = self._join() if self.pieces else []
+        self.pieces.clear()
+        self.total = 0
+        return out
+
+
+class _Splitter:
+    """One separator level; long pieces are streamed into a child level with the remaining separators."""
+
+    def __init__(self, separators, chunk_size, chunk_overlap, offset=0):
+        self.separator = separators[0]
+        # Splitting into characters is the last resort, as in LangChain
+        self.rest = separators[1:] if self.separator else ()
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.merge = _Merge(chunk_size, chunk_overlap)
+        self.child = None
+        self.buffer = ""        # the unfinished piece (minus what the child already has)
+        self.offset = offset    # offset of buffer[0] in the whole text
+        self.search_from = 0    # where in buffer the next separator may start
+
+    def _piece(self, piece, offset, out):
+        if self.child is not None:
+            # The rest of a piece already known to be long
+            out.extend(self.child.feed(piece))
+            out.extend(self.child.finish())
+            self.child = None
+        elif not piece:
+            return
+        elif len(piece) < self.chunk_size:
+            out.extend(self.merge.add(piece, offset))
+        else:
+            out.extend(self.merge.flush())
+            if self.rest:
+                child = _Splitter(self.rest, self.chunk_size, self.chunk_overlap, offset)
+                out.extend(child.feed(piece))
+                out.extend(child.finish())
+            else:
+                out.append((piece, offset))
+
+    def feed(self, text):
+        out = []
+        separator = self.separator
+        if not separator:
+            for i, char in enumerate(text):
+                self._piece(char, self.offset + i, out)
+            self.offset += len(text)
+            return out
+
+        # The separator starts each piece after the first
+        buffer = self.buffer + text
+        start, search_from = 0, self.search_from
+        while True:
+            end = buffer.find(separator, search_from)
+            if end == -1:
+                break
+            self._piece(buffer[start:end], self.offset + start, out)
+            start, search_from = end, end + len(separator)
+
+        # Text before `settled` belongs to the unfinished piece whatever comes next;
+        # once that alone is chunk_size long, stream it to the next separator level
+        settled = max(search_from, len(buffer) - len(separator) + 1)
+        if self.child is None and self.rest and settled - start >= self.chunk_size:
+            out.extend(self.merge.flush())
+            self.child = _Splitter(self.rest, self.chunk_size, self.chunk_overlap, self.offset + start)
+        if self.child is not None and settled > start:
+            out.extend(self.child.feed(buffer[start:settled]))
+            start = settled
+
+        self.buffer = buffer[start:]
+        self.offset += start
+        self.search_from = max(0, search_from - start)
+        return out
+
+    def finish(self):
+        out = []
+        if self.separator:
+            self._piece(self.buffer, self.offset, out)
+            self.buffer = ""
+        out.extend(self.merge.flush())
+        return out
+
+
+def iter_chunks(pieces, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, separators=SEPARATORS):
+    """
+    Yield (chunk, start_offset) for the text formed by joining `pieces`.
+    The chunks are those RecursiveCharacterTextSplitter would produce for the whole text.
+    """
+    if chunk_overlap > chunk_size:
+        raise ValueError(f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller.")
+    splitter = _Splitter(tuple(separators), chunk_size, chunk_overlap)
+    for piece in pieces:
+        yield from splitter.feed(piece)
+    yield from splitter.finish()
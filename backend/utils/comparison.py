@@ -1,43 +1,40 @@
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 import requests
 from .groq_api import groq_generate, test_groq_connection
+from .document_store import find_documents
+from .salience import salient_texts
 
 load_dotenv()
 
-# MongoDB setup using env vars
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-DATABASE_NAME = os.getenv("DATABASE_NAME", "document_db")
-COLLECTION_NAME = os.getenv("COLLECTION_NAME", "documents")
-
-client = MongoClient(MONGO_URI)
-db = client[DATABASE_NAME]
-collection = db[COLLECTION_NAME]
-
-def compare_documents(user_query, document_ids):
-    try:
-        if len(document_ids) < 2:
-            return { "answer": "Please upload at least 2 documents for comparison." }
-
-        # Fetch documents from MongoDB
-        docs = list(collection.find({ "document_id": { "$in": document_ids } }))
-
-        if len(docs) < 2:
-            return { "answer": "Not enough documents found in DB for comparison." }
-
-        filenames = [doc['filename'] for doc in docs]
-        
-        # Get document contents
-        doc_contents = []
-        for doc in docs:
-            content = doc.get('raw_text', '')[:1500]  # Limit content to avoid timeouts
-            doc_contents.append(f"Document: {doc['filename']}\nContent: {content}\n")
-
-        # Use Groq API for comparison
-        if "comprehensive summary comparing" in user_query.lower() or "analyze similarities" in user_query.lower():
-            # This is a general comparison request
-            prompt = f"""You are an expert multi-document analyst. Create a comprehensive summary comparing and analyzing {len(docs)} documents.
+def build_comparison_prompt(user_query, document_ids):
+    """
+    Build the comparison prompt.
+    Returns (prompt, filenames), or (None, message) when there is nothing to compare.
+    """
+    if len(document_ids) < 2:
+        return None, "Please upload at least 2 documents for comparison."
+
+    # Fetch documents from MongoDB
+    docs = find_documents(document_ids, "text-head", head_chars=1500)
+
+    if len(docs) < 2:
+        return None, "Not enough documents found in DB for comparison."
+
+    filenames = [doc['filename'] for doc in docs]
+    
+    # Get document contents: the most central, non-redundant chunks of each
+    # document, or its opening text if it has no embeddings
+    salient = salient_texts([doc['document_id'] for doc in docs], 1500)
+    doc_contents = []
+    for doc in docs:
+        content = salient.get(doc['document_id']) or doc.get('raw_text', '')[:1500]  # Limit content to avoid timeouts
+        doc_contents.append(f"Document: {doc['filename']}\nContent: {content}\n")
+
+    # Use Groq API for comparison
+    if "comprehensive summary comparing" in user_query.lower() or "analyze similarities" in user_query.lower():
+        # This is a general comparison request
+        prompt = f"""You are an expert multi-document analyst. Create a comprehensive summary comparing and analyzing {len(docs)} documents.
 
 # 📚 MULTI-DOCUMENT ANALYSIS
 
@@ -67,45 +64,57 @@ Documents to analyze:
 {chr(10).join(doc_contents)}
 
 Please provide a comprehensive analysis that synthesizes information from all {len(docs)} documents."""
-        else:
-            # This is a specific comparison request
-            prompt = f"""Please compare the following documents based on the user's query: "{user_query}"
+    else:
+        # This is a specific comparison request
+        prompt = f"""Please compare the following documents based on the user's query: "{user_query}"
 
 Documents:
 {chr(10).join(doc_contents)}
 
 Please provide a detailed comparison highlighting similarities, differences, and key insights."""
 
+    return prompt, filenames
+
+def unavailable_comparison_message(filenames, api_error=False):
+    """Answer used when Groq cannot produce the comparison"""
+    if api_error:
+        headline = "API error occurred during comparison."
+        status = "API error - please try again"
+        recommendation = "Please try the comparison again in a few moments."
+    else:
+        headline = "API rate limit reached. Please wait a moment and try again."
+        status = "Rate limited - please retry in 1-2 minutes"
+        recommendation = "Wait for the API rate limit to reset and try the comparison again."
+
+    message = f"""{headline}
+
+Documents available for comparison:
+"""
+    for i, filename in enumerate(filenames, 1):
+        message += f"- Document {i}: {filename}\n"
+    message += f"""
+Total Documents: {len(filenames)}
+Status: {status}
+
+Recommendations: {recommendation}"""
+    return message
+
+def compare_documents(user_query, document_ids):
+    try:
+        prompt, filenames = build_comparison_prompt(user_query, document_ids)
+        if prompt is None:
+            return { "answer": filenames }
+
         try:
             print("🚀 Starting Groq API comparison...")
             comparison_result = groq_generate(prompt, max_tokens=1500, temperature=0.3, timeout=180)
             
             if not comparison_result:
-                comparison_result = f"""API rate limit reached. Please wait a moment and try again.
-
-Documents available for comparison:
-"""
-                for i, filename in enumerate(filenames, 1):
-                    comparison_result += f"- Document {i}: {filename}\n"
-                comparison_result += f"""
-Total Documents: {len(docs)}
-Status: Rate limited - please retry in 1-2 minutes
-
-Recommendations: Wait for the API rate limit to reset and try the comparison again."""
+                comparison_result = unavailable_comparison_message(filenames)
                 
         except Exception as e:
             print(f"❌ Groq API comparison error: {str(e)}")
-            comparison_result = f"""API error occurred during comparison.
-
-Documents available for comparison:
-"""
-            for i, filename in enumerate(filenames, 1):
-                comparison_result += f"- Document {i}: {filename}\n"
-            comparison_result += f"""
-Total Documents: {len(docs)}
-Status: API error - please try again
-
-Recommendations: Please try the comparison again in a few moments."""
+            comparison_result = unavailable_comparison_message(filenames, api_error=True)
 
         return { "answer": comparison_result }
         
@@ -0,0 +1,314 @@
+"""
+Document storage layout.
+
+Document metadata (filename, language info, raw text, summary) lives in the
+main collection. Chunks live in CHUNKS_COLLECTION_NAME, one row per chunk:
+
+    {"document_id", "ordinal", "text", "embedding", "page"}
+
+indexed on (document_id, ordinal). `embedding` is always an array of floats,
+which is what the Atlas vector index (simple_rag.CHUNKS_VECTOR_INDEX) reads.
+With EMBEDDING_STORAGE=binary each row also carries `embedding_packed`, a
+single-row blob that retrieval reads instead of the array. This keeps large PDFs well clear of the
+16 MB BSON limit and lets handlers read only the fields they need.
+
+Documents stored before the split (chunks embedded in the parent) are still
+read transparently. Set CHUNK_STORAGE=embedded to keep writing that layout.
+
+Reads go through find_documents() with a named projection ("vectors",
+"chunks", "metadata", "text-head", "text", "language", "summary") and are
+counted per request,
+so the bytes each handler pulls from MongoDB show up in the logs.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from dotenv import load_dotenv
+from pymongo import ASCENDING
+
+from .embedding_codec import join_packed, split_packed, unpack_embeddings
+from .mongo import CHUNKS_COLLECTION_NAME, get_collection
+
+load_dotenv()
+
+CHUNK_STORAGE = os.getenv("CHUNK_STORAGE", "collection").lower()
+
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def ensure_indexes():
+    """Create the indexes the split layout relies on (idempotent, once per process)."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    with _indexes_lock:
+        if _indexes_ready:
+            return
+        get_collection("documents").create_index([("document_id", ASCENDING)])
+        get_collection("chunks").create_index([("document_id", ASCENDING), ("ordinal", ASCENDING)], unique=True)
+        _indexes_ready = True
+
+
+def build_chunk_rows(document, first_ordinal=0):
+    """Turn the embedded `chunks` (and packed `embedding_matrix`) of a document into chunk rows."""
+    chunks = document.get("chunks", [])
+    packed_rows = split_packed(document["embedding_matrix"]) if "embedding_matrix" in document else None
+
+    rows = []
+    for index, chunk in enumerate(chunks):
+        row = {
+            "document_id": document["document_id"],
+            "ordinal": first_ordinal + index,
+            "text": chunk.get("text", ""),
+            "embedding": chunk.get("embedding"),
+            "page": chunk.get("page"),
+        }
+        if packed_rows:
+            row["embedding"] = unpack_embeddings(packed_rows[index]).tolist()
+            row["embedding_packed"] = packed_rows[index]
+        rows.append(row)
+    return rows
+
+
+def insert_document(document):
+    """
+    Store a document produced by text_utils.process_document.
+
+    In the split layout the parent keeps only metadata and text; chunks go to
+    the chunks collection. Returns the parent's inserted _id.
+    """
+    if CHUNK_STORAGE == "embedded":
+        return get_collection("documents").insert_one(document).inserted_id
+
+    ensure_indexes()
+    rows = build_chunk_rows(document)
+
+    # Chunks first, so a parent is never visible without its chunks
+    if rows:
+        get_collection("chunks").insert_many(rows, ordered=False)
+    inserted_id = get_collection("documents").insert_one(_parent(document, len(rows))).inserted_id
+    print(f"💾 Stored {len(rows)} chunks in '{CHUNKS_COLLECTION_NAME}'")
+    return inserted_id
+
+
+def _parent(document, chunk_count):
+    parent = {k: v for k, v in document.items() if k not in ("chunks", "embedding_matrix")}
+    parent["chunk_storage"] = "collection"
+    parent["chunk_count"] = chunk_count
+    return parent
+
+
+class ChunkWriter:
+    """
+    Stores a document's chunks batch by batch while the rest is still being
+    embedded (see ingest.StreamingIngest), then its parent with finish().
+
+    add() takes embedding_codec.chunk_records() output for the next chunks.
+    abort() removes the rows written so far. With CHUNK_STORAGE=embedded the
+    batches are held and written inside the parent by finish().
+    """
+
+    def __init__(self, document_id):
+        self.document_id = document_id
+        self.count = 0
+        self._held = []
+
+    def add(self, records):
+        if CHUNK_STORAGE == "embedded":
+            self._held.append(records)
+            self.count += len(records["chunks"])
+            return
+        ensure_indexes()
+        rows = build_chunk_rows({"document_id": self.document_id, **records}, first_ordinal=self.count)
+        if rows:
+            get_collection("chunks").insert_many(rows, ordered=False)
+        self.count += len(rows)
+
+    def finish(self, document):
+        """Insert the parent document (without chunk fields). Returns its inserted _id."""
+        if CHUNK_STORAGE == "embedded":
+            chunks = [chunk for records in self._held for chunk in records["chunks"]]
+            packed = [row for records in self._held if "embedding_matrix" in records
+                      for row in split_packed(records["embedding_matrix"])]
+            document = {**document, "chunks": chunks}
+            if packed:
+                document["embedding_matrix"] = join_packed(packed)
+            return insert_document(document)
+
+        inserted_id = get_collection("documents").insert_one(_parent(document, self.count)).inserted_id
+        print(f"💾 Stored {self.count} chunks in '{CHUNKS_COLLECTION_NAME}'")
+        return inserted_id
+
+    def abort(self):
+        if self.count and CHUNK_STORAGE != "embedded":
+            get_collection("chunks").delete_many({"document_id": self.document_id})
+        self.count = 0
+        self._held = []
+
+
+def delete_document(document_id):
+    """Delete a document and its chunk rows. Returns True if the parent existed."""
+    get_collection("chunks").delete_many({"document_id": document_id})
+    return get_collection("documents").delete_one({"document_id": document_id}).deleted_count > 0
+
+
+def store_summary(document_id, key, entry):
+    """Save one generated summary under `summary.<key>` on the parent document."""
+    get_collection("documents").update_one({"document_id": document_id}, {"$set": {f"summary.{key}": entry}})
+
+
+# Named projections: each handler asks for a view instead of whole documents
+PROJECTIONS = {
+    # Retrieval: chunk texts and their embeddings
+    "vectors": {"fields": ("filename",), "chunk_fields": ("text", "embedding", "page")},
+    # Chunk texts only (fallback retrieval)
+    "chunks": {"fields": ("filename",), "chunk_fields": ("text",)},
+    # Descriptive fields only, no text or vectors
+    "metadata": {"fields": ("filename", "file_type", "original_language", "was_translated",
+                            "chunk_count", "translation_info")},
+    # Filename plus the first `head_chars` characters of raw_text
+    "text-head": {"fields": ("filename",), "text_head": True},
+    # Filename plus the whole raw_text (map-reduce summarization)
+    "text": {"fields": ("filename", "raw_text")},
+    # Language breakdown for the language summary endpoints
+    "language": {"fields": ("filename", "original_language", "was_translated")},
+    # Stored summaries (see summarizer.summarize_document)
+    "summary": {"fields": ("filename", "summary")},
+}
+
+TEXT_HEAD_CHARS = 3000
+
+RAW_CODEC = CodecOptions(document_class=RawBSONDocument)
+
+# Bytes and documents read from MongoDB, per request and since start-up
+_request_io = ContextVar("mongo_request_io", default=None)
+_io_totals = {"queries": 0, "documents": 0, "bytes": 0, "decode_ms": 0.0}
+_io_lock = threading.Lock()
+
+
+def start_request_io():
+    """Start counting MongoDB reads for the current request."""
+    _request_io.set({"queries": 0, "documents": 0, "bytes": 0, "decode_ms": 0.0})
+
+
+def request_io():
+    """MongoDB reads made so far by the current request (None outside a request)."""
+    return _request_io.get()
+
+
+def io_totals():
+    with _io_lock:
+        return dict(_io_totals)
+
+
+def _record_io(documents, nbytes, decode_seconds):
+    delta = {"queries": 1, "documents": documents, "bytes": nbytes, "decode_ms": decode_seconds * 1000}
+    current = _request_io.get()
+    with _io_lock:
+        for key, value in delta.items():
+            _io_totals[key] += value
+            if current is not None:
+                current[key] += value
+
+
+def _read(coll, query, projection, sort=None):
+    """Run a find, decoding raw BSON ourselves so the wire size can be counted."""
+    cursor = coll.with_options(codec_options=RAW_CODEC).find(query, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    docs = []
+    nbytes = 0
+    decode_seconds = 0.0
+    for raw in cursor:
+        if isinstance(raw, RawBSONDocument):
+            nbytes += len(raw.raw)
+            started = time.perf_counter()
+            docs.append(bson.decode(raw.raw))
+            decode_seconds += time.perf_counter() - started
+        else:
+            nbytes += len(bson.encode(raw))
+            docs.append(raw)
+
+    _record_io(len(docs), nbytes, decode_seconds)
+    return docs
+
+
+def find_documents(document_ids, projection="metadata", head_chars=TEXT_HEAD_CHARS, max_chunks=None):
+    """
+    Fetch documents for `document_ids` using one of the named PROJECTIONS.
+
+    Views with chunk fields return `chunks` in ordinal order regardless of
+    storage layout; packed binary embeddings come back as one
+    `embedding_matrix`. `max_chunks` limits (and, for views without chunks,
+    adds) the leading chunk texts returned per document.
+    """
+    view = PROJECTIONS[projection]
+    chunk_fields = view.get("chunk_fields") or (("text",) if max_chunks else ())
+
+    parent_projection = {"_id": 0, "document_id": 1, "chunk_storage": 1}
+    parent_projection.update({field: 1 for field in view["fields"]})
+    if view.get("text_head"):
+        parent_projection["raw_text"] = {"$substrCP": ["$raw_text", 0, head_chars]}
+    if max_chunks:
+        # Only the requested fields of the leading chunks; a bare $slice would also send their embeddings
+        parent_projection["chunks"] = {"$map": {
+            "input": {"$slice": [{"$ifNull": ["$chunks", []]}, max_chunks]},
+            "as": "chunk",
+            "in": {field: f"$$chunk.{field}" for field in chunk_fields},
+        }}
+    else:
+        for field in chunk_fields:
+            parent_projection[f"chunks.{field}"] = 1
+    if "embedding" in chunk_fields:
+        parent_projection["embedding_matrix"] = 1
+
+    docs = _read(get_collection("documents"), {"document_id": {"$in": list(document_ids)}}, parent_projection)
+
+    for doc in docs:
+        if view.get("text_head") and isinstance(doc.get("raw_text"), str):
+            doc["raw_text"] = doc["raw_text"][:head_chars]
+
+    split_ids = [doc["document_id"] for doc in docs if doc.get("chunk_storage") == "collection"]
+    if chunk_fields and split_ids:
+        query = {"document_id": {"$in": split_ids}}
+        if max_chunks:
+            query["ordinal"] = {"$lt": max_chunks}
+        row_projection = {"_id": 0, "document_id": 1}
+        row_projection.update({field: 1 for field in chunk_fields})
+        if "embedding" in chunk_fields:
+            # The packed copy when there is one, so the float array is not sent as well
+            row_projection["embedding"] = {"$ifNull": ["$embedding_packed", "$embedding"]}
+
+        rows_by_doc = defaultdict(list)
+        for row in _read(get_collection("chunks"), query, row_projection,
+                         sort=[("document_id", ASCENDING), ("ordinal", ASCENDING)]):
+            rows_by_doc[row.pop("document_id")].append(row)
+
+        for doc in docs:
+            if doc.get("chunk_storage") == "collection":
+                attach_chunk_rows(doc, rows_by_doc.get(doc["document_id"], []))
+
+    return docs
+
+
+def attach_chunk_rows(doc, rows):
+    """Put chunk rows on `doc` in the same shape as the embedded layout."""
+    packed = [row.get("embedding") for row in rows if isinstance(row.get("embedding"), dict)]
+    if packed and len(packed) == len(rows) and len({p["dtype"] for p in packed}) == 1:
+        doc["embedding_matrix"] = join_packed(packed)
+        for row in rows:
+            row.pop("embedding", None)
+    else:
+        for row in rows:
+            if isinstance(row.get("embedding"), dict):
+                row["embedding"] = unpack_embeddings(row["embedding"]).tolist()
+    doc["chunks"] = rows
+    return doc
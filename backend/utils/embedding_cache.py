@@ -0,0 +1,129 @@
+"""
+Process-local cache of per-document embedding matrices.
+
+Follow-up questions usually target the same document_ids, so the normalised
+float32 matrix built for a document (plus its chunk texts and filename) is
+kept in memory and reused instead of re-reading every embedding from MongoDB.
+
+The cache is bounded by EMBEDDING_CACHE_MB (default 64) and evicts the least
+recently used documents first. Call invalidate() whenever a document is
+re-uploaded or deleted, after the change is written to MongoDB.
+
+A read can race an invalidation: a request that fetched a document just
+before it was deleted or replaced would put the old matrix back. Readers take
+generation() before going to MongoDB and pass it to put(), which drops the
+entry if the document was invalidated in the meantime.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_CACHE_MB = float(os.getenv("EMBEDDING_CACHE_MB", "64"))
+
+# Invalidations remembered per document; older ones are folded into one floor
+MAX_TRACKED_INVALIDATIONS = 4096
+
+
+class DocumentEntry:
+    """Everything retrieval needs for one document, without touching Mongo."""
+
+    __slots__ = ("document_id", "filename", "texts", "matrix", "pages", "nbytes")
+
+    def __init__(self, document_id, filename, texts, matrix, pages=None):
+        self.document_id = document_id
+        self.filename = filename
+        self.texts = texts
+        self.matrix = matrix
+        self.pages = pages  # page each chunk starts on (None for documents without pages)
+        self.nbytes = matrix.nbytes + sum(sys.getsizeof(t) for t in texts)
+
+
+class DocumentMatrixCache:
+    """Thread-safe LRU cache of DocumentEntry objects bounded by memory use."""
+
+    def __init__(self, max_mb=EMBEDDING_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Generation of each document's latest invalidation (see put())
+        self._generation = 0
+        self._invalidated_at = OrderedDict()
+        self._invalidated_floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, document_id):
+        with self._lock:
+            entry = self._entries.get(document_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(document_id)
+            self.hits += 1
+            return entry
+
+    def generation(self):
+        """Take this before reading a document from MongoDB and pass it to put()."""
+        with self._lock:
+            return self._generation
+
+    def put(self, entry, generation=None):
+        """
+        Cache `entry`. With `generation`, the entry is dropped if its document
+        was invalidated after that generation was taken (the read is stale).
+        """
+        if entry.nbytes > self.max_bytes:
+            print(f"⚠️ Document {entry.document_id} ({entry.nbytes / 1e6:.1f} MB) exceeds the embedding cache budget, not caching")
+            return
+        with self._lock:
+            if generation is not None and generation < self._invalidated_at.get(entry.document_id, self._invalidated_floor):
+                return
+            old = self._entries.pop(entry.document_id, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[entry.document_id] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def invalidate(self, document_id):
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at.pop(document_id, None)
+            self._invalidated_at[document_id] = self._generation
+            if len(self._invalidated_at) > MAX_TRACKED_INVALIDATIONS:
+                _, oldest = self._invalidated_at.popitem(last=False)
+                self._invalidated_floor = oldest
+            entry = self._entries.pop(document_id, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+                print(f"🧹 Evicted document {document_id} from embedding cache")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared instance used by the retrieval path and the upload/delete endpoints
+matrix_cache = DocumentMatrixCache()
@@ -0,0 +1,93 @@
+"""
+Packed binary storage for chunk embeddings.
+
+By default each chunk stores its embedding as a list of 384 BSON doubles.
+With EMBEDDING_STORAGE=binary a document instead carries one
+`embedding_matrix` field:
+
+    {"dtype": "float32", "shape": [n_chunks, dim], "data": Binary(...)}
+
+which is roughly 4-8x smaller on disk and is decoded with np.frombuffer
+instead of building Python floats. EMBEDDING_DTYPE=float16 halves it again.
+"""
+import os
+
+import numpy as np
+from bson.binary import Binary
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "list").lower()
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32").lower()
+
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+def use_binary_storage():
+    return EMBEDDING_STORAGE == "binary"
+
+
+def pack_embeddings(embeddings, dtype=None):
+    """Pack a list of equally sized vectors into a dtype/shape-tagged Binary blob."""
+    dtype = (dtype or EMBEDDING_DTYPE).lower()
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+    matrix = np.asarray(embeddings, dtype=np.dtype(dtype).newbyteorder("<"))
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 2-D list of embeddings, got shape {matrix.shape}")
+
+    return {
+        "dtype": dtype,
+        "shape": list(matrix.shape),
+        "data": Binary(matrix.tobytes()),
+    }
+
+
+def unpack_embeddings(blob):
+    """Decode a packed blob into a read-only (n, dim) array without copying."""
+    dtype = np.dtype(blob["dtype"]).newbyteorder("<")
+    shape = tuple(blob["shape"])
+    return np.frombuffer(blob["data"], dtype=dtype).reshape(shape)
+
+
+def chunk_records(chunks, embeddings, pages=None):
+    """
+    Build the chunk-related fields of a document.
+
+    Returns {"chunks": [...]} with per-chunk embedding lists, or in binary mode
+    {"chunks": [{"text": ...}], "embedding_matrix": {...}}. When `pages` is
+    given each chunk also carries the page it starts on.
+    """
+    if use_binary_storage() and embeddings:
+        records = {
+            "chunks": [{"text": chunk} for chunk in chunks],
+            "embedding_matrix": pack_embeddings(embeddings),
+        }
+    else:
+        records = {
+            "chunks": [{"text": chunk, "embedding": embedding} for chunk, embedding in zip(chunks, embeddings)]
+        }
+    if pages:
+        for record, page in zip(records["chunks"], pages):
+            record["page"] = page
+    return records
+
+
+def split_packed(blob):
+    """Split an (n, dim) blob into n single-row blobs of shape [dim]."""
+    dtype = blob["dtype"]
+    matrix = unpack_embeddings(blob)
+    return [{"dtype": dtype, "shape": [matrix.shape[1]], "data": Binary(row.tobytes())} for row in matrix]
+
+
+def join_packed(row_blobs):
+    """Concatenate single-row blobs back into one (n, dim) blob without decoding."""
+    dtype = row_blobs[0]["dtype"]
+    dim = row_blobs[0]["shape"][-1]
+    return {
+        "dtype": dtype,
+        "shape": [len(row_blobs), dim],
+        "data": b"".join(r["data"] for r in row_blobs),
+    }
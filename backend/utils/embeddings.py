@@ -8,10 +8,27 @@ Inference API for the SAME model (all-MiniLM-L6-v2), so embeddings stay
 
 Requires the env var HF_TOKEN (a free token from
 https://huggingface.co/settings/tokens).
+
+Large inputs are split into batches of 32 that are sent EMBED_CONCURRENCY at
+a time, optionally capped at EMBED_RATE_LIMIT_PER_MIN requests per minute.
+
+Vectors are cached by hash(model + normalised text) in a two-tier cache (an
+in-memory LRU over a SQLite file), so re-uploaded chunks and repeated queries
+are not sent to the provider again:
+
+    EMBED_CACHE_PATH          SQLite file (default .cache/embeddings.sqlite3; empty disables the cache)
+    EMBED_CACHE_MEMORY_ITEMS  vectors kept in memory (default 4096)
+    EMBED_CACHE_MAX_MB        on-disk size cap (default 256)
 """
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import requests
+from .http_session import get_session
+from .persistent_cache import content_key, normalize_text, open_cache
+from .rate_limit import RateLimiter, retry_after_seconds
 
 HF_TOKEN = os.getenv("HF_TOKEN")
 HF_MODEL = os.getenv("HF_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
@@ -23,6 +40,32 @@ HF_URL = f"https://router.huggingface.co/hf-inference/models/{HF_MODEL}/pipeline
 _BATCH_SIZE = 32
 _TIMEOUT = 120
 
+# Batches kept in flight at once (shared by all requests in the process) and
+# an optional requests-per-minute cap for the provider (0 = no cap).
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_RATE_LIMIT_PER_MIN = int(os.getenv("EMBED_RATE_LIMIT_PER_MIN", "0"))
+
+rate_limiter = RateLimiter("HuggingFace", EMBED_RATE_LIMIT_PER_MIN)
+
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite3"))
+EMBED_CACHE_MEMORY_ITEMS = int(os.getenv("EMBED_CACHE_MEMORY_ITEMS", "4096"))
+EMBED_CACHE_MAX_MB = float(os.getenv("EMBED_CACHE_MAX_MB", "256"))
+
+vector_cache = open_cache("Embedding", EMBED_CACHE_PATH, EMBED_CACHE_MEMORY_ITEMS,
+                          EMBED_CACHE_MAX_MB) if EMBED_CACHE_PATH else None
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY, thread_name_prefix="embed")
+    return _executor
+
 
 def _headers():
     headers = {"Content-Type": "application/json"}
@@ -32,16 +75,22 @@ def _headers():
 
 
 def _embed_batch(batch, max_retries=4):
-    """Embed a list of strings, retrying while the model warms up (503)."""
+    """Embed a list of strings, retrying while the model warms up (503) or is rate limited (429)."""
     payload = {"inputs": batch}
     last_err = None
     for attempt in range(max_retries):
         try:
-            resp = requests.post(HF_URL, headers=_headers(), json=payload, timeout=_TIMEOUT)
+            rate_limiter.acquire()
+            resp = get_session().post(HF_URL, headers=_headers(), json=payload, timeout=_TIMEOUT)
             # 503 = model is loading on HF's side; wait and retry.
             if resp.status_code == 503:
                 time.sleep(5 * (attempt + 1))
                 continue
+            # 429 = rate limited; pause every batch worker, then retry this batch.
+            if resp.status_code == 429:
+                last_err = RuntimeError("rate limited (429)")
+                rate_limiter.backoff(retry_after_seconds(resp, default=5 * (attempt + 1)))
+                continue
             resp.raise_for_status()
             return resp.json()
         except Exception as e:  # noqa: BLE001 - surface a clean error to caller
@@ -63,8 +112,48 @@ def embed_texts(texts):
     if not inputs:
         return [] if not single else []
 
-    vectors = []
-    for i in range(0, len(inputs), _BATCH_SIZE):
-        vectors.extend(_embed_batch(inputs[i:i + _BATCH_SIZE]))
+    vectors = [None] * len(inputs)
+    keys = [content_key(HF_MODEL, normalize_text(text)) for text in inputs]
+    cached = vector_cache.get_many(keys) if vector_cache is not None else {}
+    for i, key in enumerate(keys):
+        if key in cached:
+            vectors[i] = np.frombuffer(cached[key], dtype=np.float32).tolist()
+
+    # Only texts the cache has never seen go to the provider, each one once.
+    pending = {}
+    for i, key in enumerate(keys):
+        if vectors[i] is None:
+            pending.setdefault(key, []).append(i)
+
+    if pending:
+        miss_keys = list(pending)
+        miss_texts = [inputs[pending[key][0]] for key in miss_keys]
+        fresh = _embed_uncached(miss_texts)
+        for key, vector in zip(miss_keys, fresh):
+            for i in pending[key]:
+                vectors[i] = vector
+        if vector_cache is not None:
+            vector_cache.put_many(
+                (key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in zip(miss_keys, fresh)
+            )
 
     return vectors[0] if single else vectors
+
+
+def _embed_uncached(inputs):
+    batches = [inputs[i:i + _BATCH_SIZE] for i in range(0, len(inputs), _BATCH_SIZE)]
+
+    vectors = []
+    if len(batches) == 1 or EMBED_CONCURRENCY <= 1:
+        for batch in batches:
+            vectors.extend(_embed_batch(batch))
+    else:
+        # Keep several batches in flight; map() yields results in input order,
+        # and each batch retries on its own without resending the others.
+        for batch_vectors in _get_executor().map(_embed_batch, batches):
+            vectors.extend(batch_vectors)
+    return vectors
+
+
+def cache_stats():
+    return vector_cache.stats() if vector_cache is not None else {"enabled": False}
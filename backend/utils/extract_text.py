@@ -1,14 +1,119 @@
 import fitz  # PyMuPDF
 from docx import Document
+from bisect import bisect_right
+from concurrent.futures import Future, ProcessPoolExecutor
 import io
 import logging
+import multiprocessing
+import os
+import threading
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Worker processes for extracting multi-file uploads in parallel (PyMuPDF and
+# python-docx hold the GIL); 0 or 1 (the default) extracts in the calling thread.
+# Each worker is a separate interpreter (see _get_process_pool), about 45 MB
+# resident with 8-10 MB of it private; more workers than cores gain nothing
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", "1"))
+# PDFs with at least this many pages are split into page ranges across the workers
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+_in_worker = False
+
+def _mark_worker():
+    # Workers never start pools of their own
+    global _in_worker, _process_pool
+    _in_worker = True
+    _process_pool = None
+
+def _pool_enabled():
+    return EXTRACT_PROCESSES > 1 and "forkserver" in multiprocessing.get_all_start_methods() and not _in_worker
+
+def process_pool_enabled():
+    """Whether submit_extraction hands files to worker processes rather than extracting them inline"""
+    return _pool_enabled()
+
+def _get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                # Not fork: by now the app has threads, a MongoDB client and SQLite
+                # handles, and a forked copy of it could deadlock or run out of memory.
+                # Workers fork from a small server process that only imports this module
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload([__name__])
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=EXTRACT_PROCESSES, mp_context=context, initializer=_mark_worker
+                )
+                logger.info(f"Started extraction process pool with {EXTRACT_PROCESSES} workers")
+    return _process_pool
+
+def _reset_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        _process_pool = None
+
+def submit_extraction(source, file_ext):
+    """
+    Start extract_text_with_pages in the process pool and return its Future.
+    `source` is a file path (workers then open the file themselves) or the file's bytes.
+    Without a pool, or for a PDF large enough to be split by pages across the
+    pool, the text is extracted right away and returned as a done Future.
+    """
+    # A large PDF is better off split by pages, which needs the pool to itself
+    if _pool_enabled() and not _is_large_pdf(source, file_ext):
+        try:
+            return _get_process_pool().submit(extract_text_with_pages, source, file_ext)
+        except Exception as e:
+            # e.g. a worker died and broke the pool; extract here and start a new pool next time
+            logger.error(f"Extraction process pool unavailable: {str(e)}")
+            _reset_process_pool()
+    future = Future()
+    try:
+        future.set_result(extract_text_with_pages(source, file_ext))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+def _is_empty(source):
+    return os.path.getsize(source) == 0 if _is_path(source) else not source
+
+def _open_pdf(source):
+    # From a path MuPDF reads the file as needed instead of holding a copy of its bytes
+    if _is_path(source):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+def _is_large_pdf(source, file_ext):
+    if (file_ext or '').lower() != '.pdf' or _is_empty(source):
+        return False
+    try:
+        with _open_pdf(source) as doc:
+            return doc.page_count >= PDF_PARALLEL_MIN_PAGES
+    except Exception:
+        return False
+
+def page_for_offset(page_starts, offset):
+    """1-based page number of the character at `offset`, given extract_pdf_with_pages' page_starts"""
+    return max(1, bisect_right(page_starts, offset))
+
 def extract_text_from_file(file_bytes, file_ext):
-    if not file_bytes:
+    return extract_text_with_pages(file_bytes, file_ext)[0]
+
+def extract_text_with_pages(source, file_ext):
+    """
+    Extract text from a file given its path or its bytes.
+    Returns (text, page_starts); page_starts is None for files without pages.
+    """
+    if source is None or _is_empty(source):
         raise ValueError("File content is empty or None")
         
     if not file_ext:
@@ -18,12 +123,15 @@ def extract_text_from_file(file_bytes, file_ext):
     
     try:
         if ext == '.pdf':
-            return extract_from_pdf(file_bytes)
+            return extract_pdf_with_pages(source)
         elif ext == '.docx':
-            return extract_from_docx(file_bytes)
+            return extract_from_docx(source), None
         elif ext == '.txt':
             try:
-                return file_bytes.decode('utf-8')
+                if _is_path(source):
+                    with open(source, encoding='utf-8') as f:
+                        return f.read(), None
+                return source.decode('utf-8'), None
             except UnicodeDecodeError as e:
                 raise ValueError(f"Failed to decode text file: {str(e)}")
         else:
@@ -31,59 +139,130 @@ def extract_text_from_file(file_bytes, file_ext):
     except Exception as e:
         raise Exception(f"Error processing {ext} file: {str(e)}")
 
-def extract_from_pdf(file_bytes):
-    text = ""
+def _page_text(page, page_num):
     try:
-        logger.info("Attempting to open PDF from bytes")
-        # Open PDF from bytes stream
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        logger.info(f"PDF opened successfully. Page count: {doc.page_count}")
+        logger.debug(f"Processing page {page_num + 1}")
+        page_text = page.get_text()
+        logger.debug(f"Extracted {len(page_text)} characters from page {page_num + 1}")
         
-        if not doc.page_count:
+        if not page_text.strip():
+            logger.warning(f"Page {page_num + 1} contains no text")
+            # Try alternative text extraction method
+            page_text = page.get_text("text")
+            logger.debug(f"Alternative extraction got {len(page_text)} characters")
+        return page_text
+        
+    except Exception as e:
+        logger.error(f"Error extracting text from page {page_num + 1}: {str(e)}", exc_info=True)
+        return ""
+
+def iter_pdf_pages(source, start=0, stop=None):
+    """Yield the text of each page of a PDF in [start, stop), one page in memory at a time"""
+    with _open_pdf(source) as doc:
+        for page_num in range(start, doc.page_count if stop is None else stop):
+            yield _page_text(doc[page_num], page_num)
+
+def extract_pdf_pages(source, start, stop):
+    """Texts of pages [start, stop) of a PDF; runs in a pool worker for large PDFs"""
+    return list(iter_pdf_pages(source, start, stop))
+
+def _page_ranges(page_count, parts):
+    size = -(-page_count // parts)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+def _iter_pdf(source):
+    """Page texts of a PDF in order; large PDFs are extracted in page ranges by the process pool"""
+    logger.info("Attempting to open PDF")
+    with _open_pdf(source) as doc:
+        page_count = doc.page_count
+        logger.info(f"PDF opened successfully. Page count: {page_count}")
+        
+        if not page_count:
             logger.error("PDF contains no pages")
             raise ValueError("PDF contains no pages")
-            
-        for page_num, page in enumerate(doc):
-            try:
-                logger.debug(f"Processing page {page_num + 1}")
-                page_text = page.get_text()
-                logger.debug(f"Extracted {len(page_text)} characters from page {page_num + 1}")
-                
-                if not page_text.strip():
-                    logger.warning(f"Page {page_num + 1} contains no text")
-                    # Try alternative text extraction method
-                    page_text = page.get_text("text")
-                    logger.debug(f"Alternative extraction got {len(page_text)} characters")
-                    
-                text += page_text
-                
-            except Exception as e:
-                logger.error(f"Error extracting text from page {page_num + 1}: {str(e)}", exc_info=True)
-                continue
+
+        parallel = page_count >= PDF_PARALLEL_MIN_PAGES and _pool_enabled()
+        if not parallel:
+            for page_num in range(page_count):
+                yield _page_text(doc[page_num], page_num)
+            return
+
+    ranges = _page_ranges(page_count, EXTRACT_PROCESSES)
+    logger.info(f"Extracting {page_count} pages in {len(ranges)} ranges across worker processes")
+    # Workers given a path open the file themselves; bytes would be copied to each one
+    futures = [_get_process_pool().submit(extract_pdf_pages, source, start, stop) for start, stop in ranges]
+    for future in futures:
+        yield from future.result()
+
+def _no_text_error():
+    logger.error("PDF contains no extractable text (may be a scanned document or image-based PDF)")
+    logger.warning("OCR is not currently implemented. Please install pytesseract and poppler for OCR support.")
+    return ValueError("PDF contains no extractable text (may be a scanned document or image-based PDF)")
+
+def extract_pdf_with_pages(source):
+    """
+    Extract a PDF's text page by page.
+    Returns (text, page_starts): page_starts[i] is the offset in text where page i + 1
+    begins (see page_for_offset). Large PDFs are split into page ranges that are
+    extracted in parallel by the process pool.
+    """
+    try:
+        pages = list(_iter_pdf(source))
+
+        page_starts = []
+        offset = 0
+        for page_text in pages:
+            page_starts.append(offset)
+            offset += len(page_text)
+        text = "".join(pages)
         
         logger.info(f"Finished processing all pages. Total text length: {len(text)}")
                 
         if not text.strip():
-            logger.error("PDF contains no extractable text (may be a scanned document or image-based PDF)")
-            # Try OCR as last resort
-            try:
-                logger.info("Attempting OCR as fallback...")
-                pix = page.get_pixmap()
-                # This is a placeholder - you'd need to integrate with an OCR library like Tesseract
-                # text = pytesseract.image_to_string(pix)
-                logger.warning("OCR is not currently implemented. Please install pytesseract and poppler for OCR support.")
-            except Exception as ocr_error:
-                logger.error(f"OCR attempt failed: {str(ocr_error)}")
-                
-            raise ValueError("PDF contains no extractable text (may be a scanned document or image-based PDF)")
+            raise _no_text_error()
             
-        return text
+        return text, page_starts
     except Exception as e:
         logger.error(f"PDF processing error: {str(e)}", exc_info=True)
         raise Exception(f"PDF processing error: {str(e)}")
 
-def extract_from_docx(file_bytes):
-    # Read DOCX from bytes stream
-    doc = Document(io.BytesIO(file_bytes))
+def split_pages(text, page_starts):
+    """The text of each page, given extract_text_with_pages' result ([text] without pages)"""
+    if not page_starts:
+        return [text]
+    return [text[start:stop] for start, stop in zip(page_starts, page_starts[1:] + [len(text)])]
+
+def iter_text_pages(source, file_ext):
+    """
+    Yield a file's text page by page for PDFs (one page in memory at a time),
+    in one piece for other formats. Joined, the pages are extract_text_with_pages'
+    text, and the same errors are raised, once they are found.
+    """
+    if (file_ext or '').lower() != '.pdf':
+        yield extract_text_with_pages(source, file_ext)[0]
+        return
+
+    if source is None or _is_empty(source):
+        raise ValueError("File content is empty or None")
+    try:
+        try:
+            has_text = False
+            for page_text in _iter_pdf(source):
+                has_text = has_text or bool(page_text.strip())
+                yield page_text
+            if not has_text:
+                raise _no_text_error()
+        except Exception as e:
+            logger.error(f"PDF processing error: {str(e)}", exc_info=True)
+            raise Exception(f"PDF processing error: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Error processing .pdf file: {str(e)}")
+
+def extract_from_pdf(source):
+    return extract_pdf_with_pages(source)[0]
+
+def extract_from_docx(source):
+    # Read DOCX from a path or a bytes stream
+    doc = Document(source if _is_path(source) else io.BytesIO(source))
     text = "\n".join([para.text for para in doc.paragraphs])
     return text
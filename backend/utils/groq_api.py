@@ -1,9 +1,12 @@
+import json
 import os
 import requests
 import time
 import random
 from dotenv import load_dotenv
 import re  # Moved import to top level
+from .http_session import get_session
+from .rate_limit import RateLimiter, retry_after_seconds
 
 load_dotenv()
 
@@ -13,6 +16,11 @@ GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 # Updated to use faster, lighter model as per your existing code
 MODEL_NAME = "llama-3.1-8b-instant"
 
+# Optional requests-per-minute cap (0 = no cap). A 429 seen by any thread
+# pauses every caller, so concurrent translation workers back off together.
+GROQ_RATE_LIMIT_PER_MIN = int(os.getenv("GROQ_RATE_LIMIT_PER_MIN", "0"))
+rate_limiter = RateLimiter("Groq", GROQ_RATE_LIMIT_PER_MIN)
+
 # --- MODIFIED FUNCTION ---
 def groq_generate(prompt, max_tokens=600, temperature=0.3, timeout=90, max_retries=5, base_delay=2):
     """
@@ -46,7 +54,8 @@ def groq_generate(prompt, max_tokens=600, temperature=0.3, timeout=90, max_retri
     for attempt in range(max_retries):
         try:
             # Make the actual API request
-            response = requests.post(
+            rate_limiter.acquire()
+            response = get_session().post(
                 GROQ_API_URL,
                 headers=headers,
                 json=data,
@@ -65,16 +74,19 @@ def groq_generate(prompt, max_tokens=600, temperature=0.3, timeout=90, max_retri
                 error_data = response.json()
                 print(f"⏰ Groq API rate limit exceeded (Attempt {attempt + 1}/{max_retries}): {error_data}")
                 
-                # Try to extract retry time from error message (your existing logic)
+                # Prefer the provider's hint (Retry-After header or error message)
+                retry_seconds = retry_after_seconds(response)
                 retry_match = re.search(r'try again in (\d+\.?\d*)s', error_data.get('error', {}).get('message', ''))
                 if retry_match:
-                    retry_seconds = float(retry_match.group(1))
+                    retry_seconds = max(retry_seconds, float(retry_match.group(1)))
                     print(f"⏰ Suggested retry time from API: {retry_seconds} seconds")
                 
-                # Calculate exponential backoff delay: base * 2^attempt + random jitter
-                delay = (base_delay * (2 ** attempt)) + random.uniform(0, 1)
-                print(f"⏳ Retrying in {delay:.2f} seconds...")
-                time.sleep(delay)
+                # Otherwise exponential backoff: base * 2^attempt + random jitter
+                delay = retry_seconds or (base_delay * (2 ** attempt)) + random.uniform(0, 1)
+                # Pause every Groq caller, not just this thread; acquire() waits it out.
+                # Nothing is retried after the last attempt, so don't wait then.
+                if attempt < max_retries - 1:
+                    rate_limiter.backoff(delay)
                 continue # Go back to the start of the loop to retry
             
             # ❌ OTHER ERRORS: For any other bad status, print error and give up
@@ -102,6 +114,75 @@ def groq_generate(prompt, max_tokens=600, temperature=0.3, timeout=90, max_retri
 # ---------------------------
 
 
+def groq_stream(prompt, max_tokens=600, temperature=0.3, timeout=90, max_retries=5, base_delay=2):
+    """
+    Stream a completion from Groq, yielding text deltas as they arrive.
+
+    Retries rate limits (429) before the first token exactly like
+    groq_generate. Yields nothing if the request fails, so callers can fall
+    back when no text was produced.
+    """
+    if not GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY not found in environment variables")
+    
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream"
+    }
+    data = {
+        "model": MODEL_NAME,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "top_p": 0.9,
+        "stream": True
+    }
+    
+    print(f"🚀 Streaming from Groq API with model: {MODEL_NAME}")
+    
+    for attempt in range(max_retries):
+        try:
+            rate_limiter.acquire()
+            response = get_session().post(GROQ_API_URL, headers=headers, json=data, timeout=timeout, stream=True)
+            
+            if response.status_code == 429:
+                delay = retry_after_seconds(response) or (base_delay * (2 ** attempt)) + random.uniform(0, 1)
+                response.close()
+                print(f"⏰ Groq API rate limit exceeded (Attempt {attempt + 1}/{max_retries})")
+                if attempt < max_retries - 1:
+                    rate_limiter.backoff(delay)
+                continue
+            
+            if response.status_code != 200:
+                print(f"❌ Groq API error: {response.status_code} - {response.text}")
+                response.close()
+                return
+            
+            with response:
+                # OpenAI-compatible SSE: "data: {json}" lines, ending with "data: [DONE]"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    choices = json.loads(payload).get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+            print("✅ Groq API stream completed")
+            return
+        
+        except requests.exceptions.Timeout:
+            print(f"⏰ Groq API stream timeout after {timeout} seconds")
+            return
+        except requests.exceptions.ConnectionError:
+            print("🔌 Groq API connection error")
+            return
+    
+    print(f"❌ Groq API stream failed after {max_retries} attempts due to rate limiting.")
+
 def groq_fast_generate(prompt, max_tokens=200, temperature=0.1, timeout=30):
     """
     Fast generation for intent detection and simple queries
@@ -0,0 +1,69 @@
+"""
+Shared keep-alive HTTP session for outbound API calls (Groq, HuggingFace).
+
+Calling requests.post() directly opens a new TCP + TLS connection every time.
+All outbound calls go through one requests.Session instead, whose adapter
+keeps a pool of connections per host and reuses them across waitress threads.
+
+    HTTP_POOL_CONNECTIONS   number of hosts to keep pools for (default 4)
+    HTTP_POOL_MAXSIZE       connections kept per host (default 10)
+
+connection_stats() reports, per host, how many requests reused a pooled
+connection versus how many new connections were opened.
+"""
+import os
+import threading
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+
+_session = None
+_adapter = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide session, creating it on first use."""
+    global _session, _adapter
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Accept-Encoding": "gzip, deflate",
+                    "Connection": "keep-alive",
+                })
+                _adapter = adapter
+                _session = session
+    return _session
+
+
+def connection_stats():
+    """Per-host request and connection counts for the shared session."""
+    hosts = {}
+    if _adapter is None:
+        return hosts
+
+    pools = _adapter.poolmanager.pools
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        requests_made = getattr(pool, "num_requests", 0)
+        connections = getattr(pool, "num_connections", 0)
+        hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+            "requests": requests_made,
+            "new_connections": connections,
+            "reused": max(requests_made - connections, 0),
+            "reuse_ratio": round((requests_made - connections) / requests_made, 3) if requests_made else 0.0,
+        }
+    return hosts
@@ -0,0 +1,325 @@
+"""
+Upload ingest pipeline.
+
+An IngestPipeline carries one document through detect -> translate -> chunk
+-> embed -> assemble and keeps each stage's result on the object, so later
+stages (and the caller building the API response) reuse the detected
+language and the translation instead of running langdetect or Groq again.
+
+Given the page index from extract_pdf_with_pages, chunks are tagged with the
+page they start on. For translated documents the page is estimated from the
+chunk's relative position, since translation does not preserve offsets.
+
+Uploads go through StreamingIngest, which runs extract -> chunk -> embed ->
+store as a pipeline of threads joined by bounded queues, so a document's
+first chunks are embedded and stored while later pages are still being
+extracted. Documents that need translation are handed to IngestPipeline once
+their language is known, as translation needs the whole text.
+"""
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from .chunking import iter_chunks
+from .document_store import ChunkWriter, insert_document
+from .embedding_codec import chunk_records
+from .extract_text import page_for_offset
+from .text_utils import chunk_text, chunk_text_with_offsets, generate_embeddings
+from .translator import detect_language, translate_document_content
+
+load_dotenv()
+
+STAGES = ("detect", "translate", "chunk", "embed", "assemble")
+
+# Chunks per embedding request in StreamingIngest
+INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "32"))
+# Items (pages, chunk batches, embedded batches) a stage may run ahead of the next
+INGEST_BUFFER = int(os.getenv("INGEST_BUFFER", "4"))
+# detect_language looks at this many leading characters
+DETECT_CHARS = 1000
+
+
+def document_fields(filename, file_type, text, raw_text, language, was_translated):
+    """Everything a stored document carries besides its id and chunks."""
+    return {
+        "filename": filename,
+        "file_type": file_type,
+        "raw_text": text,  # Store the English (processed) text
+        "original_text": raw_text if was_translated else None,
+        "original_language": language,
+        "was_translated": was_translated,
+        "summary": {},
+        "QnA_log": [],
+        "translation_info": {
+            "original_language": language,
+            "translated_to": "en" if was_translated else language,
+            "translation_method": "groq_api" if was_translated else "none",
+            "processed_at": datetime.utcnow().isoformat()
+        }
+    }
+
+
+class IngestPipeline:
+    def __init__(self, filename, file_type, raw_text, page_starts=None, language=None):
+        self.filename = filename
+        self.file_type = file_type
+        self.raw_text = raw_text
+        self.page_starts = page_starts  # offset in raw_text where each page begins
+
+        self.language = language   # detected language of raw_text (pass it if already known)
+        self.text = None           # English text used for chunking
+        self.was_translated = False
+        self.chunks = None
+        self.pages = None          # page each chunk starts on, when page_starts is known
+        self.embeddings = None
+        self.document = None
+        self.completed = []        # stage names, in the order they ran
+
+    def detect(self):
+        if self.language is None:
+            self.language = detect_language(self.raw_text)
+            self.completed.append("detect")
+        return self.language
+
+    def translate(self):
+        if self.text is None:
+            language = self.detect()
+            try:
+                self.text, self.language, self.was_translated = translate_document_content(
+                    self.raw_text, self.filename, source_lang=language
+                )
+            except Exception as e:
+                # Index the untranslated text rather than failing the upload
+                print(f"❌ Translation stage error: {str(e)}")
+                self.text, self.language, self.was_translated = self.raw_text, "unknown", False
+            self.completed.append("translate")
+        return self.text
+
+    def chunk(self):
+        if self.chunks is None:
+            text = self.translate()
+            if self.page_starts:
+                self.chunks, starts = chunk_text_with_offsets(text)
+                scale = len(self.raw_text) / len(text) if self.was_translated and text else 1.0
+                self.pages = [page_for_offset(self.page_starts, int(start * scale)) for start in starts]
+            else:
+                self.chunks = chunk_text(text)
+            self.completed.append("chunk")
+        return self.chunks
+
+    def embed(self):
+        if self.embeddings is None:
+            self.embeddings = generate_embeddings(self.chunk())
+            self.completed.append("embed")
+        return self.embeddings
+
+    def assemble(self):
+        if self.document is None:
+            embeddings = self.embed()
+            self.document = {
+                "document_id": str(uuid.uuid4()),
+                **document_fields(self.filename, self.file_type, self.text, self.raw_text,
+                                  self.language, self.was_translated),
+                **chunk_records(self.chunks, embeddings, self.pages),
+            }
+            self.completed.append("assemble")
+        return self.document
+
+    def run(self):
+        print(f"📄 Processing document: {self.filename}")
+        document = self.assemble()
+        print(f"✅ Document processed successfully: {self.filename}")
+        if self.was_translated:
+            print(f"🌍 Document was translated from {self.language} to English")
+        return document
+
+
+class ExtractionError(Exception):
+    """The page source of a StreamingIngest failed; the message is the extractor's."""
+
+
+def _buffered(items, maxsize, name):
+    """
+    Iterate `items` in a thread of its own and yield them from a queue of at
+    most `maxsize`, so the producer blocks instead of running ahead. Errors
+    are re-raised here; closing this generator stops the producer and closes
+    `items`.
+    """
+    handoff = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((end, None))
+        except BaseException as e:
+            put((end, e))
+        finally:
+            if hasattr(items, "close"):
+                items.close()
+
+    threading.Thread(target=produce, name=name, daemon=True).start()
+    try:
+        while True:
+            item, error = handoff.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+class StreamingIngest:
+    """
+    Ingest and store one document from an iterable of its page texts
+    (extract_text.iter_text_pages), running
+
+        extract -> chunk -> embed -> store
+
+    as a pipeline: extraction and chunking each run in a thread, embedding
+    in another (INGEST_EMBED_BATCH chunks per request) and the calling thread
+    writes each embedded batch to the chunks collection. Between the stages
+    sit queues of INGEST_BUFFER items, so memory stays bounded whatever the
+    document's size. The parent document is written last; if any stage fails
+    the rows already written are removed.
+
+    The language is detected on the first pages. English (or undetected)
+    text streams through; anything else is read whole and goes through
+    IngestPipeline, since it has to be translated before it can be chunked.
+
+    run() returns the stored document, or None when there was no text.
+    """
+
+    def __init__(self, filename, file_type, pages, report=None, paged=False):
+        self.filename = filename
+        self.file_type = file_type
+        self.source = iter(pages)
+        self.report = report or (lambda stage: None)
+        self.paged = paged          # tag chunks with their page (PDFs)
+
+        self.page_texts = []        # raw text read so far, page by page
+        self.page_starts = []
+        self.length = 0
+        self.exhausted = False
+        self.language = None
+        self.was_translated = False
+        self.chunk_count = 0
+        self.document = None
+
+    def _read_page(self):
+        try:
+            page_text = next(self.source)
+        except StopIteration:
+            self.exhausted = True
+            return None
+        except Exception as e:
+            raise ExtractionError(str(e)) from e
+        self.page_starts.append(self.length)
+        self.page_texts.append(page_text)
+        self.length += len(page_text)
+        return page_text
+
+    def _pages(self):
+        # Pages read for language detection first, then the rest of the source
+        yield from list(self.page_texts)
+        while self._read_page() is not None:
+            yield self.page_texts[-1]
+        self.report('extracted')
+        self.report('translated')  # nothing to translate
+
+    def _chunk_batches(self, pages):
+        texts, starts = [], []
+        for chunk, start in iter_chunks(pages):
+            texts.append(chunk)
+            starts.append(start)
+            if len(texts) == INGEST_EMBED_BATCH:
+                yield texts, starts
+                texts, starts = [], []
+        if texts:
+            yield texts, starts
+
+    def _embedded(self, batches):
+        for texts, starts in batches:
+            pages = [page_for_offset(self.page_starts, start) for start in starts] if self.paged else None
+            yield texts, pages, generate_embeddings(texts)
+
+    def _stream(self):
+        document_id = str(uuid.uuid4())
+        writer = ChunkWriter(document_id)
+        pages = _buffered(self._pages(), INGEST_BUFFER, "ingest-extract")
+        batches = _buffered(self._chunk_batches(pages), INGEST_BUFFER, "ingest-chunk")
+        embedded = _buffered(self._embedded(batches), INGEST_BUFFER, "ingest-embed")
+        try:
+            for texts, chunk_pages, embeddings in embedded:
+                writer.add(chunk_records(texts, embeddings, chunk_pages))
+                self.chunk_count += len(texts)
+            self.report('embedded')
+
+            raw_text = "".join(self.page_texts)
+            if not raw_text.strip():
+                writer.abort()
+                return None
+            document = {"document_id": document_id,
+                        **document_fields(self.filename, self.file_type, raw_text, raw_text, self.language, False)}
+            writer.finish(document)
+            self.document = document
+            return document
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            embedded.close()
+
+    def _translate_whole(self):
+        while self._read_page() is not None:
+            pass
+        raw_text = "".join(self.page_texts)
+        if not raw_text.strip():
+            return None
+        self.report('extracted')
+
+        pipeline = IngestPipeline(self.filename, self.file_type, raw_text,
+                                  self.page_starts if self.paged else None, language=self.language)
+        pipeline.translate()
+        self.report('translated')
+        pipeline.embed()
+        self.report('embedded')
+        document = pipeline.run()
+        insert_document(document)
+        self.language = pipeline.language
+        self.was_translated = pipeline.was_translated
+        self.chunk_count = len(pipeline.chunks)
+        self.document = document
+        return document
+
+    def run(self):
+        print(f"📄 Processing document: {self.filename}")
+        while self.length < DETECT_CHARS and self._read_page() is not None:
+            pass
+        self.language = detect_language("".join(self.page_texts))
+        if self.language not in ("en", "unknown"):
+            return self._translate_whole()
+
+        self.language = "en"  # as translate_document_content treats undetected text
+        document = self._stream()
+        if document is not None:
+            print(f"✅ Document processed successfully: {self.filename} ({self.chunk_count} chunks, streamed)")
+        return document
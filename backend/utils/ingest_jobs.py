@@ -0,0 +1,346 @@
+"""
+Background ingest jobs for /api/upload.
+
+An upload is spooled to disk and becomes a job with one task per file.
+Worker threads take tasks from a queue and process them. Each file reports
+its progress as it moves through the stages, so clients can poll the
+job's status. When a job's last file finishes, the job's result is built
+from the per-file results.
+
+    queued -> extracted -> translated -> embedded -> stored   (or failed)
+
+The queue is pluggable. InProcessQueue keeps tasks in memory.
+SQLiteQueue keeps them in a local SQLite file, so tasks that were queued
+or in progress when the process stopped run again at startup (resume() when
+a server imports app.py, start() under `python app.py`). Job status
+lives in memory either way; a job recovered after a restart reports only
+the files processed since then.
+
+    INGEST_WORKERS       worker threads (default 2)
+    INGEST_QUEUE         "memory" (default) or "sqlite"
+    INGEST_QUEUE_PATH    SQLite file for the "sqlite" queue (default .cache/ingest_queue.sqlite3)
+    INGEST_SPOOL_DIR     where uploaded files wait for a worker (default .cache/uploads)
+    INGEST_JOB_TTL_S     how long finished jobs stay pollable (default 3600)
+"""
+import json
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_QUEUE = os.getenv("INGEST_QUEUE", "memory").lower()
+INGEST_QUEUE_PATH = os.getenv("INGEST_QUEUE_PATH", os.path.join(".cache", "ingest_queue.sqlite3"))
+INGEST_SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR", os.path.join(".cache", "uploads"))
+INGEST_JOB_TTL_S = float(os.getenv("INGEST_JOB_TTL_S", "3600"))
+
+FILE_STAGES = ("queued", "extracted", "translated", "embedded", "stored")
+
+
+class InProcessQueue:
+    """Tasks in memory; anything still queued is lost when the process stops."""
+
+    persistent = False
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, task):
+        self._queue.put(task)
+
+    def get(self, timeout=None):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def done(self, task):
+        pass
+
+    def recover(self):
+        return []
+
+    def pending(self):
+        return self._queue.qsize()
+
+
+class SQLiteQueue:
+    """
+    Tasks in a local SQLite file. A task is deleted only after done(), so
+    tasks that were claimed but never finished are queued again by recover().
+    """
+
+    persistent = True
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, claimed INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+    def put(self, task):
+        with self._available:
+            self._conn.execute("INSERT INTO tasks (payload) VALUES (?)", (json.dumps(task),))
+            self._available.notify()
+
+    def get(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._available:
+            while True:
+                row = self._conn.execute(
+                    "SELECT id, payload FROM tasks WHERE claimed = 0 ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row:
+                    self._conn.execute("UPDATE tasks SET claimed = 1 WHERE id = ?", (row[0],))
+                    return {**json.loads(row[1]), "_queue_id": row[0]}
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._available.wait(remaining)
+
+    def done(self, task):
+        with self._lock:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task["_queue_id"],))
+
+    def recover(self):
+        """Release tasks claimed by a previous process and return every queued task."""
+        with self._lock:
+            self._conn.execute("UPDATE tasks SET claimed = 0")
+            rows = self._conn.execute("SELECT payload FROM tasks ORDER BY id").fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def pending(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks WHERE claimed = 0").fetchone()[0]
+
+
+def open_queue(kind=None, path=None):
+    """Queue named by INGEST_QUEUE; falls back to memory if the SQLite file can't be opened."""
+    kind = kind or INGEST_QUEUE
+    if kind == "sqlite":
+        try:
+            return SQLiteQueue(path or INGEST_QUEUE_PATH)
+        except Exception as e:
+            print(f"⚠️ Ingest queue at {path or INGEST_QUEUE_PATH} unavailable, using memory: {str(e)}")
+    return InProcessQueue()
+
+
+class IngestJobManager:
+    """
+    Runs upload jobs on a pool of worker threads.
+
+    `process_file(filename, content_type, path, report, job_size)` handles one
+    spooled file, which is deleted afterwards; job_size is the number of files
+    in its job. It calls `report(stage)` as the file moves through FILE_STAGES and
+    returns a per-file result. `finish_job(results)` turns the results, in
+    upload order, into (http_status, body) for the finished job. A task whose
+    processing raises is recorded as {"filename", "error"}.
+    """
+
+    def __init__(self, process_file, finish_job, task_queue=None, workers=None, spool_dir=None):
+        self.process_file = process_file
+        self.finish_job = finish_job
+        self.queue = task_queue or open_queue()
+        self.workers = workers or INGEST_WORKERS
+        self.spool_dir = spool_dir or INGEST_SPOOL_DIR
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+        self._processed = 0
+        self._failed = 0
+
+    def start(self):
+        """Start the workers (once) and re-queue tasks recovered from a persistent queue."""
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            # Tasks left over from a previous process get their job records back
+            recovered = {}
+            for task in self.queue.recover():
+                job = recovered.get(task["job_id"]) or self._new_job(task["job_id"], task["total"])
+                recovered[task["job_id"]] = job
+                job["files"][task["index"]] = {"filename": task["filename"], "stage": "queued", "error": None}
+            for job in recovered.values():
+                job["remaining"] = sum(f is not None for f in job["files"])
+            self._threads = [
+                threading.Thread(target=self._work, name=f"ingest-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+        print(f"🧵 Started {self.workers} ingest worker(s)")
+
+    def stop(self, timeout=5):
+        """Stop the workers after their current task; queued tasks stay in the queue."""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._lock:
+            self._threads = []
+            self._stopping.clear()
+
+    def resume(self):
+        """Start the workers now if the queue may hold tasks from a previous process."""
+        # Extraction workers re-import the main script (python app.py) before they have a
+        # parent_process(), but already carry their own name; they must not claim tasks
+        if getattr(self.queue, "persistent", False) and multiprocessing.current_process().name == "MainProcess":
+            self.start()
+
+    def _new_job(self, job_id, total):
+        now = datetime.utcnow().isoformat()
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "files": [None] * total,
+            "results": [None] * total,
+            "remaining": total,
+            "http_status": None,
+            "result": None,
+            "finished_at": None,
+        }
+        self._jobs[job_id] = job
+        return job
+
+    def spool(self, file_storage):
+        """Write an uploaded file to the spool directory without reading it into memory."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"{uuid.uuid4()}.upload")
+        file_storage.save(path)
+        return path
+
+    def submit(self, files):
+        """Queue `files` as one job: a list of (filename, content_type, spooled path). Returns the job id."""
+        self.start()
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._expire()
+            job = self._new_job(job_id, len(files))
+            for index, (filename, content_type, path) in enumerate(files):
+                job["files"][index] = {"filename": filename, "stage": "queued", "error": None}
+        for index, (filename, content_type, path) in enumerate(files):
+            self.queue.put({
+                "job_id": job_id, "index": index, "total": len(files),
+                "filename": filename, "content_type": content_type, "path": path,
+            })
+        print(f"📥 Queued ingest job {job_id} with {len(files)} file(s)")
+        return job_id
+
+    def _report(self, task, stage, error=None):
+        with self._lock:
+            job = self._jobs.get(task["job_id"])
+            if job is None:
+                return
+            job["files"][task["index"]].update(stage=stage, error=error)
+            job["updated_at"] = datetime.utcnow().isoformat()
+            if job["status"] == "queued":
+                job["status"] = "running"
+
+    def _work(self):
+        while not self._stopping.is_set():
+            task = self.queue.get(timeout=0.2)
+            if task is None:
+                continue
+            try:
+                self._run(task)
+            finally:
+                self.queue.done(task)
+
+    def _run(self, task):
+        self._report(task, "queued")
+        try:
+            result = self.process_file(
+                task["filename"], task["content_type"], task["path"],
+                lambda stage: self._report(task, stage), task["total"]
+            )
+        except Exception as e:
+            print(f"❌ Ingest task for {task['filename']} failed: {str(e)}")
+            result = {"filename": task["filename"], "error": f"Error processing {task['filename']}: {str(e)}"}
+        finally:
+            try:
+                os.remove(task["path"])
+            except OSError:
+                pass
+
+        failed = bool(result.get("error"))
+        if failed:
+            self._report(task, "failed", result["error"])
+        self._finish_task(task, result, failed)
+
+    def _finish_task(self, task, result, failed):
+        with self._lock:
+            self._processed += 1
+            self._failed += failed
+            job = self._jobs.get(task["job_id"])
+            if job is None:
+                return
+            job["results"][task["index"]] = result
+            job["remaining"] -= 1
+            if job["remaining"] > 0:
+                return
+            results = [r for r in job["results"] if r is not None]
+
+        # Build the final response outside the lock; it may query MongoDB
+        try:
+            http_status, body = self.finish_job(results)
+        except Exception as e:
+            print(f"❌ Finishing ingest job {task['job_id']} failed: {str(e)}")
+            http_status, body = 500, {"error": f"Upload failed: {str(e)}"}
+
+        with self._lock:
+            job["http_status"] = http_status
+            job["result"] = body
+            job["status"] = "completed" if http_status < 400 else "failed"
+            job["finished_at"] = time.monotonic()
+            job["updated_at"] = datetime.utcnow().isoformat()
+        print(f"✅ Ingest job {task['job_id']} {job['status']}")
+
+    def _expire(self):
+        cutoff = time.monotonic() - INGEST_JOB_TTL_S
+        for job_id in [j for j, job in self._jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self._jobs[job_id]
+
+    def status(self, job_id):
+        """Job status for polling, or None for an unknown (or expired) job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            files = [dict(f) for f in job["files"] if f is not None]
+            return {
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "created_at": job["created_at"],
+                "updated_at": job["updated_at"],
+                "files": files,
+                "stored": sum(f["stage"] == "stored" for f in files),
+                "failed": sum(f["stage"] == "failed" for f in files),
+                "total": len(files),
+                "result": job["result"],
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue": type(self.queue).__name__,
+                "workers": self.workers,
+                "pending_tasks": self.queue.pending(),
+                "active_jobs": sum(job["status"] in ("queued", "running") for job in self._jobs.values()),
+                "processed_files": self._processed,
+                "failed_files": self._failed,
+            }
@@ -0,0 +1,158 @@
+"""
+Local intent classifier for the query router.
+
+Routes a query to one of the four intents used by intent_router
+(1 RAG, 2 summarization, 3 comparison, 4 RAG + source trace) without a Groq
+round trip. A TF-IDF nearest-centroid model over word unigrams and bigrams,
+trained on the labelled examples below, is combined with the keyword rules
+from detect_intent_keywords. classify() returns (intent, confidence); the
+router escalates to the LLM when confidence is below
+INTENT_LLM_ESCALATION_THRESHOLD.
+
+Measure accuracy against the labelled set with `python eval_intent.py`.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+TRAINING_EXAMPLES = {
+    1: [
+        "what is the main argument of the paper",
+        "how does the proposed method work",
+        "explain the methodology used",
+        "what does the author say about climate change",
+        "who is responsible for the maintenance",
+        "when is the deadline for payment",
+        "what are the requirements for eligibility",
+        "why did the project fail",
+        "define the term used in section two",
+        "what is the notice period in the contract",
+        "how much does the service cost",
+        "what results did the experiment show",
+        "describe the architecture of the system",
+        "is there a warranty",
+        "what happens if the tenant breaks the lease",
+        "list the side effects mentioned",
+        "tell me about the conclusions",
+        "what are the risks of the treatment",
+        "why was the decision made",
+        "is it allowed to terminate early",
+    ],
+    2: [
+        "summarize this document",
+        "summarise the report",
+        "give me a summary",
+        "provide a comprehensive summary of this document with detailed analysis key points and insights",
+        "what are the key points",
+        "what are the main points of the document",
+        "give me an overview",
+        "tldr",
+        "what is the gist of this",
+        "brief summary of the paper",
+        "main takeaways from the report",
+        "highlight the most important points",
+        "condense this into a few sentences",
+        "summaries of the uploaded files",
+    ],
+    3: [
+        "compare the two documents",
+        "what is the difference between the documents",
+        "how do these reports differ",
+        "contrast the first and second contract",
+        "document a versus document b",
+        "compare pricing across the proposals",
+        "create a comprehensive summary comparing all uploaded documents analyze similarities differences",
+        "what are the similarities between the papers",
+        "which proposal is better",
+        "differences in payment terms between the contracts",
+        "compare and contrast the findings",
+        "how does the first report differ from the second",
+    ],
+    4: [
+        "where in the document does it say that",
+        "cite the source for this answer",
+        "which page mentions the refund policy",
+        "show me the exact passage about termination",
+        "quote the section that defines liability",
+        "which document says the deadline is in march",
+        "give the answer with references",
+        "where is this mentioned",
+        "show the source of the information",
+        "with citations explain the results",
+        "point me to the paragraph about data retention",
+        "which file contains the budget figures",
+    ],
+}
+
+# Token-level keyword rules; a hit is taken as certain.
+# Comparison wins over summary, as in detect_intent_keywords.
+KEYWORD_RULES = [
+    (3, {"compare", "comparison", "comparing", "difference", "differences", "versus", "vs", "contrast"}),
+    (4, {"cite", "citation", "citations", "quote"}),
+    (2, {"summarize", "summary", "overview", "gist", "summarise", "summaries", "tldr"}),
+]
+KEYWORD_PHRASES = [
+    (2, ("main points", "key points")),
+    (4, ("which page", "where in the document", "exact passage")),
+]
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentClassifier:
+    def __init__(self, examples=TRAINING_EXAMPLES):
+        self.labels = sorted(examples)
+        documents = [(label, tokenize(text)) for label in self.labels for text in examples[label]]
+
+        doc_freq = Counter(term for _, terms in documents for term in set(terms))
+        self.vocabulary = {term: i for i, term in enumerate(sorted(doc_freq))}
+        self.idf = np.array([math.log((1 + len(documents)) / (1 + doc_freq[term])) + 1
+                             for term in sorted(doc_freq)], dtype=np.float32)
+
+        centroids = np.zeros((len(self.labels), len(self.vocabulary)), dtype=np.float32)
+        for label, terms in documents:
+            centroids[self.labels.index(label)] += self._vector(terms)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.maximum(norms, 1e-12)
+
+    def _vector(self, terms):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term, count in Counter(terms).items():
+            index = self.vocabulary.get(term)
+            if index is not None:
+                vector[index] = (1 + math.log(count)) * self.idf[index]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def scores(self, query):
+        """Cosine similarity of the query to each intent centroid, keyed by intent."""
+        similarities = self.centroids @ self._vector(tokenize(query))
+        return dict(zip(self.labels, similarities.tolist()))
+
+    def classify(self, query):
+        """Return (intent, confidence in [0, 1])."""
+        lowered = query.lower()
+        words = set(_TOKEN.findall(lowered))
+        for intent, keywords in KEYWORD_RULES:
+            if words & keywords:
+                return intent, 1.0
+        for intent, phrases in KEYWORD_PHRASES:
+            if any(phrase in lowered for phrase in phrases):
+                return intent, 1.0
+
+        ranked = sorted(self.scores(query).items(), key=lambda item: item[1], reverse=True)
+        (best, best_score), (_, runner_up) = ranked[0], ranked[1]
+        if best_score <= 0:
+            # No known vocabulary: most likely a plain question, but let the LLM decide
+            return 1, 0.0
+        return best, (best_score - runner_up) / best_score
+
+
+classifier = IntentClassifier()
@@ -3,8 +3,54 @@ from utils.summarizer import summarize_documents
 from utils.comparison import compare_documents
 from utils.groq_api import groq_fast_generate, test_groq_connection
 from utils.translator import translate_query, detect_language
+from utils.intent_classifier import classifier
+from collections import OrderedDict
+import os
+import re
+import threading
+import time
 import requests
 
+# Local classifier decisions below this confidence are sent to Groq instead
+# (0 = never call Groq for routing, above 1 = always call Groq). The default is
+# fitted on the "tune" rows of intent_eval.jsonl (`python eval_intent.py --fit`).
+INTENT_LLM_ESCALATION_THRESHOLD = float(os.getenv("INTENT_LLM_ESCALATION_THRESHOLD", "0.32"))
+
+# Routing decisions are cached by normalised (translated) query so repeated
+# phrasings and the frontend's canned prompts skip the classifier and Groq.
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "2048"))
+INTENT_CACHE_TTL_S = float(os.getenv("INTENT_CACHE_TTL_S", "86400"))
+
+_route_lock = threading.Lock()
+_route_counts = {"local": 0, "llm": 0, "cache_hits": 0, "cache_misses": 0}
+_intent_cache = OrderedDict()  # normalised query -> (intent, expires_at)
+
+def normalize_query(user_query):
+    return " ".join(user_query.lower().split())
+
+def _cached_intent(key):
+    with _route_lock:
+        entry = _intent_cache.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            _intent_cache.move_to_end(key)
+            _route_counts["cache_hits"] += 1
+            return entry[0]
+        if entry is not None:
+            del _intent_cache[key]
+        _route_counts["cache_misses"] += 1
+        return None
+
+def _cache_intent(key, intent):
+    with _route_lock:
+        _intent_cache[key] = (intent, time.monotonic() + INTENT_CACHE_TTL_S)
+        _intent_cache.move_to_end(key)
+        while len(_intent_cache) > INTENT_CACHE_SIZE:
+            _intent_cache.popitem(last=False)
+
+def intent_routing_stats():
+    with _route_lock:
+        return {**_route_counts, "cache_size": len(_intent_cache)}
+
 # Intent Routing Prompt
 def route_query_prompt(user_query):
     return f"""
@@ -31,8 +77,38 @@ User Query:
 Which task (1, 2, 3, or 4) should be activated? Respond ONLY with a single number (1, 2, 3, or 4).
 """
 
-# Intent Detection using Groq API
+# Intent Detection: cached decision, then the local classifier, then Groq only when it is unsure
 def detect_intent(user_query):
+    key = normalize_query(user_query)
+    intent = _cached_intent(key)
+    if intent is not None:
+        print(f"💾 Cached intent: {intent}")
+        return intent
+    
+    intent, confidence = classifier.classify(user_query)
+    if confidence >= INTENT_LLM_ESCALATION_THRESHOLD:
+        with _route_lock:
+            _route_counts["local"] += 1
+        print(f"🎯 Local intent classifier: {intent} (confidence: {confidence:.2f})")
+        _cache_intent(key, intent)
+        return intent
+    
+    print(f"🤔 Local intent classifier unsure ({intent}, confidence: {confidence:.2f}), asking Groq...")
+    with _route_lock:
+        _route_counts["llm"] += 1
+    intent = detect_intent_llm(user_query, fallback=False)
+    if intent is None:
+        # Groq failed: answer from keywords but leave the query uncached so it is retried
+        return detect_intent_keywords(user_query)
+    _cache_intent(key, intent)
+    return intent
+
+# Intent Detection using Groq API
+def detect_intent_llm(user_query, fallback=True):
+    """
+    Ask Groq for the intent number. On failure, return the keyword-based
+    intent, or None when fallback is False.
+    """
     try:
         prompt = route_query_prompt(user_query)
         
@@ -43,7 +119,6 @@ def detect_intent(user_query):
             print(f"🤖 Groq API intent response: '{response_text}'")
             
             # Try to extract just the number from the response
-            import re
             number_match = re.search(r'\b([1-4])\b', response_text)
             if number_match:
                 intent_number = int(number_match.group(1))
@@ -51,14 +126,13 @@ def detect_intent(user_query):
                 return intent_number
             else:
                 print(f"❌ No valid intent number found in response")
-                return detect_intent_keywords(user_query)
         else:
             print("❌ Groq API intent detection failed, using keyword fallback...")
-            return detect_intent_keywords(user_query)
             
     except Exception as e:
         print(f"Groq API intent detection failed: {str(e)}")
-        return detect_intent_keywords(user_query)
+    
+    return detect_intent_keywords(user_query) if fallback else None
 
 def detect_intent_keywords(user_query):
     """Simple keyword-based intent detection fallback"""
@@ -80,24 +154,30 @@ def detect_intent_keywords(user_query):
     print(f"🎯 Keyword detection: No specific keywords found, defaulting to RAG")
     return 1
 
+def prepare_query(user_query, query_lang=None):
+    """
+    Detect the query language (unless the caller already did) and translate to English if needed.
+    Returns (processing_query, query_lang, was_translated)
+    """
+    query_lang = query_lang or detect_language(user_query)
+    
+    # Translate query to English for better processing
+    if query_lang != 'en' and query_lang != 'unknown':
+        print(f"🌍 Query is in {query_lang}, translating to English...")
+        processing_query, detected_lang = translate_query(user_query, 'en', source_lang=query_lang)
+        print(f"🌍 Query translated: '{user_query}' → '{processing_query}'")
+        return processing_query, query_lang, True
+    
+    print(f"✅ Query is in English, no translation needed")
+    return user_query, query_lang, False
+
 # Master Intent Router Function with Translation Support
-def handle_query(user_query, document_ids):
+def handle_query(user_query, document_ids, query_lang=None):
     try:
         print(f"🎯 Processing query: '{user_query}'")
         
-        # Detect query language and translate if needed
         original_query = user_query
-        query_lang = detect_language(user_query)
-        
-        # Translate query to English for better processing
-        if query_lang != 'en' and query_lang != 'unknown':
-            print(f"🌍 Query is in {query_lang}, translating to English...")
-            translated_query, detected_lang = translate_query(user_query, 'en')
-            processing_query = translated_query
-            print(f"🌍 Query translated: '{original_query}' → '{processing_query}'")
-        else:
-            processing_query = user_query
-            print(f"✅ Query is in English, no translation needed")
+        processing_query, query_lang, was_translated = prepare_query(user_query, query_lang)
         
         # Detect intent using the translated query
         print(f"🎯 Detecting intent for query: '{processing_query}'")
@@ -126,7 +206,7 @@ def handle_query(user_query, document_ids):
             result = {"answer": "[Error] Couldn't determine the intent of your query."}
         
         # Add translation info to response if query was translated
-        if query_lang != 'en' and query_lang != 'unknown':
+        if was_translated:
             if isinstance(result, dict) and 'answer' in result:
                 result['translation_info'] = {
                     'original_query': original_query,
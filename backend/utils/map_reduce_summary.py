@@ -0,0 +1,118 @@
+"""
+Hierarchical (map-reduce) condensing of long documents for summarization.
+
+condense(text) returns text of at most SUMMARY_GROUP_CHARS that covers the
+whole input. Long text is split into sections (paragraph/sentence aware),
+each section is summarized into notes by Groq in parallel, and the notes are
+grouped SUMMARY_FAN_IN at a time and summarized again until they fit. Depth,
+and so latency, grows with log_FAN_IN(sections); every call sees a bounded
+prompt, which keeps clear of timeouts and per-request token limits.
+
+Section notes are cached by (model, prompt version, section text) in a
+PersistentLRUCache, so regenerating a summary, or summarizing a re-uploaded
+document, only pays for sections that changed.
+
+    SUMMARY_GROUP_CHARS         section size and final budget (default 6000)
+    SUMMARY_FAN_IN              notes combined per reduce step (default 4)
+    SUMMARY_CONCURRENCY         sections summarized at once (default 3)
+    SUMMARY_CACHE_PATH          SQLite file for section notes (default .cache/summaries.sqlite3; empty disables)
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .groq_api import MODEL_NAME, groq_summarize_generate
+from .persistent_cache import content_key, normalize_text, open_cache
+from .translator import split_text_for_translation
+
+SUMMARY_GROUP_CHARS = int(os.getenv("SUMMARY_GROUP_CHARS", "6000"))
+SUMMARY_FAN_IN = max(2, int(os.getenv("SUMMARY_FAN_IN", "4")))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "3"))
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(".cache", "summaries.sqlite3"))
+
+# Bump when section_prompt() changes so cached notes are not reused
+SECTION_PROMPT_VERSION = "1"
+
+# Characters of a section kept as its "notes" when Groq fails for it
+FALLBACK_NOTE_CHARS = 1000
+
+partial_cache = open_cache("Summary", SUMMARY_CACHE_PATH, 512, 64) if SUMMARY_CACHE_PATH else None
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY, thread_name_prefix="summarize")
+    return _executor
+
+
+def section_prompt(section):
+    return f"""Summarize the following part of a longer document as concise notes.
+
+- Use 5-8 bullet points
+- Keep names, numbers, dates, findings and conclusions
+- Do not add anything that is not in the text
+
+Text:
+{section}
+
+Notes:"""
+
+
+def summarize_section(section):
+    """Notes for one section, from the cache when possible."""
+    key = content_key(MODEL_NAME, SECTION_PROMPT_VERSION, normalize_text(section))
+    if partial_cache is not None:
+        cached = partial_cache.get(key)
+        if cached is not None:
+            return cached.decode("utf-8")
+
+    try:
+        notes = groq_summarize_generate(section_prompt(section), max_tokens=300, temperature=0.2, timeout=60)
+    except Exception as e:
+        print(f"❌ Section summary error: {str(e)}")
+        notes = None
+
+    if not notes:
+        # Keep the section's opening so the reduce step still covers it; not cached
+        return section[:FALLBACK_NOTE_CHARS]
+
+    notes = notes.strip()
+    if partial_cache is not None:
+        partial_cache.put(key, notes.encode("utf-8"))
+    return notes
+
+
+def _summarize_all(sections):
+    if len(sections) > 1 and SUMMARY_CONCURRENCY > 1:
+        # map() returns notes in section order
+        return list(_get_executor().map(summarize_section, sections))
+    return [summarize_section(section) for section in sections]
+
+
+def condense(text, max_chars=None):
+    """Return text of at most `max_chars` characters that covers all of `text`."""
+    max_chars = max_chars or SUMMARY_GROUP_CHARS
+    if len(text) <= max_chars:
+        return text
+
+    sections = split_text_for_translation(text, max_chars)
+    level = 0
+    while True:
+        print(f"📚 Summarizing {len(sections)} section(s) at level {level}")
+        notes = _summarize_all(sections)
+        combined = "\n\n".join(notes)
+        if len(combined) <= max_chars or len(notes) == 1:
+            return combined[:max_chars]
+        # Each reduce step cuts the number of sections by SUMMARY_FAN_IN
+        sections = ["\n\n".join(notes[i:i + SUMMARY_FAN_IN]) for i in range(0, len(notes), SUMMARY_FAN_IN)]
+        level += 1
+
+
+def partial_cache_stats():
+    return partial_cache.stats() if partial_cache is not None else {"enabled": False}
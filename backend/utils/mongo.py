@@ -0,0 +1,172 @@
+"""
+Shared MongoDB client and collection registry.
+
+Every module gets its collections from here, so the process has one
+MongoClient (one connection pool, one set of monitor threads) created on
+first use. Pool behaviour is configured from the environment:
+
+    MONGO_MAX_POOL_SIZE                 (default 10; size it to waitress threads + background work)
+    MONGO_MIN_POOL_SIZE                 (default 0)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS   (default 5000)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS         (default: wait indefinitely for a free connection)
+    MONGO_READ_PREFERENCE               (primary, primaryPreferred, secondary, secondaryPreferred, nearest)
+
+pool_stats() reports checked-out connections and checkout wait times.
+"""
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, monitoring
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI")
+DATABASE_NAME = os.getenv("DATABASE_NAME")
+COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+CHUNKS_COLLECTION_NAME = os.getenv("CHUNKS_COLLECTION_NAME", f"{COLLECTION_NAME}_chunks")
+
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "10"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+
+# Logical name -> collection name in DATABASE_NAME
+COLLECTION_NAMES = {
+    "documents": COLLECTION_NAME,
+    "chunks": CHUNKS_COLLECTION_NAME,
+}
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts pool activity so the pool can be sized against real load."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _wait_ms(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait = self._wait_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.total_wait_ms += wait
+            self.max_wait_ms = max(self.max_wait_ms, wait)
+
+    def connection_check_out_failed(self, event):
+        self._wait_ms()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    # Required by the interface; nothing to count
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+
+pool_listener = PoolStatsListener()
+
+_client = None
+_client_lock = threading.Lock()
+_collections = {}
+
+
+def get_client():
+    """Return the process-wide MongoClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                options = {
+                    "maxPoolSize": MONGO_MAX_POOL_SIZE,
+                    "minPoolSize": MONGO_MIN_POOL_SIZE,
+                    "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    "readPreference": MONGO_READ_PREFERENCE,
+                    "event_listeners": [pool_listener],
+                }
+                if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+                    options["waitQueueTimeoutMS"] = int(MONGO_WAIT_QUEUE_TIMEOUT_MS)
+                _client = MongoClient(MONGO_URI, **options)
+                print(f"🔌 MongoDB client created (maxPoolSize={MONGO_MAX_POOL_SIZE}, "
+                      f"readPreference={MONGO_READ_PREFERENCE})")
+    return _client
+
+
+def get_database():
+    return get_client()[DATABASE_NAME]
+
+
+def get_collection(name="documents"):
+    """Return a registered collection by logical name ("documents", "chunks")."""
+    coll = _collections.get(name)
+    if coll is None:
+        coll = get_database()[COLLECTION_NAMES.get(name, name)]
+        _collections[name] = coll
+    return coll
+
+
+def pool_stats():
+    return {
+        "config": {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "server_selection_timeout_ms": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "wait_queue_timeout_ms": int(MONGO_WAIT_QUEUE_TIMEOUT_MS) if MONGO_WAIT_QUEUE_TIMEOUT_MS else None,
+            "read_preference": MONGO_READ_PREFERENCE,
+        },
+        "client_created": _client is not None,
+        **pool_listener.snapshot(),
+    }
@@ -0,0 +1,173 @@
+"""
+Two-tier key/value cache: an in-memory LRU in front of a local SQLite file.
+
+Values are bytes. The memory tier holds the `memory_items` most recently used
+entries; the SQLite tier survives restarts and is trimmed, least recently
+used first, once it grows past `max_disk_mb`. Both tiers are safe to use from
+multiple threads.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Normalise text for cache keys: NFC, collapsed whitespace, stripped."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def content_key(*parts):
+    """Stable hash of the given string parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class PersistentLRUCache:
+    def __init__(self, name, path, memory_items=2048, max_disk_mb=256):
+        self.name = name
+        self.path = path
+        self.memory_items = memory_items
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._db.commit()
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are cached."""
+        found = {}
+        with self._lock:
+            pending = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    pending.append(key)
+
+            for start in range(0, len(pending), 500):
+                batch = pending[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                if rows:
+                    now = time.time()
+                    self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                         [(now, key) for key, _ in rows])
+                    self._db.commit()
+                for key, value in rows:
+                    found[key] = value
+                    self._remember(key, value)
+                    self.disk_hits += 1
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Store an iterable of (key, value) pairs."""
+        items = list({key: bytes(value) for key, value in items}.items())
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value)
+            replaced = 0
+            for start in range(0, len(items), 500):
+                batch = [key for key, _ in items[start:start + 500]]
+                replaced += self._db.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchone()[0]
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                [(key, value, len(value), now) for key, value in items]
+            )
+            self._disk_bytes += sum(len(value) for _, value in items) - replaced
+            if self._disk_bytes > self.max_disk_bytes:
+                self._trim()
+            self._db.commit()
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def _trim(self):
+        """Drop least recently used rows until the file is back under 90% of the cap."""
+        target = int(self.max_disk_bytes * 0.9)
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            doomed.append((key,))
+            self._disk_bytes -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        for (key,) in doomed:
+            self._memory.pop(key, None)
+        self.evictions += len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._disk_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def open_cache(name, path, memory_items, max_disk_mb):
+    """Open a PersistentLRUCache, or return None (caching disabled) if the file cannot be used."""
+    try:
+        return PersistentLRUCache(name, path, memory_items=memory_items, max_disk_mb=max_disk_mb)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ {name} cache disabled: {str(e)}")
+        return None
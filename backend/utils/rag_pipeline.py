@@ -1,32 +1,65 @@
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 import requests
 import numpy as np
 from .groq_api import groq_generate, test_groq_connection
 from .embeddings import embed_texts
+from .similarity import build_embedding_matrix, normalize_rows, score_matrices
+from .embedding_codec import unpack_embeddings
+from .embedding_cache import DocumentEntry, matrix_cache
+from .document_store import find_documents
 
 load_dotenv()
 
-# MongoDB setup using env vars
-MONGO_URI = os.getenv("MONGO_URI")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
-COLLECTION_NAME = os.getenv("COLLECTION_NAME")
-
-client = MongoClient(MONGO_URI)
-db = client[DATABASE_NAME]
-collection = db[COLLECTION_NAME]
+def load_document_entries(document_ids):
+    """
+    Return a DocumentEntry (normalised embedding matrix, chunk texts, filename)
+    for each of document_ids, fetching only cache misses from MongoDB.
+    """
+    document_ids = list(dict.fromkeys(document_ids))
+    entries = {}
+    missing = []
+    for doc_id in document_ids:
+        entry = matrix_cache.get(doc_id)
+        if entry is not None:
+            entries[doc_id] = entry
+        else:
+            missing.append(doc_id)
+
+    if missing:
+        # Taken before the read so an invalidation during it keeps stale vectors out of the cache
+        generation = matrix_cache.generation()
+        for doc in find_documents(missing, "vectors"):
+            chunks = doc.get('chunks', [])
+            if 'embedding_matrix' in doc:
+                # Packed binary storage: decode without building Python floats
+                matrix = normalize_rows(unpack_embeddings(doc['embedding_matrix']).astype(np.float32))
+                kept = range(matrix.shape[0])
+            else:
+                matrix, kept = build_embedding_matrix([chunk.get('embedding', []) for chunk in chunks])
+            entry = DocumentEntry(
+                document_id=doc.get('document_id', 'Unknown'),
+                filename=doc.get('filename', 'Unknown'),
+                texts=[chunks[i].get('text', '') for i in kept],
+                matrix=matrix,
+                pages=[chunks[i].get('page') for i in kept]
+            )
+            matrix_cache.put(entry, generation)
+            entries[entry.document_id] = entry
+
+    print(f"🗃️ Embedding cache: {len(document_ids) - len(missing)} hit(s), {len(missing)} fetched from MongoDB")
+    return [entries[doc_id] for doc_id in document_ids if doc_id in entries]
 
 def get_similar_chunks(query, document_ids, top_k=3):
     try:
         print(f"🔎 Searching for documents: {document_ids}")
         query_embedding = embed_texts(query)
 
-        # Get all documents matching the given document_ids
-        matching_docs = list(collection.find({"document_id": {"$in": document_ids}}))
-        print(f"📄 Found {len(matching_docs)} matching documents")
+        # Get all documents matching the given document_ids (cached matrices first)
+        doc_entries = load_document_entries(document_ids)
+        print(f"📄 Found {len(doc_entries)} matching documents")
 
-        if not matching_docs:
+        if not doc_entries:
             return []
 
         # 🔧 UPDATED: Set much lower thresholds to catch resume/short text matches
@@ -40,48 +73,25 @@ def get_similar_chunks(query, document_ids, top_k=3):
 
         print(f"🎯 Using similarity threshold: {similarity_threshold:.2f} (query length: {query_words} words)")
 
-        # Collect all chunks
-        all_chunks = []
-        for doc in matching_docs:
-            if 'chunks' in doc:
-                for chunk in doc['chunks']:
-                    all_chunks.append({
-                        'text': chunk.get('text', ''),
-                        'embedding': chunk.get('embedding', []),
-                        'filename': doc.get('filename', 'Unknown'),
-                        'document_id': doc.get('document_id', 'Unknown')
-                    })
+        print(f"📦 Total chunks collected: {sum(e.matrix.shape[0] for e in doc_entries)}")
 
-        print(f"📦 Total chunks collected: {len(all_chunks)}")
-
-        # Calculate cosine similarity manually
+        # Score every chunk with one matrix-vector product per document
+        ranked = score_matrices([e.matrix for e in doc_entries], query_embedding, top_k)
         similarities = []
-        query_emb = np.array(query_embedding)
-
-        for chunk in all_chunks:
-            if chunk['embedding']:
-                try:
-                    chunk_emb = np.array(chunk['embedding'])
-                    # Calculate cosine similarity
-                    sim = np.dot(chunk_emb, query_emb) / (np.linalg.norm(chunk_emb) * np.linalg.norm(query_emb))
-                    
-                    # Store all valid similarities
-                    similarities.append((sim, chunk))
-                except Exception as e:
-                    print(f"⚠️ Error calculating similarity: {e}")
-                    continue
-
-        # Sort all chunks by similarity (highest first)
-        similarities.sort(key=lambda x: x[0], reverse=True)
+        for sim, doc_idx, row in ranked:
+            entry = doc_entries[doc_idx]
+            similarities.append((sim, {
+                'text': entry.texts[row],
+                'filename': entry.filename,
+                'document_id': entry.document_id,
+                'page': entry.pages[row] if entry.pages else None
+            }))
 
         # Filter: First try to get only chunks that pass the threshold
         top_chunks = [(sim, chunk) for sim, chunk in similarities if sim > similarity_threshold]
         
         print(f"✅ Chunks passing threshold ({similarity_threshold}): {len(top_chunks)}")
 
-        # Limit to top K
-        top_chunks = top_chunks[:top_k]
-
         # 🔧 UPDATED FALLBACK: If strict filtering returns nothing, force return the top results
         if not top_chunks and len(similarities) > 0:
             print("⚠️ No chunks met the threshold. Returning top 3 matches anyway to avoid empty response.")
@@ -96,6 +106,7 @@ def get_similar_chunks(query, document_ids, top_k=3):
             'chunk': chunk['text'],
             'filename': chunk['filename'],
             'document_id': chunk['document_id'],
+            'page': chunk['page'],
             'similarity': float(sim)
         } for sim, chunk in top_chunks]
 
@@ -108,7 +119,7 @@ def get_similar_chunks(query, document_ids, top_k=3):
 def get_fallback_chunks(document_ids, top_k=3):
     """Fallback method when vector search fails - returns first few chunks"""
     try:
-        matching_docs = list(collection.find({"document_id": {"$in": document_ids}}))
+        matching_docs = find_documents(document_ids, "chunks", max_chunks=2)
         
         if not matching_docs:
             return []
@@ -130,44 +141,36 @@ def get_fallback_chunks(document_ids, top_k=3):
         print(f"Error in fallback chunks: {str(e)}")
         return []
 
-def handle_rag_query(user_query, document_ids, with_trace=False):
-    try:
-        results = get_similar_chunks(user_query, document_ids)
-        
-        if not results:
-            return {
-                "answer": f"I couldn't find any relevant information in the uploaded documents to answer: '{user_query}'. Please try rephrasing your question or ask about a different topic."
-            }
-        
-        # Group chunks by document for better context
-        chunks_by_doc = {}
-        doc_names = {}
-        
-        # Get document names from MongoDB
-        for doc_id in document_ids:
-            doc = collection.find_one({"document_id": doc_id})
-            if doc:
-                doc_names[doc_id] = doc.get("filename", f"Document {doc_id}")
-        
-        for r in results:
-            doc_id = r.get("document_id", "unknown")
-            if doc_id not in chunks_by_doc:
-                chunks_by_doc[doc_id] = []
-            chunks_by_doc[doc_id].append(r["chunk"])
-        
-        # Create structured context with document separation
-        context_parts = []
-        for doc_id, chunks in chunks_by_doc.items():
-            doc_name = doc_names.get(doc_id, f"Document {doc_id}")
-            doc_context = f"\n--- Document: {doc_name} ---\n"
-            doc_context += "\n".join(chunks)
-            context_parts.append(doc_context)
-        
-        context = "\n\n".join(context_parts)
-
-        # Enhanced prompt for multi-document analysis
-        if len(chunks_by_doc) > 1:
-            prompt = f"""You are an expert multi-document analyst. You are comparing {len(chunks_by_doc)} documents.
+def no_results_answer(user_query):
+    return f"I couldn't find any relevant information in the uploaded documents to answer: '{user_query}'. Please try rephrasing your question or ask about a different topic."
+
+def build_rag_prompt(user_query, results):
+    """Prompt answering user_query from the chunks returned by get_similar_chunks"""
+    # Group chunks by document for better context
+    chunks_by_doc = {}
+    doc_names = {}
+    
+    # Retrieval already carries each chunk's filename; no extra DB round trips
+    for r in results:
+        doc_id = r.get("document_id", "unknown")
+        doc_names.setdefault(doc_id, r.get("filename") or f"Document {doc_id}")
+        if doc_id not in chunks_by_doc:
+            chunks_by_doc[doc_id] = []
+        chunks_by_doc[doc_id].append(r["chunk"])
+    
+    # Create structured context with document separation
+    context_parts = []
+    for doc_id, chunks in chunks_by_doc.items():
+        doc_name = doc_names.get(doc_id, f"Document {doc_id}")
+        doc_context = f"\n--- Document: {doc_name} ---\n"
+        doc_context += "\n".join(chunks)
+        context_parts.append(doc_context)
+    
+    context = "\n\n".join(context_parts)
+
+    # Enhanced prompt for multi-document analysis
+    if len(chunks_by_doc) > 1:
+        prompt = f"""You are an expert multi-document analyst. You are comparing {len(chunks_by_doc)} documents.
 
 IMPORTANT INSTRUCTIONS:
 - Analyze and compare information from ALL documents
@@ -183,8 +186,8 @@ Context from multiple documents:
 User Question: {user_query}
 
 Please provide a comprehensive analysis that compares and synthesizes information from all relevant documents:"""
-        else:
-            prompt = f"""You are an expert document analyst. Answer the user's question based ONLY on the context provided below.
+    else:
+        prompt = f"""You are an expert document analyst. Answer the user's question based ONLY on the context provided below.
 
 IMPORTANT INSTRUCTIONS:
 - Analyze information from the provided document
@@ -198,6 +201,25 @@ User Question: {user_query}
 
 Please provide a comprehensive answer based on the document:"""
 
+    return prompt
+
+def source_label(result):
+    """Filename of a retrieved chunk, with its page when known"""
+    if result.get("page"):
+        return f"{result['filename']} (page {result['page']})"
+    return result["filename"]
+
+def handle_rag_query(user_query, document_ids, with_trace=False):
+    try:
+        results = get_similar_chunks(user_query, document_ids)
+        
+        if not results:
+            return {
+                "answer": no_results_answer(user_query)
+            }
+        
+        prompt = build_rag_prompt(user_query, results)
+
         try:
             print("🚀 Starting Groq API RAG generation...")
             answer = groq_generate(prompt, max_tokens=300, temperature=0.3, timeout=90)
@@ -205,7 +227,7 @@ Please provide a comprehensive answer based on the document:"""
             if answer:
                 print("✅ Groq API RAG generation successful")
                 if with_trace:
-                    sources = ", ".join([r["filename"] for r in results])
+                    sources = ", ".join([source_label(r) for r in results])
                     return {
                         "answer": answer,
                         "sources": sources
@@ -0,0 +1,61 @@
+"""
+Thread-safe client-side rate limiting for external APIs.
+
+A RateLimiter spaces calls to at most `rate_per_minute` (0 = unlimited) and
+lets any thread report a provider back-off (HTTP 429 / Retry-After), which
+then pauses every thread using the same limiter instead of each worker
+discovering the limit on its own.
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, name, rate_per_minute=0):
+        self.name = name
+        self.interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self.acquired = 0
+        self.backoffs = 0
+        self.total_wait_s = 0.0
+
+    def acquire(self):
+        """Block until this caller may send a request."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot, self._blocked_until)
+            self._next_slot = start + self.interval
+            wait = start - now
+            self.acquired += 1
+            self.total_wait_s += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def backoff(self, seconds):
+        """Pause all callers for `seconds` (e.g. from a Retry-After hint)."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self.backoffs += 1
+        print(f"⏳ {self.name} rate limit: pausing all workers for {seconds:.1f}s")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.acquired,
+                "backoffs": self.backoffs,
+                "total_wait_s": round(self.total_wait_s, 3),
+                "rate_per_minute": round(60.0 / self.interval, 1) if self.interval else None,
+            }
+
+
+def retry_after_seconds(response, default=0.0):
+    """Parse a Retry-After header (seconds form) from a response."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,100 @@
+"""
+Extractive selection of salient chunks.
+
+Instead of the first N characters of raw_text, prompts that need "the
+gist" of a document (comparison, multi-document summaries) get the chunks
+that best represent it. A chunk's relevance is its cosine similarity to the
+document centroid (the mean of its stored chunk embeddings). Chunks are
+picked greedily by maximal marginal relevance, which trades relevance
+against similarity to chunks already picked, until a character budget is
+full. The picks are then joined in document order.
+
+Embeddings come from the same DocumentMatrixCache as retrieval, so no extra
+embedding calls are made.
+"""
+import os
+
+import numpy as np
+
+from .rag_pipeline import load_document_entries
+
+# Weight of centrality versus novelty in MMR (1.0 = pure centrality)
+SALIENCE_RELEVANCE_WEIGHT = float(os.getenv("SALIENCE_RELEVANCE_WEIGHT", "0.5"))
+
+# Longest overlap between consecutive chunks that is removed when joining
+# (text_utils.chunk_text uses a 200-character overlap)
+MAX_CHUNK_OVERLAP = 250
+
+
+def select_salient(matrix, lengths, budget_chars, relevance_weight=None):
+    """
+    Pick chunk indices within `budget_chars` by centroid similarity plus MMR.
+
+    `matrix` holds one row-normalised embedding per chunk and `lengths` the
+    character length of each chunk. Returns the chosen indices in document
+    order.
+    """
+    relevance_weight = SALIENCE_RELEVANCE_WEIGHT if relevance_weight is None else relevance_weight
+    n = matrix.shape[0]
+    if n == 0:
+        return []
+
+    centroid = matrix.mean(axis=0)
+    norm = np.linalg.norm(centroid)
+    relevance = matrix @ (centroid / norm) if norm else np.zeros(n, dtype=np.float32)
+
+    selected = []
+    # Highest similarity of each chunk to anything already selected
+    redundancy = np.zeros(n, dtype=np.float32)
+    lengths = np.asarray(lengths)
+    remaining = budget_chars
+    # Chunks that no longer fit are dropped before scoring, so each pass selects one
+    available = lengths <= remaining
+
+    while available.any():
+        scores = relevance_weight * relevance - (1 - relevance_weight) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        remaining -= lengths[best]
+        available[best] = False
+        available &= lengths <= remaining
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+
+    if not selected:
+        # Every chunk is larger than the budget: the most central one still goes in
+        selected = [int(np.argmax(relevance))]
+    return sorted(selected)
+
+
+def _overlap(previous, following):
+    for size in range(min(len(previous), len(following), MAX_CHUNK_OVERLAP), 0, -1):
+        if previous.endswith(following[:size]):
+            return size
+    return 0
+
+
+def join_chunks(texts, indices, separator="\n[...]\n"):
+    """Join chunks in order; consecutive chunks are merged without their overlap."""
+    parts = []
+    previous = None
+    for index in indices:
+        text = texts[index]
+        if previous is not None and index == previous + 1 and parts:
+            parts[-1] += text[_overlap(parts[-1], text):]
+        else:
+            parts.append(text)
+        previous = index
+    return separator.join(parts)
+
+
+def salient_texts(document_ids, budget_chars):
+    """Return {document_id: salient text of at most about budget_chars} for documents with embeddings."""
+    texts = {}
+    for entry in load_document_entries(document_ids):
+        if entry.matrix.shape[0] == 0:
+            continue
+        lengths = [len(text) for text in entry.texts]
+        indices = select_salient(entry.matrix, lengths, budget_chars)
+        texts[entry.document_id] = join_chunks(entry.texts, indices)[:budget_chars]
+    return texts
@@ -0,0 +1,87 @@
+"""
+Vectorised cosine-similarity scoring for chunk retrieval.
+
+Chunk embeddings for a document are stacked once into a row-normalised
+float32 matrix, so scoring a query against every chunk is a single
+matrix-vector product instead of a Python loop of per-chunk norms.
+"""
+import numpy as np
+
+
+def build_embedding_matrix(embeddings, dim=None):
+    """
+    Stack `embeddings` into a row-normalised float32 matrix.
+
+    Empty or wrongly sized vectors are skipped (the old per-chunk loop skipped
+    them too). Returns (matrix, kept_indices) where kept_indices maps each
+    matrix row back to its position in `embeddings`.
+    """
+    kept = []
+    rows = []
+    for i, emb in enumerate(embeddings):
+        if emb is None or len(emb) == 0:
+            continue
+        if dim is None:
+            dim = len(emb)
+        if len(emb) != dim:
+            print(f"⚠️ Skipping embedding {i}: expected {dim} dims, got {len(emb)}")
+            continue
+        kept.append(i)
+        rows.append(emb)
+
+    if not rows:
+        return np.zeros((0, dim or 0), dtype=np.float32), kept
+
+    matrix = np.asarray(rows, dtype=np.float32)
+    return normalize_rows(matrix), kept
+
+
+def normalize_rows(matrix):
+    """Scale each row to unit length in place (zero rows are left as zeros)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def normalize_query(query_embedding):
+    """Return the query as a unit-length float32 vector."""
+    query = np.asarray(query_embedding, dtype=np.float32).ravel()
+    norm = np.linalg.norm(query)
+    if norm == 0:
+        return query
+    return query / norm
+
+
+def top_k_indices(scores, k):
+    """Indices of the `k` highest scores, best first, via argpartition."""
+    n = scores.shape[0]
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def score_matrices(matrices, query_embedding, top_k):
+    """
+    Score a query against a list of per-document matrices.
+
+    Returns a list of (score, matrix_index, row_index) for the overall top_k
+    rows, best first.
+    """
+    sizes = [m.shape[0] for m in matrices]
+    if not matrices or sum(sizes) == 0:
+        return []
+
+    query = normalize_query(query_embedding)
+    scores = np.concatenate([m @ query for m in matrices if m.shape[0]])
+    offsets = np.cumsum([0] + [s for s in sizes if s])
+    non_empty = [i for i, s in enumerate(sizes) if s]
+
+    results = []
+    for idx in top_k_indices(scores, top_k):
+        block = int(np.searchsorted(offsets, idx, side="right") - 1)
+        results.append((float(scores[idx]), non_empty[block], int(idx - offsets[block])))
+    return results
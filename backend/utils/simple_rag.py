@@ -1,19 +1,53 @@
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 import re
 from .embeddings import embed_texts
+from .document_store import find_documents
+from .mongo import get_collection
 
 load_dotenv()
 
-# MongoDB setup using env vars
-MONGO_URI = os.getenv("MONGO_URI")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
-COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+# Atlas vector index over the `embedding` field of the chunks collection
+CHUNKS_VECTOR_INDEX = os.getenv("CHUNKS_VECTOR_INDEX", "chunks_vector_index")
 
-client = MongoClient(MONGO_URI)
-db = client[DATABASE_NAME]
-collection = db[COLLECTION_NAME]
+def vector_search_chunks(query_embedding, top_k=3):
+    """
+    Vector search over the dedicated chunks collection (one row per chunk).
+    """
+    pipeline = [
+        {
+            "$vectorSearch": {
+                "index": CHUNKS_VECTOR_INDEX,
+                "path": "embedding",
+                "queryVector": query_embedding,
+                "numCandidates": top_k * 10,
+                "limit": top_k
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "document_id": 1,
+                "text": 1,
+                "score": {"$meta": "vectorSearchScore"}
+            }
+        }
+    ]
+
+    rows = list(get_collection("chunks").aggregate(pipeline))
+    if not rows:
+        return []
+
+    # Chunk rows only carry document_id; fetch just the filenames
+    doc_ids = list({row['document_id'] for row in rows})
+    filenames = {doc['document_id']: doc.get('filename', 'Unknown')
+                 for doc in find_documents(doc_ids, "metadata")}
+
+    return [{
+        'chunk': row.get('text', ''),
+        'filename': filenames.get(row['document_id'], 'Unknown'),
+        'score': row.get('score', 0)
+    } for row in rows if row.get('text')]
 
 # --- NEW FUNCTION: Replaces the old regex 'simple_search' ---
 def vector_search(query, top_k=3):
@@ -25,7 +59,16 @@ def vector_search(query, top_k=3):
         # 1. Convert user query to vector
         query_embedding = embed_texts(query)
 
-        # 2. Define the MongoDB Aggregation Pipeline
+        # Documents stored with the split layout are searched per chunk
+        try:
+            chunk_results = vector_search_chunks(query_embedding, top_k)
+            if chunk_results:
+                print(f"Found {len(chunk_results)} matching chunks.")
+                return chunk_results
+        except Exception as e:
+            print(f"⚠️ Chunk collection vector search failed: {str(e)}")
+
+        # 2. Older documents embed their chunks in the parent document
         pipeline = [
             {
                 "$vectorSearch": {
@@ -53,7 +96,7 @@ def vector_search(query, top_k=3):
 
         print("Executing vector search against MongoDB...")
         # 3. Run the pipeline
-        mongo_results = list(collection.aggregate(pipeline))
+        mongo_results = list(get_collection("documents").aggregate(pipeline))
         print(f"Found {len(mongo_results)} matching parent documents.")
 
         # 4. Process results to match the format expected by 'simple_answer'
@@ -0,0 +1,167 @@
+"""
+Server-sent events for /api/query/stream.
+
+stream_query() routes a query exactly like intent_router.handle_query, but
+instead of waiting for the whole answer it yields SSE frames as Groq
+produces text:
+
+    event: status  {"intent", "stage"}  sent before retrieval or condensing starts
+    event: start   {"intent", "sources", "translation_info"}
+    event: token   {"text"}            one per streamed delta
+    event: end     {"metadata": {...}} timings, fallback/cached flags, caller extras
+    event: error   {"error"}
+
+Answers that need no generation (stored summaries, "nothing found") are sent
+as a single token event. When Groq produces no text, the handler's usual
+fallback answer is sent instead.
+"""
+import json
+import time
+
+from .comparison import build_comparison_prompt, unavailable_comparison_message
+from .groq_api import groq_stream
+from .intent_router import detect_intent, prepare_query
+from .rag_pipeline import build_rag_prompt, get_similar_chunks, no_results_answer, source_label
+from .summarizer import (
+    document_summary_prompt, generate_enhanced_fallback_summary, multi_document_summary_prompt,
+    save_summary, stored_summary,
+)
+
+
+# What plan_answer() is busy with for each intent, for the `status` event
+PLANNING_STAGES = {1: "retrieving", 2: "summarizing", 3: "comparing", 4: "retrieving"}
+
+
+def sse(event, data):
+    """Format one server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def plan_answer(query, document_ids, intent):
+    """
+    Work out how to answer without generating anything yet.
+
+    Returns a dict with either `answer` (ready text) or `prompt` plus Groq
+    settings, a `fallback` callable for when Groq produces nothing, and an
+    optional `on_complete` callable that receives the generated text.
+    """
+    if intent in (1, 4):
+        results = get_similar_chunks(query, document_ids)
+        if not results:
+            return {"answer": no_results_answer(query), "sources": []}
+
+        def rag_fallback():
+            from utils.simple_rag import handle_simple_rag_query
+            return handle_simple_rag_query(query, document_ids)["answer"]
+
+        return {
+            "prompt": build_rag_prompt(query, results),
+            "max_tokens": 300, "timeout": 90,
+            "sources": list(dict.fromkeys(source_label(r) for r in results)),
+            "fallback": rag_fallback,
+        }
+
+    if intent == 2:
+        if len(document_ids) == 1:
+            document_id = document_ids[0]
+            cached = stored_summary(document_id)
+            if cached:
+                return {"answer": cached, "sources": [], "cached": True}
+            prompt, raw_text = document_summary_prompt(document_id)
+            if prompt is None:
+                return {"answer": "No document content found to summarize.", "sources": []}
+            return {
+                "prompt": prompt, "max_tokens": 800, "timeout": 90, "sources": [],
+                "fallback": lambda: generate_enhanced_fallback_summary(raw_text, [document_id]),
+                "on_complete": lambda summary: save_summary(document_id, summary),
+            }
+
+        prompt, combined_text = multi_document_summary_prompt(document_ids)
+        if prompt is None:
+            return {"answer": "No documents found to summarize.", "sources": []}
+        return {
+            "prompt": prompt, "max_tokens": 800, "timeout": 90, "sources": [],
+            "fallback": lambda: generate_enhanced_fallback_summary(combined_text, document_ids),
+        }
+
+    if intent == 3:
+        prompt, filenames = build_comparison_prompt(query, document_ids)
+        if prompt is None:
+            return {"answer": filenames, "sources": []}
+        return {
+            "prompt": prompt, "max_tokens": 1500, "timeout": 180, "sources": filenames,
+            "fallback": lambda: unavailable_comparison_message(filenames),
+        }
+
+    return {"answer": "[Error] Couldn't determine the intent of your query.", "sources": []}
+
+
+def stream_query(user_query, document_ids, query_lang=None, closing_metadata=None):
+    """Yield SSE frames answering user_query; closing_metadata() is merged into the end event."""
+    started = time.perf_counter()
+    first_token_ms = None
+    deltas = 0
+    try:
+        processing_query, query_lang, was_translated = prepare_query(user_query, query_lang)
+        intent = detect_intent(processing_query)
+        # Retrieval and condensing long documents can take seconds; let the client know we're on it
+        yield sse("status", {"intent": intent, "stage": PLANNING_STAGES.get(intent, "planning")})
+        plan = plan_answer(processing_query, document_ids, intent)
+
+        start = {"intent": intent, "sources": plan.get("sources", [])}
+        if was_translated:
+            start["translation_info"] = {
+                'original_query': user_query,
+                'translated_query': processing_query,
+                'query_language': query_lang,
+                'was_translated': True
+            }
+        yield sse("start", start)
+
+        if was_translated:
+            yield sse("token", {"text": f"[Query translated from {query_lang} to English]\n\n"})
+
+        fallback_used = False
+        if "answer" in plan:
+            first_token_ms = (time.perf_counter() - started) * 1000
+            yield sse("token", {"text": plan["answer"]})
+        else:
+            parts = []
+            try:
+                for delta in groq_stream(plan["prompt"], max_tokens=plan["max_tokens"], temperature=0.3,
+                                         timeout=plan["timeout"]):
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - started) * 1000
+                    deltas += 1
+                    parts.append(delta)
+                    yield sse("token", {"text": delta})
+            except Exception as e:
+                # Text already sent cannot be taken back; otherwise fall back below
+                if parts:
+                    raise
+                print(f"❌ Groq stream error: {str(e)}")
+
+            if parts:
+                if plan.get("on_complete"):
+                    plan["on_complete"]("".join(parts).strip())
+            else:
+                print("❌ Groq stream produced no text, using fallback...")
+                fallback_used = True
+                first_token_ms = (time.perf_counter() - started) * 1000
+                yield sse("token", {"text": plan["fallback"]()})
+
+        metadata = {
+            "intent": intent,
+            "cached": plan.get("cached", False),
+            "fallback": fallback_used,
+            "deltas": deltas,
+            "time_to_first_token_ms": round(first_token_ms, 1),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if closing_metadata:
+            metadata.update(closing_metadata())
+        yield sse("end", {"metadata": metadata})
+
+    except Exception as e:
+        print(f"❌ Streaming query error: {str(e)}")
+        yield sse("error", {"error": f"I encountered an error while processing your request: {str(e)}. Please try again."})
@@ -1,39 +1,33 @@
-from pymongo import MongoClient
 from dotenv import load_dotenv
+from datetime import datetime
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from .groq_api import groq_summarize_generate, test_groq_connection
+from .groq_api import groq_summarize_generate, test_groq_connection, MODEL_NAME
+from .document_store import find_documents, store_summary
+from .map_reduce_summary import condense
+from .salience import salient_texts
 
 load_dotenv()
 
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["documents"]
-collection = db["mangobytes"]
+# Single-document summaries are stored on the document under
+# summary.<summary_cache_key()>. Bump SUMMARY_PROMPT_VERSION whenever
+# single_document_prompt() changes so stale summaries are regenerated.
+SUMMARY_PROMPT_VERSION = "2"
 
-def summarize_documents(user_query, document_ids):
-    try:
-        # Fetch documents from MongoDB
-        docs = collection.find({ "document_id": { "$in": document_ids } })
+# Generate the summary in the background right after upload
+PRECOMPUTE_SUMMARIES = os.getenv("PRECOMPUTE_SUMMARIES", "false").lower() in ("1", "true", "yes")
 
-        if len(document_ids) == 1:
-            # Single document summarization
-            combined_text = ""
-            chunks = []
-            for doc in docs:
-                raw_text = doc.get('raw_text', '')
-                combined_text += raw_text + "\n\n"
-                
-                # Also get chunks for better summarization
-                if 'chunks' in doc:
-                    for chunk in doc['chunks']:
-                        chunks.append(chunk.get('text', ''))
+_precompute_executor = None
+_precompute_lock = threading.Lock()
 
-            if not combined_text.strip():
-                return { "answer": "No document content found to summarize." }
+def summary_cache_key():
+    # MongoDB field names cannot contain '.', model names do ("llama-3.1-8b-instant")
+    return f"v{SUMMARY_PROMPT_VERSION}:{MODEL_NAME}".replace(".", "_")
 
-            # Use the improved prompt with Groq API
-            chunks_text = '\n'.join(chunks[:10])  # Use first 10 chunks
-            prompt = f"""You are an expert document summarizer. Create a comprehensive, well-formatted summary with the following structure:
+def single_document_prompt(document_content):
+    return f"""You are an expert document summarizer. Create a comprehensive, well-formatted summary with the following structure:
 
 # 📋 DOCUMENT SUMMARY
 
@@ -59,37 +53,39 @@ def summarize_documents(user_query, document_ids):
 ## 💡 RECOMMENDATIONS & INSIGHTS
 [Any recommendations, suggestions, or insights provided in the document]
 
-Document content:
-{combined_text[:3000]}  # Limit to first 3000 chars to avoid timeouts
-
-Important chunks:
-{chunks_text}
+Document content (the full text, or section notes covering all of it for long documents):
+{document_content}
 
 Please format the response with clear headings, bullet points, and highlight key elements using **bold** text for emphasis."""
-        else:
-            # Multiple document summarization
-            documents_data = []
-            combined_text = ""  # Initialize combined_text for multi-doc case
-            for doc in docs:
-                doc_data = {
-                    'id': doc.get('document_id', 'unknown'),
-                    'filename': doc.get('filename', 'Unknown'),
-                    'raw_text': doc.get('raw_text', ''),
-                    'chunks': [chunk.get('text', '') for chunk in doc.get('chunks', [])]
-                }
-                documents_data.append(doc_data)
-                combined_text += doc.get('raw_text', '') + "\n\n"  # Build combined_text
-
-            if not documents_data:
-                return { "answer": "No documents found to summarize." }
-
-            # Create multi-document summary prompt
-            docs_content = ""
-            for i, doc in enumerate(documents_data, 1):
-                docs_content += f"\n--- DOCUMENT {i}: {doc['filename']} ---\n"
-                docs_content += doc['raw_text'][:2000] + "\n\n"
-
-            prompt = f"""You are an expert multi-document analyst. Create a comprehensive summary comparing and analyzing {len(documents_data)} documents.
+
+def multi_document_summary_prompt(document_ids):
+    """Returns (prompt, combined_text); prompt is None when no documents are found"""
+    # Multiple document summarization
+    docs = find_documents(document_ids, "text-head", head_chars=2000)
+    documents_data = []
+    combined_text = ""  # Initialize combined_text for multi-doc case
+    for doc in docs:
+        doc_data = {
+            'id': doc.get('document_id', 'unknown'),
+            'filename': doc.get('filename', 'Unknown'),
+            'raw_text': doc.get('raw_text', ''),
+            'chunks': [chunk.get('text', '') for chunk in doc.get('chunks', [])]
+        }
+        documents_data.append(doc_data)
+        combined_text += doc.get('raw_text', '') + "\n\n"  # Build combined_text
+
+    if not documents_data:
+        return None, combined_text
+
+    # Create multi-document summary prompt from each document's most
+    # salient chunks (opening text when it has no embeddings)
+    salient = salient_texts([doc['id'] for doc in documents_data], 2000)
+    docs_content = ""
+    for i, doc in enumerate(documents_data, 1):
+        docs_content += f"\n--- DOCUMENT {i}: {doc['filename']} ---\n"
+        docs_content += (salient.get(doc['id']) or doc['raw_text'][:2000]) + "\n\n"
+
+    prompt = f"""You are an expert multi-document analyst. Create a comprehensive summary comparing and analyzing {len(documents_data)} documents.
 
 # 📚 MULTI-DOCUMENT ANALYSIS
 
@@ -119,61 +115,111 @@ Documents to analyze:
 {docs_content}
 
 Please provide a comprehensive analysis that synthesizes information from all {len(documents_data)} documents."""
-        prompt = f"""You are an expert document summarizer. Create a comprehensive, well-formatted summary with the following structure:
-
-# 📋 DOCUMENT SUMMARY
-
-## 📊 OVERALL SUMMARY
-[Write a concise 5-10 sentence summary of the main content and purpose of the document]
-
-## 📝 SECTION-WISE BREAKDOWN
-[For each major section, provide:
-- **Section Title**: [Section name]
-- **Key Points**: [2-3 bullet points with key information]
-- **Important Details**: [Highlight any critical data, findings, or conclusions]]
-
-## 🔍 KEY FINDINGS & HIGHLIGHTS
-[Extract and highlight 5-7 most important findings, including:
-- **Research Findings**: [Any research results or discoveries]
-- **Methodologies**: [Key methods or approaches mentioned]
-- **Conclusions**: [Main conclusions or recommendations]
-- **Critical Data**: [Important statistics, numbers, or metrics]]
 
-## 🎯 MAIN TOPICS & THEMES
-[List the primary topics, themes, and subject areas covered in the document]
+    return prompt, combined_text
 
-## 💡 RECOMMENDATIONS & INSIGHTS
-[Any recommendations, suggestions, or insights provided in the document]
-
-Document content:
-{combined_text[:3000]}  # Limit to first 3000 chars to avoid timeouts
-
-Important chunks:
-{chunks_text}
+def summarize_documents(user_query, document_ids, regenerate=False):
+    try:
+        if len(document_ids) == 1:
+            return summarize_document(document_ids[0], regenerate=regenerate)
 
-Please format the response with clear headings, bullet points, and highlight key elements using **bold** text for emphasis."""
+        prompt, combined_text = multi_document_summary_prompt(document_ids)
+        if prompt is None:
+            return { "answer": "No documents found to summarize." }
 
-        try:
-            print("🚀 Starting Groq API summarization...")
-            full_response = groq_summarize_generate(prompt, max_tokens=800, temperature=0.3, timeout=90)
-            
-            if full_response:
-                print(f"✅ Groq API summarization completed successfully")
-                return { "answer": full_response.strip() }
-            else:
-                print(f"❌ Groq API summarization failed")
-                summary = generate_enhanced_fallback_summary(combined_text, document_ids)
-                
-        except Exception as e:
-            print(f"❌ Groq API summarization error: {str(e)}, using enhanced fallback...")
+        summary = generate_summary(prompt)
+        if summary is None:
             summary = generate_enhanced_fallback_summary(combined_text, document_ids)
-
         return { "answer": summary }
         
     except Exception as e:
         print(f"Summarization error: {str(e)}")
         return { "answer": f"Error generating summary: {str(e)}" }
 
+def stored_summary(document_id):
+    """Stored summary text for the current prompt version and model, or None"""
+    docs = find_documents([document_id], "summary")
+    cached = (docs[0].get('summary') or {}).get(summary_cache_key()) if docs else None
+    if cached and cached.get('text'):
+        print(f"💾 Serving stored summary for {docs[0].get('filename', document_id)}")
+        return cached['text']
+    return None
+
+def document_summary_prompt(document_id):
+    """Returns (prompt, raw_text); prompt is None when the document has no text"""
+    docs = find_documents([document_id], "text")
+    raw_text = docs[0].get('raw_text', '') if docs else ''
+    if not raw_text.strip():
+        return None, raw_text
+
+    # Long documents are condensed section by section so the prompt covers all of the text
+    return single_document_prompt(condense(raw_text)), raw_text
+
+def save_summary(document_id, summary):
+    store_summary(document_id, summary_cache_key(), {
+        'text': summary,
+        'prompt_version': SUMMARY_PROMPT_VERSION,
+        'model': MODEL_NAME,
+        'created_at': datetime.utcnow().isoformat()
+    })
+
+def summarize_document(document_id, regenerate=False):
+    """
+    Summary of one document, served from its stored `summary` field when a
+    summary for the current prompt version and model exists. Pass
+    regenerate=True to force a new one. The result has found=False when the
+    document is missing or has no text.
+    """
+    if not regenerate:
+        cached = stored_summary(document_id)
+        if cached:
+            return { "answer": cached, "cached": True }
+
+    prompt, raw_text = document_summary_prompt(document_id)
+    if prompt is None:
+        return { "answer": "No document content found to summarize.", "found": False }
+
+    summary = generate_summary(prompt)
+    if summary is None:
+        # Fallback summaries are not stored, so the next request tries the model again
+        return { "answer": generate_enhanced_fallback_summary(raw_text, [document_id]) }
+
+    save_summary(document_id, summary)
+    return { "answer": summary, "cached": False }
+
+def generate_summary(prompt):
+    """Run a summarization prompt through Groq; None if the model is unavailable"""
+    try:
+        print("🚀 Starting Groq API summarization...")
+        full_response = groq_summarize_generate(prompt, max_tokens=800, temperature=0.3, timeout=90)
+        
+        if full_response:
+            print(f"✅ Groq API summarization completed successfully")
+            return full_response.strip()
+        print(f"❌ Groq API summarization failed")
+        
+    except Exception as e:
+        print(f"❌ Groq API summarization error: {str(e)}, using enhanced fallback...")
+    return None
+
+def _get_precompute_executor():
+    global _precompute_executor
+    if _precompute_executor is None:
+        with _precompute_lock:
+            if _precompute_executor is None:
+                _precompute_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+    return _precompute_executor
+
+def _precompute_summary(document_id):
+    try:
+        summarize_document(document_id)
+    except Exception as e:
+        print(f"❌ Background summary failed for {document_id}: {str(e)}")
+
+def schedule_summary(document_id):
+    """Generate and store a document's summary in a background thread"""
+    return _get_precompute_executor().submit(_precompute_summary, document_id)
+
 def generate_enhanced_fallback_summary(text, document_ids):
     """Generate an enhanced fallback summary with section analysis"""
     try:
@@ -3,26 +3,96 @@ import requests
 from dotenv import load_dotenv
 from .groq_api import groq_generate
 import re
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import langdetect
+from .persistent_cache import content_key, normalize_text, open_cache
 
 load_dotenv()
 
-def detect_language(text):
+# Chunks of one document translated at once (shared across requests).
+# Groq's rate limiter in groq_api keeps the workers under the provider limit.
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "4"))
+
+# Translation memory: Groq translations of split_text_for_translation segments,
+# keyed by (source, target, normalised segment), in memory and on local disk.
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", os.path.join(".cache", "translations.sqlite3"))
+TRANSLATION_CACHE_MEMORY_ITEMS = int(os.getenv("TRANSLATION_CACHE_MEMORY_ITEMS", "1024"))
+TRANSLATION_CACHE_MAX_MB = float(os.getenv("TRANSLATION_CACHE_MAX_MB", "128"))
+
+translation_memory = open_cache("Translation", TRANSLATION_CACHE_PATH, TRANSLATION_CACHE_MEMORY_ITEMS,
+                                TRANSLATION_CACHE_MAX_MB) if TRANSLATION_CACHE_PATH else None
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TRANSLATION_CONCURRENCY, thread_name_prefix="translate")
+    return _executor
+
+# Detection results are memoised per text sample. Short pure-ASCII input that
+# contains a common English word skips langdetect entirely (ASCII alone is not
+# enough: "Was sind die Ergebnisse?" is ASCII). Set
+# LANGDETECT_ASCII_FAST_PATH_CHARS=0 to always run the detector.
+LANGDETECT_MEMO_SIZE = int(os.getenv("LANGDETECT_MEMO_SIZE", "1024"))
+LANGDETECT_ASCII_FAST_PATH_CHARS = int(os.getenv("LANGDETECT_ASCII_FAST_PATH_CHARS", "80"))
+_ENGLISH_MARKERS = frozenset(
+    "the this that these those what which who how why when where are does should "
+    "and with about from please give tell explain summarize summarise compare".split()
+)
+
+def _is_short_english(sample):
+    if len(sample.strip()) > LANGDETECT_ASCII_FAST_PATH_CHARS or not sample.isascii():
+        return False
+    return any(word in _ENGLISH_MARKERS for word in re.findall(r"[a-z]+", sample.lower()))
+
+@lru_cache(maxsize=LANGDETECT_MEMO_SIZE)
+def _detect_sample(sample):
+    # detect_langs is a single detector run and already returns the probabilities
+    best = langdetect.detect_langs(sample)[0]
+    return best.lang, best.prob
+
+def detect_language_with_confidence(text):
     """
-    Detect the language of the given text
-    Returns: language code (e.g., 'es', 'fr', 'de', 'hi', etc.)
+    Detect the language of the given text in one detector pass
+    Returns: tuple of (language code, confidence), ('unknown', 0.0) on failure
     """
+    sample = text[:1000]  # Use first 1000 chars for detection
+    if _is_short_english(sample):
+        return 'en', 1.0
+    
     try:
-        # Try langdetect first (more reliable for longer texts)
-        detected = langdetect.detect(text[:1000])  # Use first 1000 chars for detection
-        confidence = langdetect.detect_langs(text[:1000])[0].prob
-        
-        print(f"🌍 Language detected: {detected} (confidence: {confidence:.2f})")
-        return detected
+        hits = _detect_sample.cache_info().hits
+        detected, confidence = _detect_sample(sample)
+        if _detect_sample.cache_info().hits == hits:
+            print(f"🌍 Language detected: {detected} (confidence: {confidence:.2f})")
+        return detected, confidence
         
     except Exception as e:
         print(f"❌ Language detection error: {str(e)}")
-        return 'unknown'
+        return 'unknown', 0.0
+
+def detect_language(text):
+    """
+    Detect the language of the given text
+    Returns: language code (e.g., 'es', 'fr', 'de', 'hi', etc.)
+    """
+    return detect_language_with_confidence(text)[0]
+
+def language_detection_stats():
+    info = _detect_sample.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "memo_size": info.currsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 3) if lookups else 0.0,
+    }
 
 def is_english(text):
     """Check if text is already in English"""
@@ -54,16 +124,44 @@ def translate_with_groq(text, source_lang, target_lang='en', max_chunk_size=2000
         
         # Split text into manageable chunks
         chunks = split_text_for_translation(text, max_chunk_size)
-        translated_chunks = []
         
         print(f"🌍 Translating {len(chunks)} chunks from {source_name} to {target_name}")
         
-        for i, chunk in enumerate(chunks):
-            if not chunk.strip():
-                translated_chunks.append(chunk)
-                continue
-                
-            prompt = f"""You are an expert translator. Translate the following {source_name} text to {target_name}. 
+        def translate(indexed_chunk):
+            i, chunk = indexed_chunk
+            return _translate_chunk(chunk, i, len(chunks), source_name, target_name, source_lang, target_lang)
+        
+        # map() keeps the original chunk order whatever order workers finish in
+        if len(chunks) > 1 and TRANSLATION_CONCURRENCY > 1:
+            translated_chunks = list(_get_executor().map(translate, enumerate(chunks)))
+        else:
+            translated_chunks = [translate(item) for item in enumerate(chunks)]
+        
+        # Join all translated chunks
+        full_translation = " ".join(translated_chunks)
+        print(f"✅ Translation completed: {len(text)} → {len(full_translation)} characters")
+        
+        return full_translation
+        
+    except Exception as e:
+        print(f"❌ Groq translation error: {str(e)}")
+        return translate_with_google(text, source_lang, target_lang)
+
+def _translate_chunk(chunk, i, total, source_name, target_name, source_lang, target_lang):
+    """
+    Translate one chunk with Groq, falling back to Google Translate for this chunk only
+    """
+    if not chunk.strip():
+        return chunk
+    
+    key = content_key(source_lang, target_lang, normalize_text(chunk))
+    if translation_memory is not None:
+        cached = translation_memory.get(key)
+        if cached is not None:
+            print(f"💾 Chunk {i+1}/{total} served from translation memory")
+            return cached.decode("utf-8")
+        
+    prompt = f"""You are an expert translator. Translate the following {source_name} text to {target_name}. 
 
 IMPORTANT INSTRUCTIONS:
 - Provide ONLY the translation, no explanations or additional text
@@ -77,38 +175,28 @@ Text to translate:
 
 Translation:"""
 
-            try:
-                translation = groq_generate(
-                    prompt, 
-                    max_tokens=min(len(chunk) * 2, 1500),  # Estimate output length
-                    temperature=0.1,  # Low temperature for consistent translation
-                    timeout=60
-                )
-                
-                if translation:
-                    # Clean up the translation (remove any extra explanations)
-                    translation = clean_translation_output(translation)
-                    translated_chunks.append(translation)
-                    print(f"✅ Chunk {i+1}/{len(chunks)} translated successfully")
-                else:
-                    print(f"⚠️ Groq translation failed for chunk {i+1}, using Google Translate fallback")
-                    fallback_translation = translate_with_google(chunk, source_lang, target_lang)
-                    translated_chunks.append(fallback_translation)
-                    
-            except Exception as e:
-                print(f"❌ Error translating chunk {i+1}: {str(e)}")
-                fallback_translation = translate_with_google(chunk, source_lang, target_lang)
-                translated_chunks.append(fallback_translation)
-        
-        # Join all translated chunks
-        full_translation = " ".join(translated_chunks)
-        print(f"✅ Translation completed: {len(text)} → {len(full_translation)} characters")
+    try:
+        translation = groq_generate(
+            prompt, 
+            max_tokens=min(len(chunk) * 2, 1500),  # Estimate output length
+            temperature=0.1,  # Low temperature for consistent translation
+            timeout=60
+        )
         
-        return full_translation
+        if translation:
+            # Clean up the translation (remove any extra explanations)
+            translation = clean_translation_output(translation)
+            if translation_memory is not None:
+                translation_memory.put(key, translation.encode("utf-8"))
+            print(f"✅ Chunk {i+1}/{total} translated successfully")
+            return translation
         
+        print(f"⚠️ Groq translation failed for chunk {i+1}, using Google Translate fallback")
+        return translate_with_google(chunk, source_lang, target_lang)
+            
     except Exception as e:
-        print(f"❌ Groq translation error: {str(e)}")
-        return translate_with_google(text, source_lang, target_lang)
+        print(f"❌ Error translating chunk {i+1}: {str(e)}")
+        return translate_with_google(chunk, source_lang, target_lang)
 
 def translate_with_google(text, source_lang, target_lang='en'):
     """
@@ -217,16 +305,17 @@ def clean_translation_output(translation):
     
     return cleaned
 
-def translate_document_content(raw_text, filename="document"):
+def translate_document_content(raw_text, filename="document", source_lang=None):
     """
     Main function to handle document translation
+    Pass source_lang when the language is already known to skip detection.
     Returns: tuple of (translated_text, original_language, was_translated)
     """
     try:
         print(f"🌍 Processing document for translation: {filename}")
         
         # Detect language
-        detected_lang = detect_language(raw_text)
+        detected_lang = source_lang or detect_language(raw_text)
         
         if detected_lang == 'unknown':
             print("⚠️ Could not detect language, assuming English")
@@ -252,12 +341,13 @@ def translate_document_content(raw_text, filename="document"):
         print(f"❌ Translation process error: {str(e)}")
         return raw_text, 'unknown', False
 
-def translate_query(query, target_lang='en'):
+def translate_query(query, target_lang='en', source_lang=None):
     """
     Translate user queries if needed
+    Pass source_lang when the query language is already known.
     """
     try:
-        detected_lang = detect_language(query)
+        detected_lang = source_lang or detect_language(query)
         
         if detected_lang == target_lang:
             return query, detected_lang
@@ -269,4 +359,7 @@ def translate_query(query, target_lang='en'):
         
     except Exception as e:
         print(f"❌ Query translation error: {str(e)}")
-        return query, 'unknown'
\ No newline at end of file
+        return query, 'unknown'
+
+def translation_cache_stats():
+    return translation_memory.stats() if translation_memory is not None else {"enabled": False}
@@ -115,25 +115,30 @@ const FileUploader = ({ onUploadSuccess }) => {
     console.log(`📤 Sending ${selectedFiles.length} file(s) to backend`);
 
     try {
-      // Simulate progress for better UX
-      const progressInterval = setInterval(() => {
-        setUploadProgress(prev => {
-          if (prev >= 90) {
-            clearInterval(progressInterval);
-            return 90;
-          }
-          return prev + Math.random() * 15;
-        });
-      }, 200);
-
-      const response = await axios.post(`${import.meta.env.VITE_API_BASE_URL}/api/upload`, formData, {
+      // The backend queues the files and returns a job id; poll it for per-file progress
+      const queued = await axios.post(`${import.meta.env.VITE_API_BASE_URL}/api/upload?async=1`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
         timeout: 120000,
       });
 
-      clearInterval(progressInterval);
+      const stageProgress = { queued: 0, extracted: 25, translated: 50, embedded: 75, stored: 100, failed: 100 };
+      let job;
+      do {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        job = (await axios.get(`${import.meta.env.VITE_API_BASE_URL}${queued.data.status_url}`)).data;
+        const done = job.files.reduce((sum, file) => sum + stageProgress[file.stage], 0);
+        setUploadProgress(Math.min(95, done / job.files.length));
+      } while (job.status === 'queued' || job.status === 'running');
+
+      if (job.status === 'failed') {
+        const error = new Error(job.result?.error || 'Upload failed. Please try again.');
+        error.response = { data: job.result };
+        throw error;
+      }
+      const response = { data: job.result };
+
       setUploadProgress(100);
       
       setUploadMessage('Upload successful! Redirecting to chat...');